@@ -9,6 +9,16 @@ import json
 from pathlib import Path
 from datetime import datetime
 
+from emi_matcher import KeywordAutomaton
+
+# Lender aliases for the demo filter (same substrings the demo has always matched)
+DEMO_KEYWORDS = {
+    'L&T': ['L&T', 'LT'],
+    'HDFC': ['HDFC'],
+    'Tata': ['TATA'],
+    'Bajaj': ['BAJAJ'],
+}
+
 def demo_csv_no_pandas(csv_file: str):
     """Run EMPIRE DEMO using built-in csv module (no pandas needed)."""
     
@@ -52,7 +62,7 @@ def demo_csv_no_pandas(csv_file: str):
     
     # Step 2: FILTER Debits >₹20k + keywords
     print("\n[Step 2] FILTER Debits >₹20k + keywords (L&T/HDFC/Tata/Bajaj)...")
-    keywords = ['L&T', 'HDFC', 'Tata', 'Bajaj', 'LT', 'lt', 'hdfc', 'tata', 'bajaj']
+    automaton = KeywordAutomaton(DEMO_KEYWORDS)  # one pass per narration for all aliases
     
     # Find columns
     if not rows:
@@ -79,15 +89,17 @@ def demo_csv_no_pandas(csv_file: str):
     
     # Filter rows
     filtered = []
+    lenders = {}  # id(row) -> lenders named in its narration
     for row in rows:
         try:
             debit_val = float(str(row.get(debit_col, '0')).replace(',', ''))
-            desc_val = str(row.get(desc_col, '')).upper()
             
             if debit_val > 20000:
                 # Check keywords
-                if any(kw.upper() in desc_val for kw in keywords):
+                found = automaton.labels(str(row.get(desc_col, '')))
+                if found:
                     filtered.append(row)
+                    lenders[id(row)] = found
         except (ValueError, TypeError):
             continue
     
@@ -121,7 +133,7 @@ def demo_csv_no_pandas(csv_file: str):
     
     # Step 4: HDFC Projection
     print("\n[Step 4] HDFC Projection: 12 rows (P+I split)...")
-    hdfc_transactions = [r for r in filtered if 'HDFC' in str(r.get(desc_col, '')).upper()]
+    hdfc_transactions = [r for r in filtered if 'HDFC' in lenders[id(r)]]
     hdfc_total = sum(float(str(r.get(debit_col, '0')).replace(',', '')) for r in hdfc_transactions)
     
     if hdfc_total > 0:
@@ -136,11 +148,17 @@ def demo_csv_no_pandas(csv_file: str):
         print(f"{'Month':<8} {'EMI Total':<12} {'Principal':<12} {'Interest':<12} {'OS Bal':<12}")
         print("-" * 70)
         
+        def pi_split():
+            balances, balance = [], outstanding
+            for _ in range(12):
+                balance = max(0, balance - principal_part)
+                balances.append(balance)
+            return balances
+        
+        balances = pi_split()
+        
         projection_data = []
-        for month in range(1, 13):
-            outstanding -= principal_part
-            if outstanding < 0:
-                outstanding = 0
+        for month, outstanding in enumerate(balances, 1):
             projection_data.append({
                 'Month': f'Mo{month}',
                 'EMI Total': round(monthly_emi, 2),
@@ -0,0 +1,111 @@
+"""
+Benchmark: projections computed by Postgres (generate_series / materialized view)
+against the Python engine (Loan.get_by_user + schedule cache), same rows checked.
+Creates a throwaway user with N loans and deletes it afterwards.
+
+Usage: python bench_projections.py --loans 10000 [--view]
+"""
+
+import argparse
+import sys
+import time
+import uuid
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Backend modules, then the Debt Empire root (projection_writer, core/)
+sys.path.insert(0, str(Path(__file__).parent))
+sys.path.append(str(Path(__file__).parent.parent))
+
+from database import init_db, get_db
+from database import models
+from database.models import User, Loan, Projection
+from database.connection import test_connection, init_projection_view
+from projection_writer import API_COLUMNS, iter_projection_json, iter_rows_json
+from core.schedule_cache import ScheduleCache
+
+PROVIDERS = ['L&T', 'HDFC', 'Tata', 'Bajaj']
+
+
+def create_bench_user(n_loans):
+    """Throwaway user with n_loans loans, inserted in one statement."""
+    from psycopg2.extras import execute_values
+    user = User.create(f"bench-{uuid.uuid4().hex[:8]}@debt-empire.local", "bench")
+    rows = []
+    for i in range(n_loans):
+        outstanding = 100000 + (i * 7919) % 4900000
+        emi = 20000 + (i * 104729) % 180000
+        start = None if i % 10 == 0 else f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}"
+        rows.append((user['id'], PROVIDERS[i % 4], f"BENCH{i}", outstanding, emi, 36,
+                     round(outstanding * 0.70), outstanding - round(outstanding * 0.70), start))
+    with get_db() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, """
+                INSERT INTO loans (user_id, provider, account_ref, outstanding, emi, tenure_months,
+                                   ots_amount_70pct, savings, start_date)
+                VALUES %s
+            """, rows, page_size=5000)
+    return user
+
+
+def timed(label, fn, timings):
+    start = time.perf_counter()
+    result = fn()
+    timings[label] = time.perf_counter() - start
+    return result
+
+
+def run_benchmark(n_loans, use_view):
+    if not test_connection():
+        print("❌ Database connection failed. Please check DATABASE_URL in .env")
+        return False
+    init_db()
+    if use_view:
+        init_projection_view()
+
+    user = create_bench_user(n_loans)
+    user_id = user['id']
+    timings = {}
+    try:
+        models._projection_view = False
+        sql_rows = timed("SQL generate_series (fetch)", lambda: Projection.schedule(user_id), timings)
+        timed("SQL generate_series (fetch + JSON)", lambda: "".join(iter_rows_json(
+            {}, (dict(zip(API_COLUMNS, r)) for r in Projection.schedule(user_id)))), timings)
+        if use_view:
+            models._projection_view = True
+            view_rows = timed("SQL materialized view (fetch)", lambda: Projection.schedule(user_id), timings)
+            assert view_rows == sql_rows, "materialized view rows differ from generate_series"
+
+        loans = timed("Python: Loan.get_by_user", lambda: Loan.get_by_user(user_id), timings)
+        cache = ScheduleCache()
+        timed("Python engine, cold cache (JSON)",
+              lambda: "".join(iter_projection_json(loans, cache=cache)), timings)
+        timed("Python engine, warm cache (JSON)",
+              lambda: "".join(iter_projection_json(loans, cache=cache)), timings)
+
+        from projection_writer import _iter_api_rows
+        python_rows = [tuple(r[c] for c in API_COLUMNS) for r in _iter_api_rows(loans, 60, 1, 60, cache)]
+        # Bulk-inserted loans share created_at, so compare independent of the tie order
+        assert sorted(python_rows) == sorted(tuple(r) for r in sql_rows), "SQL and Python schedules differ"
+    finally:
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute("DELETE FROM users WHERE id = %s", (user_id,))
+
+    print(f"{n_loans:,} loans -> {len(sql_rows):,} schedule rows (identical in SQL and Python)")
+    for label, elapsed in timings.items():
+        print(f"  {label:<38} {elapsed * 1000:9.1f} ms")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQL vs Python projection benchmark")
+    parser.add_argument("--loans", type=int, default=10000, help="Loans for the throwaway user")
+    parser.add_argument("--view", action="store_true", help="Also install and time loan_projections_mv")
+    args = parser.parse_args()
+
+    if not run_benchmark(args.loans, args.view):
+        sys.exit(1)
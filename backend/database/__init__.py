@@ -4,6 +4,6 @@ Neon PostgreSQL connection and utilities
 """
 
 from database.connection import get_db, init_db
-from database.models import User, Loan, MonthlyStatement, Projection
+from database.models import User, Loan, MonthlyStatement, LoanSnapshot, Projection
 
-__all__ = ['get_db', 'init_db', 'User', 'Loan', 'MonthlyStatement', 'Projection']
+__all__ = ['get_db', 'init_db', 'User', 'Loan', 'MonthlyStatement', 'LoanSnapshot', 'Projection']
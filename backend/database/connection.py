@@ -104,6 +104,28 @@ def init_db():
         raise
 
 
+def init_projection_view():
+    """
+    Create the optional loan_projections_mv materialized view and its refresh trigger.
+    Reads projections_view.sql; safe to run on every startup.
+    """
+    view_path = os.path.join(os.path.dirname(__file__), 'projections_view.sql')
+    
+    try:
+        with open(view_path, 'r') as f:
+            view_sql = f.read()
+        
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute(view_sql)
+                conn.commit()
+        
+        logger.info("Projection materialized view initialized")
+    except Exception as e:
+        logger.error(f"Failed to initialize projection view: {e}")
+        raise
+
+
 def test_connection() -> bool:
     """Test database connection."""
     try:
@@ -3,7 +3,8 @@ Database models and helper functions
 """
 
 from typing import Optional, Dict, Any
-from datetime import datetime
+import math
+from datetime import date, datetime
 import uuid
 from .connection import get_db
 
@@ -72,6 +73,16 @@ class User:
                 return None
 
 
+# Loan record as the API returns it (get_by_user / get_by_id keys); the *_json
+# methods let Postgres serialize these rows (row_to_json) instead of Python
+LOAN_JSON_SELECT = """
+    SELECT id, user_id, provider, account_ref, outstanding, emi,
+           tenure_months, ots_amount_70pct, savings, start_date,
+           loan_type, status, created_at, updated_at
+    FROM loans
+"""
+
+
 class Loan:
     """Loan model."""
     
@@ -188,6 +199,64 @@ class Loan:
                     }
                 return None
     
+    @staticmethod
+    def get_by_user_json(user_id: str) -> str:
+        """
+        get_by_user() as the /api/loans body, serialized by Postgres:
+        '{"loans": [...], "count": n}' (same keys and values, no per-row Python work).
+        """
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT json_build_object(
+                        'loans', COALESCE(json_agg(row_to_json(l) ORDER BY l.created_at DESC), '[]'),
+                        'count', COUNT(*)
+                    )::text
+                    FROM ({LOAN_JSON_SELECT} WHERE user_id = %s) l
+                    """,
+                    (user_id,)
+                )
+                return cur.fetchone()[0]
+    
+    @staticmethod
+    def get_by_id_json(loan_id: str, user_id: Optional[str] = None) -> Optional[str]:
+        """get_by_id() serialized by Postgres (None if missing, or not user_id's loan)."""
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT row_to_json(l)::text
+                    FROM ({LOAN_JSON_SELECT} WHERE id = %s {'AND user_id = %s' if user_id else ''}) l
+                    """,
+                    (loan_id, user_id) if user_id else (loan_id,)
+                )
+                result = cur.fetchone()
+                return result[0] if result else None
+    
+    @staticmethod
+    def masters_json(user_id: str, last_updated: str) -> str:
+        """The /api/masters body (loans keyed provider_account_ref, plus totals) serialized by Postgres."""
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT json_build_object(
+                        'loans', COALESCE(json_object_agg(l.provider || '_' || COALESCE(l.account_ref, 'None'),
+                                                          row_to_json(l) ORDER BY l.created_at DESC), '{{}}'),
+                        'total_exposure', COALESCE(SUM(l.outstanding), 0),
+                        'total_ots_liability', COALESCE(SUM(l.ots_amount_70pct), 0),
+                        'total_savings', COALESCE(SUM(l.savings), 0),
+                        'total_emi', COALESCE(SUM(l.emi), 0),
+                        'last_updated', %s,
+                        'user_id', %s
+                    )::text
+                    FROM ({LOAN_JSON_SELECT} WHERE user_id = %s) l
+                    """,
+                    (last_updated, user_id, user_id)
+                )
+                return cur.fetchone()[0]
+    
     @staticmethod
     def update(loan_id: str, **kwargs) -> bool:
         """Update loan fields."""
@@ -249,11 +318,333 @@ class MonthlyStatement:
                     'csv_path': result[3],
                     'created_at': result[4].isoformat() if result[4] else None
                 }
+    
+    @staticmethod
+    def record(user_id: str, month_name: str, csv_path: Optional[str], parsed_data: Dict,
+               snapshot_date: date) -> Dict[str, Any]:
+        """
+        Store a monthly ritual's parsed output in one transaction: the statement (replacing
+        an earlier upload of the same month) and its loans as loan_snapshots.
+        """
+        import json
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    "DELETE FROM monthly_statements WHERE user_id = %s AND month_name = %s",
+                    (user_id, month_name)
+                )
+                cur.execute(
+                    """
+                    INSERT INTO monthly_statements (user_id, month_name, csv_path, parsed_data)
+                    VALUES (%s, %s, %s, %s)
+                    RETURNING id, created_at
+                    """,
+                    (user_id, month_name, csv_path, json.dumps(parsed_data))
+                )
+                result = cur.fetchone()
+                snapshots = LoanSnapshot.write(cur, user_id, snapshot_date, month_name,
+                                               parsed_data.get('loans', []))
+                return {
+                    'id': str(result[0]),
+                    'month_name': month_name,
+                    'created_at': result[1].isoformat() if result[1] else None,
+                    'snapshots': snapshots
+                }
+    
+    @staticmethod
+    def query(user_id: str, lender: Optional[str] = None, loan_ref: Optional[str] = None,
+              month_name: Optional[str] = None, **bounds) -> list:
+        """
+        Statements with at least one loan matching every condition, and those loans:
+        lender / loan_ref equal (exact), bounds min_<field> / max_<field> for the numeric
+        STATEMENT_QUERY_FIELDS, e.g. query(uid, lender='HDFC', min_outstanding=500000).
+        The conditions become one jsonpath filter evaluated by Postgres, so the GIN
+        (jsonb_path_ops) index on parsed_data narrows the scan.
+        """
+        path = statement_loan_path(lender, loan_ref, **bounds)
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    f"""
+                    SELECT id, month_name, csv_path, created_at,
+                           jsonb_path_query_array(parsed_data, %(path)s::jsonpath)
+                    FROM monthly_statements
+                    WHERE user_id = %(user_id)s AND parsed_data @? %(path)s::jsonpath
+                          {'AND month_name = %(month_name)s' if month_name else ''}
+                    ORDER BY created_at
+                    """,
+                    {'user_id': user_id, 'path': path, 'month_name': month_name}
+                )
+                return [
+                    {
+                        'id': str(row[0]),
+                        'month_name': row[1],
+                        'csv_path': row[2],
+                        'created_at': row[3].isoformat() if row[3] else None,
+                        'loans': row[4]
+                    }
+                    for row in cur.fetchall()
+                ]
+
+
+# Numeric fields of parsed statement loans that MonthlyStatement.query bounds (min_/max_)
+STATEMENT_QUERY_FIELDS = ['principal', 'outstanding', 'emi', 'rate', 'tenure_months',
+                          'installments_paid', 'remaining']
+
+
+def statement_loan_path(lender: Optional[str] = None, loan_ref: Optional[str] = None, **bounds) -> str:
+    """
+    jsonpath selecting the parsed_data loans that match, e.g.
+    $.loans[*] ? (@.lender == "HDFC" && @.outstanding > 500000). Values are written as
+    jsonpath literals (strings JSON-quoted, numbers checked), never spliced in raw.
+    """
+    import json
+    conditions = []
+    if lender:
+        conditions.append(f'@.lender == {json.dumps(lender)}')
+    if loan_ref:
+        conditions.append(f'@.loan_id == {json.dumps(str(loan_ref))}')
+    for name, value in bounds.items():
+        if value is None:
+            continue
+        op, _, field = name.partition('_')
+        if op not in ('min', 'max') or field not in STATEMENT_QUERY_FIELDS:
+            raise ValueError(f"Unknown statement filter: {name}")
+        number = float(value)
+        if not math.isfinite(number):
+            raise ValueError(f"{name} must be a finite number")
+        literal = str(int(number)) if number.is_integer() else repr(number)
+        conditions.append(f'@.{field} {">=" if op == "min" else "<="} {literal}')
+    return '$.loans[*]' + (f' ? ({" && ".join(conditions)})' if conditions else '')
+
+
+def month_start(day: date, add_months: int = 0) -> date:
+    """First day of day's month, add_months later (or earlier)."""
+    months = day.year * 12 + day.month - 1 + add_months
+    return date(months // 12, months % 12 + 1, 1)
+
+
+class LoanSnapshot:
+    """Per-loan monthly snapshots (loan_snapshots, one partition per month)."""
+    
+    @staticmethod
+    def partition_name(snapshot_date: date) -> str:
+        return f"loan_snapshots_{snapshot_date:%Y_%m}"
+    
+    @staticmethod
+    def record(user_id: str, snapshot_date: date, month_name: str, loans: list) -> int:
+        """
+        Replace the user's snapshot for snapshot_date's month with loans (parsed statement
+        rows: lender, loan_id, principal, outstanding, emi, rate, tenure_months,
+        installments_paid). Creates the month's partition if needed; one transaction,
+        one multi-row INSERT. Returns rows written.
+        """
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                return LoanSnapshot.write(cur, user_id, snapshot_date, month_name, loans)
+    
+    @staticmethod
+    def write(cur, user_id: str, snapshot_date: date, month_name: str, loans: list) -> int:
+        """record() on an open cursor, inside the caller's transaction."""
+        from psycopg2.extras import execute_values
+        snapshot_date = month_start(snapshot_date)
+        # One row per loan: a loan repeated in the statement keeps its last row
+        rows = {}
+        for loan in loans:
+            lender, loan_ref = loan.get('lender') or '', str(loan.get('loan_id') or '')
+            rows[(lender, loan_ref)] = (
+                user_id, snapshot_date, month_name, lender, loan_ref,
+                round(loan.get('principal') or 0), round(loan.get('outstanding') or 0),
+                round(loan.get('emi') or 0), loan.get('rate'), loan.get('tenure_months'),
+                loan.get('installments_paid')
+            )
+        
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {LoanSnapshot.partition_name(snapshot_date)}
+            PARTITION OF loan_snapshots FOR VALUES FROM (%s) TO (%s)
+            """,
+            (snapshot_date, month_start(snapshot_date, 1))
+        )
+        cur.execute(
+            "DELETE FROM loan_snapshots WHERE user_id = %s AND snapshot_date = %s",
+            (user_id, snapshot_date)
+        )
+        execute_values(
+            cur,
+            """
+            INSERT INTO loan_snapshots (user_id, snapshot_date, month_name, lender, loan_ref,
+                                        principal, outstanding, emi, rate, tenure_months,
+                                        installments_paid)
+            VALUES %s
+            """,
+            list(rows.values()),
+            page_size=1000
+        )
+        return len(rows)
+    
+    @staticmethod
+    def outstanding_series(user_id: str, date_from: date, date_to: date,
+                           lender: Optional[str] = None, by_lender: bool = False) -> list:
+        """
+        Outstanding and EMI totals per month from date_from's month to date_to's month
+        (per lender too with by_lender), with the change in outstanding from the month
+        before. Only those months' partitions (and the month before date_from) are scanned.
+        """
+        group = ', lender' if by_lender else ''
+        sql = f"""
+            SELECT to_char(snapshot_date, 'YYYY-MM'), lender, loans, outstanding, emi, change
+            FROM (
+                SELECT snapshot_date, {'lender' if by_lender else 'NULL AS lender'},
+                       COUNT(*) AS loans, SUM(outstanding) AS outstanding, SUM(emi) AS emi,
+                       SUM(outstanding) - LAG(SUM(outstanding)) OVER ({'PARTITION BY lender' if by_lender else ''}
+                                                                     ORDER BY snapshot_date) AS change
+                FROM loan_snapshots
+                WHERE user_id = %(user_id)s AND snapshot_date >= %(date_before)s AND snapshot_date < %(date_to)s
+                      {'AND upper(lender) = upper(%(lender)s)' if lender else ''}
+                GROUP BY snapshot_date{group}
+            ) s
+            WHERE snapshot_date >= %(date_from)s
+            ORDER BY snapshot_date{group}
+        """
+        params = {'user_id': user_id, 'date_before': month_start(date_from, -1),
+                  'date_from': month_start(date_from), 'date_to': month_start(date_to, 1), 'lender': lender}
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                series = []
+                for row in cur.fetchall():
+                    point = {'month': row[0], 'lender': row[1]} if by_lender else {'month': row[0]}
+                    point.update({
+                        'loans': row[2],
+                        'outstanding': int(row[3]),
+                        'emi': int(row[4]),
+                        'change': int(row[5]) if row[5] is not None else None
+                    })
+                    series.append(point)
+                return series
+    
+    @staticmethod
+    def deltas(user_id: str, date_from: date, date_to: date, lender: Optional[str] = None) -> list:
+        """
+        Month-over-month change of each loan from date_from's month to date_to's month:
+        outstanding against the loan's previous snapshot (None for a loan's first month).
+        Scans the requested months' partitions plus the month before date_from.
+        """
+        sql = f"""
+            SELECT to_char(snapshot_date, 'YYYY-MM'), lender, loan_ref, outstanding, emi,
+                   to_char(prev_date, 'YYYY-MM'), prev_outstanding
+            FROM (
+                SELECT snapshot_date, lender, loan_ref, outstanding, emi,
+                       LAG(snapshot_date) OVER w AS prev_date,
+                       LAG(outstanding) OVER w AS prev_outstanding
+                FROM loan_snapshots
+                WHERE user_id = %(user_id)s AND snapshot_date >= %(date_before)s AND snapshot_date < %(date_to)s
+                      {'AND upper(lender) = upper(%(lender)s)' if lender else ''}
+                WINDOW w AS (PARTITION BY lender, loan_ref ORDER BY snapshot_date)
+            ) s
+            WHERE snapshot_date >= %(date_from)s
+            ORDER BY snapshot_date, lender, loan_ref
+        """
+        params = {'user_id': user_id, 'date_before': month_start(date_from, -1),
+                  'date_from': month_start(date_from), 'date_to': month_start(date_to, 1), 'lender': lender}
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, params)
+                return [
+                    {
+                        'month': row[0],
+                        'lender': row[1],
+                        'loan_ref': row[2],
+                        'outstanding': row[3],
+                        'emi': row[4],
+                        'previous_month': row[5],
+                        'previous_outstanding': row[6],
+                        'delta': row[3] - row[6] if row[6] is not None else None
+                    }
+                    for row in cur.fetchall()
+                ]
+
+# Horizon of loan_projections_mv (projections_view.sql)
+PROJECTION_VIEW_MONTHS = 60
+
+# Flat-EMI schedule of each loan, months generated by Postgres (same rows as
+# projection_writer.iter_projection_json): {filters} is filled in by Projection.schedule.
+# Loans are ordered before the months are generated, so only each loan's months are sorted
+# (incremental sort) instead of every row spilling to disk.
+SCHEDULE_SQL = """
+    SELECT l.id::text, s.month, to_char(COALESCE(l.start_date, CURRENT_DATE) + (s.month - 1) * 30, 'YYYY-MM-DD'),
+           l.provider,
+           LEAST(l.emi, l.outstanding - (s.month - 1) * l.emi),
+           GREATEST(0, l.outstanding - s.month * l.emi)
+    FROM (
+        SELECT l.id, l.provider, l.outstanding, l.emi, l.start_date, l.created_at
+        FROM loans l
+        WHERE l.user_id = %(user_id)s AND l.outstanding > 0 {filters}
+        ORDER BY l.created_at DESC, l.id
+    ) l
+    CROSS JOIN LATERAL generate_series(
+        %(month_from)s,
+        LEAST(%(month_to)s, CASE WHEN l.emi > 0 THEN (l.outstanding + l.emi - 1) / l.emi ELSE %(month_to)s END)::int
+    ) AS s(month)
+    ORDER BY l.created_at DESC, l.id, s.month
+"""
+
+# Same rows, read from the materialized view (months <= PROJECTION_VIEW_MONTHS); the payment
+# date is computed here, so loans without start_date still count from today, not the refresh
+SCHEDULE_VIEW_SQL = """
+    SELECT l.loan_id::text, l.month, to_char(COALESCE(l.start_date, CURRENT_DATE) + (l.month - 1) * 30, 'YYYY-MM-DD'),
+           l.provider, l.emi_amount, l.balance_remaining
+    FROM loan_projections_mv l
+    WHERE l.user_id = %(user_id)s AND l.month BETWEEN %(month_from)s AND %(month_to)s {filters}
+    ORDER BY l.created_at DESC, l.loan_id, l.month
+"""
+
+_projection_view = None  # loan_projections_mv present? (checked once per process)
 
 
 class Projection:
     """Projection model."""
     
+    @staticmethod
+    def has_view() -> bool:
+        """Whether the optional loan_projections_mv exists (projections_view.sql)."""
+        global _projection_view
+        if _projection_view is None:
+            with get_db() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT to_regclass('loan_projections_mv') IS NOT NULL")
+                    _projection_view = cur.fetchone()[0]
+        return _projection_view
+    
+    @staticmethod
+    def schedule(user_id: str, months: int = 60, month_from: int = 1, month_to: Optional[int] = None,
+                 loan_ids: Optional[list] = None, provider: Optional[str] = None) -> list:
+        """
+        Month-by-month schedule of the user's loans computed by Postgres in one query:
+        [(loan_id, month, payment_date, provider, emi_amount, balance_remaining)].
+        Served from loan_projections_mv when it exists and covers the months asked for.
+        """
+        params = {
+            'user_id': user_id,
+            'month_from': month_from,
+            'month_to': min(month_to or months, months),
+            'loan_ids': loan_ids,
+            'provider': provider,
+        }
+        id_column = 'l.loan_id' if months <= PROJECTION_VIEW_MONTHS and Projection.has_view() else 'l.id'
+        filters = ''
+        if loan_ids:
+            filters += f' AND {id_column} = ANY(%(loan_ids)s::uuid[])'
+        if provider:
+            filters += ' AND upper(l.provider) = upper(%(provider)s)'
+        sql = SCHEDULE_VIEW_SQL if id_column == 'l.loan_id' else SCHEDULE_SQL
+        
+        with get_db() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql.format(filters=filters), params)
+                return cur.fetchall()
+    
     @staticmethod
     def create(user_id: str, loan_id: str, month_name: str,
                projection_data: Optional[Dict] = None, excel_path: Optional[str] = None) -> Dict[str, Any]:
@@ -0,0 +1,51 @@
+-- Optional: precomputed 60-month projections of every loan (PROJECTION_VIEW=1)
+-- Same schedule as Projection.schedule's generate_series query; kept current by a
+-- statement-level trigger on loans. Each loan write then re-runs the whole view, so
+-- enable it for read-heavy deployments only.
+-- Payment dates are not stored: a loan without start_date is projected from the day it is
+-- read (as SCHEDULE_SQL does), so the view keeps start_date and month and
+-- SCHEDULE_VIEW_SQL adds them up at read time.
+
+-- Views created before start_date was stored had payment_date frozen at refresh time
+DO $$
+BEGIN
+    IF to_regclass('loan_projections_mv') IS NOT NULL AND NOT EXISTS (
+        SELECT 1 FROM pg_attribute
+        WHERE attrelid = 'loan_projections_mv'::regclass AND attname = 'start_date' AND NOT attisdropped
+    ) THEN
+        DROP MATERIALIZED VIEW loan_projections_mv;
+    END IF;
+END $$;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS loan_projections_mv AS
+SELECT l.id AS loan_id,
+       l.user_id,
+       l.provider,
+       l.created_at,
+       l.start_date,
+       s.month,
+       LEAST(l.emi, l.outstanding - (s.month - 1) * l.emi) AS emi_amount,
+       GREATEST(0, l.outstanding - s.month * l.emi) AS balance_remaining
+FROM loans l
+CROSS JOIN LATERAL generate_series(
+    1,
+    LEAST(60, CASE WHEN l.emi > 0 THEN (l.outstanding + l.emi - 1) / l.emi ELSE 60 END)::int
+) AS s(month)
+WHERE l.outstanding > 0;
+
+-- Unique index: required for REFRESH ... CONCURRENTLY (readers are never blocked)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_loan_projections_mv_loan_month ON loan_projections_mv(loan_id, month);
+-- Per-user reads come back in listing order straight from the index (no sort)
+CREATE INDEX IF NOT EXISTS idx_loan_projections_mv_user ON loan_projections_mv(user_id, created_at DESC, loan_id, month);
+
+CREATE OR REPLACE FUNCTION refresh_loan_projections() RETURNS trigger AS $$
+BEGIN
+    REFRESH MATERIALIZED VIEW CONCURRENTLY loan_projections_mv;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS loans_refresh_projections ON loans;
+CREATE TRIGGER loans_refresh_projections
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON loans
+    FOR EACH STATEMENT EXECUTE FUNCTION refresh_loan_projections();
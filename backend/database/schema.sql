@@ -51,9 +51,31 @@ CREATE TABLE IF NOT EXISTS projections (
     created_at TIMESTAMP DEFAULT NOW()
 );
 
+-- Loan snapshots (one row per loan per monthly statement; filled by the monthly ritual)
+-- Range-partitioned by month: loan_snapshots_YYYY_MM partitions are created on demand
+-- (LoanSnapshot.record), so trend queries only scan the months they ask for.
+CREATE TABLE IF NOT EXISTS loan_snapshots (
+    user_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    snapshot_date DATE NOT NULL,
+    month_name VARCHAR(50) NOT NULL,
+    lender VARCHAR(100) NOT NULL,
+    loan_ref VARCHAR(255) NOT NULL DEFAULT '',
+    principal BIGINT NOT NULL DEFAULT 0,
+    outstanding BIGINT NOT NULL DEFAULT 0,
+    emi BIGINT NOT NULL DEFAULT 0,
+    rate NUMERIC(6, 2),
+    tenure_months INTEGER,
+    installments_paid INTEGER,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (user_id, snapshot_date, lender, loan_ref)
+) PARTITION BY RANGE (snapshot_date);
+
 -- Indexes for performance
 CREATE INDEX IF NOT EXISTS idx_loans_user_id ON loans(user_id);
 CREATE INDEX IF NOT EXISTS idx_loans_provider ON loans(provider);
 CREATE INDEX IF NOT EXISTS idx_monthly_statements_user_id ON monthly_statements(user_id);
 CREATE INDEX IF NOT EXISTS idx_projections_user_id ON projections(user_id);
 CREATE INDEX IF NOT EXISTS idx_projections_loan_id ON projections(loan_id);
+CREATE INDEX IF NOT EXISTS idx_loan_snapshots_date ON loan_snapshots USING BRIN (snapshot_date);
+CREATE INDEX IF NOT EXISTS idx_monthly_statements_parsed_data ON monthly_statements USING GIN (parsed_data jsonb_path_ops);
+CREATE INDEX IF NOT EXISTS idx_monthly_statements_user_month ON monthly_statements(user_id, month_name);
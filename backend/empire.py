@@ -5,7 +5,7 @@ Safety Rules: VALIDATE, NO ASSUME, ERRORS (try/except + log + STOP)
 
 from pathlib import Path
 from typing import Dict, List, Optional
-from datetime import datetime
+from datetime import date, datetime
 import json
 import shutil
 import logging
@@ -20,6 +20,12 @@ except ImportError:
 # Import from parent directory
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+# Debt Empire root for core/ (appended: backend/empire.py must keep shadowing the root empire.py)
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.schedule_cache import schedule_key, shared_cache
+from core.statement_reader import StatementReader
+from projection_writer import HAS_OPENPYXL, ProjectionWorkbook
 
 try:
     from loanlens_parser import LoanLensParser, LoanDetail
@@ -35,6 +41,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Per-loan projection sheet columns
+SHEET_COLUMNS = ['Month', 'EMI Total', 'Principal Part', 'Interest Part', 'OS Bal']
+# Statement month names: feb26 (the API default), february2026, feb2026, 2026-02
+MONTH_NAME_FORMATS = ['%b%y', '%B%Y', '%b%Y', '%Y-%m']
+
+
+def statement_month(month_name: str) -> date:
+    """
+    First day of the month a ritual month_name stands for ('apr25', 'April2025', '2025-04').
+    Raises ValueError when unrecognised: a guessed date would replace that month's real snapshots.
+    """
+    for fmt in MONTH_NAME_FORMATS:
+        try:
+            return datetime.strptime(month_name.strip(), fmt).date().replace(day=1)
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognised month name {month_name!r} (expected e.g. apr25, April2025 or 2025-04)")
+
 
 class DebtEmpireEngine:
     """Debt Empire Engine - 8-Step Ritual."""
@@ -51,6 +75,8 @@ class DebtEmpireEngine:
         self.ots_pdfs_dir = self.base_dir / 'ots-pdfs'
         self.docs_checklist_file = self.base_dir / 'docs-checklist.md'
         self.vision_file = self.base_dir / 'vision.md'
+        # Amortization schedules, shared with every request in this process (and on disk)
+        self.schedule_cache = shared_cache(self.base_dir)
         
         # Create structure
         self.base_dir.mkdir(parents=True, exist_ok=True)
@@ -60,47 +86,61 @@ class DebtEmpireEngine:
     
     def validate_csv_columns(self, csv_path: Path) -> Dict:
         """
-        Validate CSV columns.
+        Validate CSV columns, then every row (streamed - the file is never loaded whole).
         Safety Rule: VALIDATE - Check columns before processing.
+        Malformed rows and non-numeric amounts are counted; the first few are returned as samples.
         """
         try:
-            with open(csv_path, 'r', encoding='utf-8') as f:
-                sample = f.read(1024)
-                f.seek(0)
-                
-                delimiter = ',' if ',' in sample else '\t' if '\t' in sample else ';'
-                reader = csv.DictReader(f, delimiter=delimiter)
-                
-                # Get columns
-                found_columns = reader.fieldnames or []
-                
-                # Required columns (flexible - at least one of these)
-                required_patterns = [
-                    'lender', 'loan', 'principal', 'emi', 'rate',
-                    'date', 'sanction', 'outstanding', 'tenure'
-                ]
-                
-                found_lower = [c.lower() for c in found_columns]
-                
-                # Check if we have at least some required columns
-                has_required = any(
-                    any(pattern in col for col in found_lower)
-                    for pattern in required_patterns
-                )
-                
-                if not has_required:
-                    return {
-                        'valid': False,
-                        'message': 'CSV missing required columns',
-                        'required': required_patterns,
-                        'found': list(found_columns)
-                    }
-                
+            reader = StatementReader(csv_path)
+            
+            # Get columns
+            found_columns = reader.header()
+            
+            # Required columns (flexible - at least one of these)
+            required_patterns = [
+                'lender', 'loan', 'principal', 'emi', 'rate',
+                'date', 'sanction', 'outstanding', 'tenure'
+            ]
+            
+            found_lower = [c.lower() for c in found_columns]
+            
+            # Check if we have at least some required columns
+            has_required = any(
+                any(pattern in col for col in found_lower)
+                for pattern in required_patterns
+            )
+            
+            if not has_required:
                 return {
-                    'valid': True,
-                    'message': 'CSV columns OK',
+                    'valid': False,
+                    'message': 'CSV missing required columns',
+                    'required': required_patterns,
                     'found': list(found_columns)
                 }
+            
+            # Row-level validation in one streaming pass
+            for _ in reader.iter_rows():
+                pass
+            report = reader.report()
+            if report['rows'] and not report['valid_rows']:
+                return {
+                    'valid': False,
+                    'message': f"No valid rows ({report['invalid_rows']} invalid)",
+                    'found': list(found_columns),
+                    **report
+                }
+            
+            message = 'CSV columns OK'
+            if report['invalid_rows']:
+                message += f" ({report['invalid_rows']} invalid rows skipped)"
+            if report['text_values']:
+                message += f" ({report['text_values']} non-numeric amounts kept as text)"
+            return {
+                'valid': True,
+                'message': message,
+                'found': list(found_columns),
+                **report
+            }
                 
         except Exception as e:
             logger.error(f"CSV validation error: {e}")
@@ -110,9 +150,11 @@ class DebtEmpireEngine:
                 'found': []
             }
     
-    def process_monthly_csv(self, csv_path: Path, month_name: str) -> Dict:
+    def process_monthly_csv(self, csv_path: Path, month_name: str, user_id: Optional[str] = None) -> Dict:
         """
         Process monthly CSV - Full 8-step workflow.
+        With user_id, the parsed data is also stored in the database: the user's
+        monthly_statements row and loan_snapshots for the statement month.
         Safety Rule: ERRORS - Try/except + Log + STOP
         """
         result = {
@@ -122,6 +164,9 @@ class DebtEmpireEngine:
         }
         
         try:
+            # Statement month first: an unrecognised name stops the ritual before any file is written
+            snapshot_date = statement_month(month_name) if user_id else None
+            
             # Step 1: Copy CSV
             logger.info(f"[Step 1/8] Copying CSV to monthly/stmts/...")
             stmt_path = self.stmts_dir / f"{month_name}.csv"
@@ -146,9 +191,14 @@ class DebtEmpireEngine:
             # Step 3: Save parsed.json
             logger.info(f"[Step 3/8] Saving parsed data...")
             parsed_json = self.monthly_dir / f"{month_name}_parsed.json"
-            self._save_parsed_data(loans, parsed_json, month_name)
+            parsed = self._save_parsed_data(loans, parsed_json, month_name)
             result['files'].append(f"monthly/{month_name}_parsed.json")
             logger.info(f"[OK] Saved: monthly/{month_name}_parsed.json")
+            if user_id:
+                statement = self._save_statement(user_id, month_name, stmt_path, parsed, snapshot_date)
+                result['statement_id'] = statement['id']
+                result['snapshots'] = statement['snapshots']
+                logger.info(f"[OK] Saved statement + {statement['snapshots']} loan snapshots to database")
             
             # Step 4: Update masters.json
             logger.info(f"[Step 4/8] Updating masters.json...")
@@ -209,8 +259,8 @@ class DebtEmpireEngine:
             'total_emi': 0
         }
     
-    def _save_parsed_data(self, loans: List[LoanDetail], output_path: Path, month_name: str):
-        """Save parsed data as JSON."""
+    def _save_parsed_data(self, loans: List[LoanDetail], output_path: Path, month_name: str) -> Dict:
+        """Save parsed data as JSON (returned as well)."""
         data = {
             'month': month_name,
             'parsed_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -238,6 +288,14 @@ class DebtEmpireEngine:
         
         with open(output_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
+        return data
+    
+    def _save_statement(self, user_id: str, month_name: str, stmt_path: Path, parsed: Dict,
+                        snapshot_date: date) -> Dict:
+        """Store parsed data as the user's monthly_statements row + loan_snapshots (one transaction)."""
+        from database.models import MonthlyStatement
+        csv_path = stmt_path.relative_to(self.base_dir).as_posix()
+        return MonthlyStatement.record(user_id, month_name, csv_path, parsed, snapshot_date)
     
     def _update_masters(self, loans: List[LoanDetail]):
         """Update masters.json."""
@@ -273,50 +331,55 @@ class DebtEmpireEngine:
         with open(self.masters_file, 'w', encoding='utf-8') as f:
             json.dump(masters, f, indent=2, ensure_ascii=False)
     
+    def _amortization(self, loan: LoanDetail, months: int) -> List[Dict]:
+        """
+        loan.calculate_amortization(months), through the shared schedule cache.
+        Keyed on every loan field except its identity, so only changed loans are recomputed.
+        """
+        params = {k: v for k, v in vars(loan).items() if k not in ('lender', 'loan_id')}
+        key = schedule_key("amortization", months, *sorted(params.items()))
+        blob = self.schedule_cache.get_or_compute(
+            key, lambda: json.dumps(loan.calculate_amortization(months), default=str).encode('utf-8'))
+        return json.loads(blob)
+    
     def _generate_projections(self, loans: List[LoanDetail], output_path: Path) -> bool:
-        """Generate 12-month projection Excel."""
-        if not HAS_PANDAS:
-            logger.warning("Excel export requires pandas")
+        """
+        Generate 12-month projection Excel, one sheet per loan.
+        Rows are appended to a write-only workbook as each schedule is produced,
+        so memory stays flat however many loans the portfolio has.
+        """
+        if not HAS_OPENPYXL:
+            logger.warning("Excel export requires openpyxl")
             return False
         
         try:
-            wb = pd.ExcelWriter(output_path, engine='openpyxl')
-            
-            for loan in loans:
-                schedule = loan.calculate_amortization(12)
-                outstanding = loan.current_outstanding or loan.principal
-                
-                all_data = []
-                
-                # Row 1: Sanction info
-                try:
-                    start_date = datetime.strptime(loan.sanction_date, '%d/%m/%Y')
-                except:
-                    start_date = datetime.now()
-                
-                all_data.append({
-                    'Month': f'Sanction: {loan.sanction_date}',
-                    'EMI Total': loan.emi,
-                    'Principal Part': loan.principal,
-                    'Interest Part': loan.rate,
-                    'OS Bal': start_date.strftime('%d/%m/%Y')
-                })
-                
-                # Row 2-12: Monthly data
-                for month_data in schedule:
-                    all_data.append({
-                        'Month': f"Mo{month_data['month']}",
-                        'EMI Total': month_data['emi'],
-                        'Principal Part': month_data['principal'],
-                        'Interest Part': month_data['interest'],
-                        'OS Bal': month_data['closing_balance']
-                    })
-                
-                df = pd.DataFrame(all_data)
-                sheet_name = f"{loan.lender}_{loan.loan_id}"[:31]
-                df.to_excel(wb, sheet_name=sheet_name, index=False)
-            
-            wb.close()
+            with ProjectionWorkbook(output_path) as wb:
+                for loan in loans:
+                    wb.add_sheet(f"{loan.lender}_{loan.loan_id}", SHEET_COLUMNS)
+                    
+                    # Row 1: Sanction info
+                    try:
+                        start_date = datetime.strptime(loan.sanction_date, '%d/%m/%Y')
+                    except:
+                        start_date = datetime.now()
+                    
+                    wb.append([
+                        f'Sanction: {loan.sanction_date}',
+                        loan.emi,
+                        loan.principal,
+                        loan.rate,
+                        start_date.strftime('%d/%m/%Y')
+                    ])
+                    
+                    # Row 2-12: Monthly data
+                    for month_data in self._amortization(loan, 12):
+                        wb.append([
+                            f"Mo{month_data['month']}",
+                            month_data['emi'],
+                            month_data['principal'],
+                            month_data['interest'],
+                            month_data['closing_balance']
+                        ])
             return True
             
         except Exception as e:
@@ -5,15 +5,17 @@ Purpose: Parse CSV, generate projections, OTS PDFs
 Now with Database (Neon PostgreSQL) and Authentication
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-from typing import List, Optional
+from fastapi.responses import JSONResponse, FileResponse, Response, StreamingResponse
+from typing import Annotated, List, Optional
 import uvicorn
+from pydantic import Field
 from pathlib import Path
 import json
 from datetime import datetime
 import os
+import uuid
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -21,12 +23,12 @@ load_dotenv()
 
 # Import database and auth
 from database import init_db, get_db
-from database.models import Loan, User
+from database.models import Loan, LoanSnapshot, MonthlyStatement, Projection, User, month_start
 from middleware import get_current_user
 from routes.auth import router as auth_router
 
 # Import existing empire engine (for backward compatibility)
-from empire import DebtEmpireEngine
+from empire import DebtEmpireEngine, statement_month
 
 app = FastAPI(title="Debt Empire API", version="2.0")
 
@@ -54,6 +56,10 @@ async def startup_event():
             # Initialize schema
             init_db()
             print("✅ Database schema initialized")
+            if os.getenv('PROJECTION_VIEW'):
+                from database.connection import init_projection_view
+                init_projection_view()
+                print("✅ Projection materialized view ready")
         else:
             print("⚠️  Database connection failed - check DATABASE_URL")
     except Exception as e:
@@ -86,26 +92,36 @@ async def get_masters(current_user: dict = Depends(get_current_user)):
     """
     try:
         user_id = current_user['id']
+        # Same structure as the old masters.json (loans keyed provider_account_ref + totals),
+        # built and serialized by Postgres
+        body = Loan.masters_json(user_id, datetime.now().isoformat())
+        return Response(content=body, media_type="application/json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/ots/optimize")
+async def optimize_ots(
+    budget: List[Annotated[float, Field(ge=0)]] = Query(..., description="Lump sum(s) available, in Rs (repeat for several levels)"),
+    objective: str = 'savings',
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Which loans to settle (OTS) within each budget: maximize savings or EMI freed.
+    Protected route - requires authentication.
+    """
+    try:
+        from ots_optimizer import OBJECTIVES, optimize_budgets
+        if objective not in OBJECTIVES:
+            raise HTTPException(status_code=400, detail=f"objective must be one of {', '.join(OBJECTIVES)}")
+        user_id = current_user['id']
         loans = Loan.get_by_user(user_id)
-        
-        # Calculate totals
-        total_outstanding = sum(loan['outstanding'] for loan in loans)
-        total_emi = sum(loan['emi'] for loan in loans)
-        total_ots_liability = sum(loan['ots_amount_70pct'] for loan in loans)
-        total_savings = sum(loan['savings'] for loan in loans)
-        
-        # Format response similar to old masters.json structure
-        response = {
-            'loans': {f"{loan['provider']}_{loan.get('account_ref', loan['id'])}": loan for loan in loans},
-            'total_exposure': total_outstanding,
-            'total_ots_liability': total_ots_liability,
-            'total_savings': total_savings,
-            'total_emi': total_emi,
-            'last_updated': datetime.now().isoformat(),
-            'user_id': user_id
-        }
-        
-        return JSONResponse(content=response)
+        plans = optimize_budgets(loans, budget, objective)
+        for plan in plans:
+            plan['loans'] = [loans[i] for i in plan['loans']]
+        return JSONResponse(content={"objective": objective, "plans": plans, "loan_count": len(loans)})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -152,10 +168,29 @@ async def get_loans(current_user: dict = Depends(get_current_user)):
     """
     try:
         user_id = current_user['id']
-        loans = Loan.get_by_user(user_id)
-        return JSONResponse(content={"loans": loans, "count": len(loans)})
+        # {"loans": [...], "count": n} serialized by Postgres, passed through as is
+        return Response(content=Loan.get_by_user_json(user_id), media_type="application/json")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/loans/{loan_id}")
+async def get_loan(loan_id: str, current_user: dict = Depends(get_current_user)):
+    """
+    Get one of the current user's loans.
+    Protected route - requires authentication.
+    """
+    try:
+        uuid.UUID(loan_id)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Loan not found")
+    try:
+        body = Loan.get_by_id_json(loan_id, current_user['id'])
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if body is None:
+        raise HTTPException(status_code=404, detail="Loan not found")
+    return Response(content=body, media_type="application/json")
 
 
 @app.post("/api/upload-csv")
@@ -175,14 +210,19 @@ async def upload_csv(
         # Validate file type
         if not file.filename.endswith('.csv'):
             raise HTTPException(status_code=400, detail="File must be CSV")
+        if not month_name:
+            month_name = datetime.now().strftime('%b%y').lower()
+        try:
+            statement_month(month_name)  # snapshots are dated by it - never guessed
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Read CSV content
-        content = await file.read()
-        
-        # Save to temp location
+        # Stream to temp location in 1 MB pieces (monthly uploads can be hundreds of MB)
         temp_path = Path("temp") / file.filename
         temp_path.parent.mkdir(exist_ok=True)
-        temp_path.write_bytes(content)
+        with open(temp_path, 'wb') as f:
+            while chunk := await file.read(1 << 20):
+                f.write(chunk)
         
         # Validate CSV columns
         validation_result = engine.validate_csv_columns(temp_path)
@@ -194,24 +234,27 @@ async def upload_csv(
                     "error": "CSV validation failed",
                     "details": validation_result['message'],
                     "required_columns": validation_result.get('required', []),
-                    "found_columns": validation_result.get('found', [])
+                    "found_columns": validation_result.get('found', []),
+                    "invalid_rows": validation_result.get('invalid_rows', 0),
+                    "row_errors": validation_result.get('errors', [])
                 }
             )
         
         # Process CSV
-        if not month_name:
-            month_name = datetime.now().strftime('%b%y').lower()
-        
-        result = engine.process_monthly_csv(temp_path, month_name)
-        
-        # TODO: Save to database monthly_statements table
-        # For now, keep backward compatibility with JSON files
+        # Also stores the parsed data as the user's monthly statement (JSON files kept as well)
+        result = engine.process_monthly_csv(temp_path, month_name, user_id=user_id)
         
         return JSONResponse(content={
             "status": "success",
             "month": month_name,
             "loans_parsed": result.get('loans_count', 0),
-            "files_generated": result.get('files', [])
+            "statement_id": result.get('statement_id'),
+            "files_generated": result.get('files', []),
+            "rows_validated": validation_result.get('valid_rows', 0),
+            "invalid_rows": validation_result.get('invalid_rows', 0),
+            "row_errors": validation_result.get('errors', []),
+            "text_values": validation_result.get('text_values', 0),
+            "row_warnings": validation_result.get('warnings', [])
         })
         
     except HTTPException:
@@ -233,6 +276,10 @@ async def process_monthly(
     """
     try:
         user_id = current_user['id']
+        try:
+            statement_month(month_name)  # snapshots are dated by it - never guessed
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         if csv_path:
             csv_path_obj = Path(csv_path)
@@ -246,7 +293,7 @@ async def process_monthly(
                 raise HTTPException(status_code=404, detail="No CSV files found in monthly/stmts/")
             csv_path_obj = max(csv_files, key=lambda p: p.stat().st_mtime)
         
-        result = engine.process_monthly_csv(csv_path_obj, month_name)
+        result = engine.process_monthly_csv(csv_path_obj, month_name, user_id=user_id)
         
         return JSONResponse(content={
             "status": "success",
@@ -261,6 +308,51 @@ async def process_monthly(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/projections")
+async def get_projection_schedule(
+    months: int = Query(60, ge=1, le=600, description="Projection horizon in months"),
+    month_from: int = Query(1, ge=1, alias="from", description="First month returned"),
+    month_to: Optional[int] = Query(None, ge=1, alias="to", description="Last month returned"),
+    loan_id: Optional[List[str]] = Query(None, description="Only these loans (repeat for several)"),
+    provider: Optional[str] = None,
+    source: str = Query('cache', description="'cache' (Python engine) or 'sql' (computed by Postgres)"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Month-by-month schedules for the user's loans, computed on request (JSON, streamed).
+    source=cache: schedules come from the shared schedule cache - only loans changed since
+    the last request are recomputed. source=sql: Postgres generates the months itself
+    (generate_series, or loan_projections_mv when installed) in one round trip.
+    Protected route.
+    """
+    try:
+        from projection_writer import API_COLUMNS, iter_projection_json, iter_rows_json
+        if source not in ('cache', 'sql'):
+            raise HTTPException(status_code=400, detail="source must be 'cache' or 'sql'")
+        try:
+            loan_id = [str(uuid.UUID(value)) for value in loan_id] if loan_id else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="loan_id must be a loan UUID")
+        user_id = current_user['id']
+        if source == 'sql':
+            rows = Projection.schedule(user_id, months, month_from, month_to, loan_id, provider)
+            head = {"months": months, "from": month_from, "to": min(month_to or months, months), "source": "sql"}
+            chunks = iter_rows_json(head, (dict(zip(API_COLUMNS, row)) for row in rows))
+            return StreamingResponse(chunks, media_type="application/json")
+        loans = Loan.get_by_user(user_id)
+        if loan_id:
+            wanted = set(loan_id)
+            loans = [loan for loan in loans if str(loan['id']) in wanted]
+        if provider:
+            loans = [loan for loan in loans if (loan['provider'] or '').upper() == provider.upper()]
+        chunks = iter_projection_json(loans, months, month_from, month_to, cache=engine.schedule_cache)
+        return StreamingResponse(chunks, media_type="application/json")
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/projections/{month_name}")
 async def get_projections(month_name: str, current_user: dict = Depends(get_current_user)):
     """Get projection Excel file. Protected route."""
@@ -276,6 +368,98 @@ async def get_projections(month_name: str, current_user: dict = Depends(get_curr
     )
 
 
+@app.get("/api/statements/query")
+async def query_statements(
+    lender: Optional[str] = None,
+    loan_ref: Optional[str] = None,
+    month_name: Optional[str] = None,
+    min_outstanding: Optional[float] = None,
+    max_outstanding: Optional[float] = None,
+    min_emi: Optional[float] = None,
+    max_emi: Optional[float] = None,
+    min_rate: Optional[float] = None,
+    max_rate: Optional[float] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Monthly statements with a loan matching every filter (e.g. lender=HDFC&min_outstanding=500000),
+    and the matching loans. Filters run in Postgres against parsed_data (GIN index).
+    Protected route.
+    """
+    try:
+        statements = MonthlyStatement.query(
+            current_user['id'], lender, loan_ref, month_name,
+            min_outstanding=min_outstanding, max_outstanding=max_outstanding,
+            min_emi=min_emi, max_emi=max_emi, min_rate=min_rate, max_rate=max_rate
+        )
+        return JSONResponse(content={"statements": statements, "count": len(statements)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _snapshot_range(month_from: Optional[str], month_to: Optional[str]):
+    """'YYYY-MM' bounds -> (first, last) month dates; defaults to the 12 months up to now."""
+    try:
+        last = datetime.strptime(month_to, '%Y-%m').date() if month_to else month_start(datetime.now().date())
+        first = datetime.strptime(month_from, '%Y-%m').date() if month_from else month_start(last, -11)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="from/to must be YYYY-MM")
+    if first > last:
+        raise HTTPException(status_code=400, detail="from must not be after to")
+    return first, last
+
+
+@app.get("/api/snapshots/outstanding")
+async def get_outstanding_history(
+    month_from: Optional[str] = Query(None, alias="from", description="First month, YYYY-MM"),
+    month_to: Optional[str] = Query(None, alias="to", description="Last month, YYYY-MM"),
+    lender: Optional[str] = None,
+    by_lender: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Outstanding over time: totals per statement month from loan_snapshots
+    (filled by the monthly ritual). Protected route.
+    """
+    try:
+        first, last = _snapshot_range(month_from, month_to)
+        series = LoanSnapshot.outstanding_series(current_user['id'], first, last, lender, by_lender)
+        return JSONResponse(content={
+            "from": first.strftime('%Y-%m'),
+            "to": last.strftime('%Y-%m'),
+            "series": series
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/snapshots/deltas")
+async def get_snapshot_deltas(
+    month_from: Optional[str] = Query(None, alias="from", description="First month, YYYY-MM"),
+    month_to: Optional[str] = Query(None, alias="to", description="Last month, YYYY-MM"),
+    lender: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Month-over-month change of each loan's outstanding (loan_snapshots). Protected route."""
+    try:
+        first, last = _snapshot_range(month_from, month_to)
+        deltas = LoanSnapshot.deltas(current_user['id'], first, last, lender)
+        return JSONResponse(content={
+            "from": first.strftime('%Y-%m'),
+            "to": last.strftime('%Y-%m'),
+            "deltas": deltas,
+            "count": len(deltas)
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/api/ots-pdfs")
 async def list_ots_pdfs(current_user: dict = Depends(get_current_user)):
     """List available OTS PDFs. Protected route."""
@@ -309,18 +493,26 @@ async def upload_loan_document(
         content = await file.read()
         save_path.write_bytes(content)
         result = {"status": "success", "saved_to": f"loans/new_uploads/{safe_name}", "parsed": False, "loan_added": False}
-        if ext == ".pdf" and MASTERS_JSON.exists():
+        if ext in (".pdf", ".docx") and MASTERS_JSON.exists():
             try:
                 import sys
                 sys.path.insert(0, str(DEBT_EMPIRE_ROOT))
-                import loan_verifier
-                parsed = loan_verifier.parse_bajaj_pdf(save_path)
-                if parsed:
-                    os_amt = parsed.get("outstanding_principal") or 0
+                from core.text_cache import PdfTextCache
+                from statement_parsers import parse_document, provider_code
+                # Lender detected from the first page; same statement uploaded again -> cached parse
+                text_cache = PdfTextCache(DEBT_EMPIRE_ROOT)
+                sha256 = text_cache.hash_bytes(content)
+                result["cached"] = text_cache.load(sha256) is not None
+                parsed = parse_document(save_path, cache=text_cache, sha256=sha256)
+                if parsed and not parsed.get("outstanding_principal"):
+                    # No labelled outstanding in the statement - report it, never store a guess
+                    result["parsed"] = True
+                    result["missing_fields"] = parsed.get("missing_fields") or ["outstanding"]
+                    result["provider"] = provider_code(parsed.get("provider") or "")
+                elif parsed:
+                    os_amt = parsed["outstanding_principal"]
                     emi = parsed.get("emi_amount") or (os_amt // 24) or 1
-                    provider = (parsed.get("provider") or "Bajaj Finance").replace(" Finance", "").strip()
-                    if provider == "Bajaj": pass
-                    elif "L&T" in provider or "L&T" in (parsed.get("provider") or ""): provider = "L&T"
+                    provider = provider_code(parsed.get("provider") or "Bajaj Finance")
                     account_ref = (parsed.get("account_number") or parsed.get("linked_account") or "").strip() or "—"
                     start_date = parsed.get("emi_start_date") or "2024-01-01"
                     
@@ -337,6 +529,7 @@ async def upload_loan_document(
                     result["parsed"] = True
                     result["loan_added"] = True
                     result["account_ref"] = account_ref
+                    result["provider"] = provider
             except Exception as e:
                 result["parse_error"] = str(e)
         return JSONResponse(content=result)
@@ -17,6 +17,14 @@ if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
     except (AttributeError, ValueError):
         pass  # stdout already wrapped or closed
 
+def sha256_file(file_path):
+    """SHA256 hex digest of a file (shared by DuplicateDetector and the PDF text cache)."""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
 class DuplicateDetector:
     """Detect duplicate files using SHA256 hashing."""
     
@@ -47,12 +55,8 @@ class DuplicateDetector:
     
     def compute_hash(self, file_path):
         """Compute SHA256 hash of file."""
-        sha256 = hashlib.sha256()
         try:
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b''):
-                    sha256.update(chunk)
-            return sha256.hexdigest()
+            return sha256_file(file_path)
         except Exception as e:
             print(f"[ERROR] Could not hash {file_path}: {e}")
             return None
@@ -85,6 +89,22 @@ class DuplicateDetector:
         self._save_index()
         return True
     
+    def register_files(self, entries):
+        """Register many files with one index write. entries: (file_path, loan_folder, sha256) tuples."""
+        now = datetime.now().isoformat()
+        for file_path, loan_folder, file_hash in entries:
+            file_path_obj = Path(file_path)
+            self.hash_index[file_hash] = {
+                "filename": file_path_obj.name,
+                "loan_folder": str(loan_folder) if loan_folder else None,
+                "full_path": str(file_path_obj.absolute()),
+                "size": file_path_obj.stat().st_size,
+                "registered_at": now
+            }
+        if entries:
+            self._save_index()
+        return len(entries)
+    
     def find_duplicates_in_loan(self, loan_folder):
         """Find duplicate files within a loan folder."""
         loan_path = Path(loan_folder)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Bulk statement ingestion for loans/new_uploads/ (or any drop folder).
+hash -> skip duplicates -> parse (worker pool) -> file into loans/<provider>-<account>/statements/
+-> register hashes in one index write -> update masters.json once.
+"""
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# UTF-8 for Windows console
+if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
+    try:
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    except (AttributeError, ValueError):
+        pass  # stdout already wrapped or closed
+
+from .duplicate_detector import sha256_file
+from .orchestrator import Orchestrator
+from .text_cache import PdfTextCache
+
+STAGES = ("hash", "dedupe", "parse", "route", "register", "masters")
+
+def _parse_file(file_path, file_hash, base_dir):
+    """Worker: parse one document through the lender registry. Returns (loan, error)."""
+    from statement_parsers import parse_document
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):  # parsers print per-file progress
+            return parse_document(file_path, cache=PdfTextCache(base_dir), sha256=file_hash), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def unroutable_reason(loan):
+    """Why a parsed loan must stay in the drop folder (None if it can be routed): routing it
+    would overwrite an existing loan with guessed values or share a '<provider>-unknown' folder."""
+    if loan.get("missing_fields"):
+        return "not found in statement: " + ", ".join(loan["missing_fields"])
+    if not str(loan.get("account_number") or "").strip():
+        return "no account number"
+    if not loan.get("outstanding_principal"):
+        return "outstanding is 0"
+    return None
+
+class BulkIngestor:
+    """Ingest a whole drop folder of statements in one pass."""
+
+    def __init__(self, base_dir=None, drop_dir=None, workers=None):
+        self.orchestrator = Orchestrator(base_dir)
+        self.base_dir = self.orchestrator.base_dir
+        self.drop_dir = Path(drop_dir) if drop_dir else self.orchestrator.loans_dir / "new_uploads"
+        self.workers = workers or os.cpu_count() or 1
+        self.timings = {}
+
+    @contextlib.contextmanager
+    def _stage(self, name):
+        start = time.perf_counter()
+        yield
+        self.timings[name] = time.perf_counter() - start
+
+    def list_documents(self):
+        """Statement files in the drop folder (types the parser registry handles)."""
+        from statement_parsers import DOCUMENT_TYPES
+        if not self.drop_dir.exists():
+            return []
+        return sorted(p for p in self.drop_dir.iterdir() if p.is_file() and p.suffix.lower() in DOCUMENT_TYPES)
+
+    def run(self, dry_run=False):
+        """Ingest every document; dry_run stops after parsing (nothing moved or written)."""
+        from statement_parsers import provider_code
+        from statement_parsers.base import LOAN_TEMPLATE
+        self.timings = {}
+        files = self.list_documents()
+        total_bytes = sum(f.stat().st_size for f in files)
+        report = {"files": len(files), "bytes": total_bytes, "duplicates": [], "unparsed": [],
+                  "ingested": [], "errors": []}
+        if not files:
+            return report
+
+        # hashlib releases the GIL, so threads are enough for hashing
+        with self._stage("hash"):
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                hashes = list(pool.map(sha256_file, files))
+
+        with self._stage("dedupe"):
+            known = self.orchestrator.duplicate_detector.hash_index
+            seen = {}
+            unique = []
+            for file_path, file_hash in zip(files, hashes):
+                if file_hash in known:
+                    report["duplicates"].append((file_path.name, known[file_hash].get("full_path")))
+                elif file_hash in seen:
+                    report["duplicates"].append((file_path.name, str(seen[file_hash])))
+                else:
+                    seen[file_hash] = file_path
+                    unique.append((file_path, file_hash))
+
+        with self._stage("parse"):
+            args = ([str(f) for f, _ in unique], [h for _, h in unique], [str(self.base_dir)] * len(unique))
+            if self.workers > 1 and len(unique) > 1:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(unique))) as pool:
+                    parsed = list(pool.map(_parse_file, *args))
+            else:
+                parsed = list(map(_parse_file, *args))
+
+        if dry_run:
+            for (file_path, _), (loan, error) in zip(unique, parsed):
+                reason = unroutable_reason(loan) if loan else None
+                if reason:
+                    report["unparsed"].append((file_path.name, reason))
+                elif loan:
+                    report["ingested"].append((file_path.name, provider_code(loan.get("provider", "")), loan.get("account_number", "")))
+                else:
+                    report["errors" if error else "unparsed"].append((file_path.name, error))
+            return report
+
+        registered = []
+        records = []
+        with self._stage("route"):
+            for (file_path, file_hash), (loan, error) in zip(unique, parsed):
+                if not loan:
+                    report["errors" if error else "unparsed"].append((file_path.name, error))
+                    continue
+                reason = unroutable_reason(loan)
+                if reason:
+                    report["unparsed"].append((file_path.name, reason))
+                    continue
+                # Only what the statement showed: template defaults must not reset an existing loan.json
+                loan_data = {k: v for k, v in loan.items() if k not in LOAN_TEMPLATE or v != LOAN_TEMPLATE[k]}
+                loan_data.update(provider=provider_code(loan.get("provider", "")),
+                                 start_date=loan.get("emi_start_date", ""))
+                folder = self.orchestrator.migrate_loan(loan_data)
+                dest = folder / "statements" / file_path.name
+                if dest.exists():
+                    dest = dest.with_name(f"{file_hash[:8]}-{file_path.name}")
+                shutil.move(str(file_path), str(dest))
+                registered.append((dest, folder, file_hash))
+                with open(folder / "loan.json", 'r', encoding='utf-8') as f:
+                    records.append(self.orchestrator.masters_record(json.load(f)))
+                report["ingested"].append((file_path.name, loan_data["provider"], folder.name))
+
+        with self._stage("register"):
+            self.orchestrator.duplicate_detector.register_files(registered)
+
+        with self._stage("masters"):
+            if records:
+                self.orchestrator.merge_into_masters(records)
+        return report
+
+    def print_report(self, report):
+        """Counts, per-stage timings and throughput."""
+        elapsed = sum(self.timings.values())
+        print(f"[OK] {report['files']} documents ({report['bytes'] / 1048576:.1f} MB) from {self.drop_dir}")
+        print(f"  Ingested  : {len(report['ingested'])}")
+        print(f"  Duplicates: {len(report['duplicates'])}")
+        print(f"  Unparsed  : {len(report['unparsed'])} (unknown lender or incomplete - left in drop folder)")
+        print(f"  Errors    : {len(report['errors'])}")
+        for name, provider, folder in report["ingested"]:
+            print(f"    [OK] {name} -> {provider} {folder}")
+        for name, original in report["duplicates"]:
+            print(f"    [DUPLICATE] {name} = {original}")
+        for name, reason in report["unparsed"]:
+            if reason:
+                print(f"    [SKIPPED] {name}: {reason}")
+        for name, error in report["errors"]:
+            print(f"    [ERROR] {name}: {error}")
+        if not elapsed:
+            return
+        print("  Stage timings:")
+        for stage in STAGES:
+            if stage in self.timings:
+                print(f"    {stage:<9} {self.timings[stage]:8.3f}s")
+        print(f"  Throughput: {report['files'] / elapsed:.1f} files/sec, "
+              f"{report['bytes'] / 1048576 / elapsed:.2f} MB/sec ({self.workers} workers)")
+
+def main():
+    """CLI for bulk ingestion."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Bulk-ingest statements from a drop folder')
+    parser.add_argument('--drop', type=str, help='Drop folder (default: loans/new_uploads)')
+    parser.add_argument('--workers', type=int, help='Parse processes (default: CPU count)')
+    parser.add_argument('--dry-run', action='store_true', help='Hash, dedupe and parse only; move nothing')
+
+    args = parser.parse_args()
+
+    ingestor = BulkIngestor(drop_dir=args.drop, workers=args.workers)
+    report = ingestor.run(dry_run=args.dry_run)
+    ingestor.print_report(report)
+
+if __name__ == "__main__":
+    main()
@@ -22,6 +22,48 @@ if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
 from .duplicate_detector import DuplicateDetector
 from .archive_manager import ArchiveManager
 
+# loan.json field -> loan_data keys it is taken from (first non-empty wins)
+LOAN_JSON_SOURCES = {
+    "account_ref": ('account_ref',),
+    "borrower_name": ('borrower_name',),
+    "outstanding_principal": ('outstanding_principal', 'outstanding'),
+    "emi_amount": ('emi_amount', 'emi'),
+    "tenure_remaining_months": ('tenure_remaining_months', 'tenure_months'),
+    "loan_type": ('loan_type',),
+    "status": ('status', 'verification_status'),
+    "linked_account": ('linked_account',),
+    "interest_rate": ('interest_rate',),
+    "rate_type": ('rate_type',),
+    "start_date": ('start_date',),
+}
+
+def loan_folder_name(provider, account):
+    """Normalized loan folder name: provider-account (lowercase, safe)."""
+    provider_clean = provider.lower().replace('&', '').replace(' ', '-').replace('/', '-')
+    account_clean = str(account).lower().replace(' ', '').replace('/', '-')[:30]
+    return f"{provider_clean}-{account_clean}"
+
+def with_loan_details(loans, loans_dir, fields=("interest_rate", "rate_type")):
+    """
+    masters.json records with fields they lack filled from loans/<provider-account>/loan.json.
+    Records are copied, never modified; loans without a folder (or value) are left as they are.
+    """
+    loans_dir = Path(loans_dir)
+    merged = []
+    for loan in loans:
+        missing = [f for f in fields if loan.get(f) in (None, '')]
+        account = loan.get('account_ref') or loan.get('account_number')
+        loan_json = loans_dir / loan_folder_name(loan.get('provider', ''), account) / "loan.json" if account else None
+        if missing and loan_json and loan_json.exists():
+            try:
+                with open(loan_json, 'r', encoding='utf-8') as f:
+                    details = json.load(f)
+                loan = dict(loan, **{f: details[f] for f in missing if details.get(f) not in (None, '')})
+            except Exception as e:
+                print(f"[WARN] Could not load {loan_json}: {e}")
+        merged.append(loan)
+    return merged
+
 class Orchestrator:
     """Main orchestration controller."""
     
@@ -44,9 +86,7 @@ class Orchestrator:
     
     def normalize_loan_folder_name(self, provider, account):
         """Create normalized folder name: provider-account (lowercase, safe)."""
-        provider_clean = provider.lower().replace('&', '').replace(' ', '-').replace('/', '-')
-        account_clean = str(account).lower().replace(' ', '').replace('/', '-')[:30]
-        return f"{provider_clean}-{account_clean}"
+        return loan_folder_name(provider, account)
     
     def get_loan_folder(self, provider, account):
         """Get or create loan folder path."""
@@ -66,7 +106,10 @@ class Orchestrator:
         return loan_path
     
     def migrate_loan(self, loan_data, source_folder=None):
-        """Migrate loan from old structure (Provider/Account/) to new (provider-account/)."""
+        """
+        Migrate loan from old structure (Provider/Account/) to new (provider-account/).
+        An existing loan.json is updated with the non-empty fields of loan_data only.
+        """
         provider = loan_data.get('provider', 'Unknown')
         account = loan_data.get('account_number') or loan_data.get('account_ref', 'unknown')
         
@@ -88,11 +131,24 @@ class Orchestrator:
             "status": loan_data.get('status') or loan_data.get('verification_status', 'RUNNING_PAID_EMI'),
             "linked_account": loan_data.get('linked_account', ''),
             "interest_rate": loan_data.get('interest_rate', ''),
+            "rate_type": loan_data.get('rate_type', ''),
             "start_date": loan_data.get('start_date', ''),
             "updated_at": datetime.now().isoformat(),
             "migrated_from": str(source_folder) if source_folder else None
         }
         
+        if loan_json.exists():
+            # Existing loan: update only the fields loan_data carries, keep the rest (rate, borrower...)
+            with open(loan_json, 'r', encoding='utf-8') as f:
+                existing = json.load(f)
+            given = [field for field, keys in LOAN_JSON_SOURCES.items()
+                     if any(loan_data.get(k) not in (None, '', 0) for k in keys)]
+            existing.update({field: loan_record[field] for field in given})
+            existing["updated_at"] = loan_record["updated_at"]
+            if source_folder:
+                existing["migrated_from"] = loan_record["migrated_from"]
+            loan_record = existing
+        
         with open(loan_json, 'w', encoding='utf-8') as f:
             json.dump(loan_record, f, indent=2, ensure_ascii=False)
         
@@ -115,6 +171,27 @@ class Orchestrator:
         
         return new_folder
     
+    def masters_record(self, loan_data):
+        """Convert loan.json data to masters.json format (backwards compatible)."""
+        loan_record = {
+            "provider": loan_data.get('provider', ''),
+            "outstanding": loan_data.get('outstanding_principal', 0),
+            "emi": loan_data.get('emi_amount', 0),
+            "tenure_months": loan_data.get('tenure_remaining_months', 0),
+            "account_ref": loan_data.get('account_number') or loan_data.get('account_ref', ''),
+            "start_date": loan_data.get('start_date', ''),
+            "status": loan_data.get('status', 'RUNNING_PAID_EMI')
+        }
+        # Rate details only when known (stress_engine / prepayment_sim read them)
+        for field in ('interest_rate', 'rate_type'):
+            if loan_data.get(field) not in (None, ''):
+                loan_record[field] = loan_data[field]
+        
+        # Calculate OTS (70%)
+        loan_record["ots_amount_70pct"] = round(loan_record["outstanding"] * 0.70)
+        loan_record["savings"] = loan_record["outstanding"] - loan_record["ots_amount_70pct"]
+        return loan_record
+    
     def sync_masters_json(self):
         """Sync masters.json with loan folders (aggregate view)."""
         if not self.masters_path.exists():
@@ -137,22 +214,7 @@ class Orchestrator:
                 with open(loan_json, 'r', encoding='utf-8') as f:
                     loan_data = json.load(f)
                 
-                # Convert to masters.json format (backwards compatible)
-                loan_record = {
-                    "provider": loan_data.get('provider', ''),
-                    "outstanding": loan_data.get('outstanding_principal', 0),
-                    "emi": loan_data.get('emi_amount', 0),
-                    "tenure_months": loan_data.get('tenure_remaining_months', 0),
-                    "account_ref": loan_data.get('account_number') or loan_data.get('account_ref', ''),
-                    "start_date": loan_data.get('start_date', ''),
-                    "status": loan_data.get('status', 'RUNNING_PAID_EMI')
-                }
-                
-                # Calculate OTS (70%)
-                loan_record["ots_amount_70pct"] = round(loan_record["outstanding"] * 0.70)
-                loan_record["savings"] = loan_record["outstanding"] - loan_record["ots_amount_70pct"]
-                
-                loans.append(loan_record)
+                loans.append(self.masters_record(loan_data))
             except Exception as e:
                 print(f"[WARN] Could not load {loan_json}: {e}")
         
@@ -173,6 +235,31 @@ class Orchestrator:
         
         return masters
     
+    def merge_into_masters(self, loan_records):
+        """Upsert masters.json records by (provider, account_ref) and save once."""
+        masters = {"loans": []}
+        if self.masters_path.exists():
+            with open(self.masters_path, 'r', encoding='utf-8') as f:
+                masters = json.load(f)
+        loans = masters.setdefault("loans", [])
+        index = {(l.get('provider'), l.get('account_ref')): i for i, l in enumerate(loans)}
+        for record in loan_records:
+            key = (record.get('provider'), record.get('account_ref'))
+            if key in index:
+                loans[index[key]].update(record)
+            else:
+                index[key] = len(loans)
+                loans.append(record)
+        
+        masters["total_exposure"] = sum(l.get('outstanding', 0) for l in loans)
+        masters["total_ots_liability"] = sum(l.get('ots_amount_70pct', round(l.get('outstanding', 0) * 0.70)) for l in loans)
+        masters["total_savings"] = masters["total_exposure"] - masters["total_ots_liability"]
+        masters["generated_at"] = datetime.now().isoformat()
+        
+        with open(self.masters_path, 'w', encoding='utf-8') as f:
+            json.dump(masters, f, indent=2, ensure_ascii=False)
+        return masters
+    
     def auto_archive_closed(self, dry_run=True):
         """Auto-archive closed loans."""
         return self.archive_manager.auto_archive_closed(dry_run=dry_run)
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Content-addressed schedule cache shared by the CLI (empire.py, empire_simple.py) and the API.
+A schedule is keyed by SHA256 of the parameters it is computed from, so an unchanged loan
+hits the cache whatever its position or id, and editing one loan recomputes one schedule.
+In memory: LRU of packed schedules. On disk (optional): .schedule_cache.sqlite in the
+data directory, so the next run - or the other process - starts warm; the oldest entries
+are pruned once it passes MAX_DISK_ENTRIES.
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+
+# UTF-8 for Windows console
+if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
+    try:
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    except (AttributeError, ValueError):
+        pass  # stdout already wrapped or closed
+
+# Bump when a schedule calculation changes, so stale entries are never read
+CACHE_VERSION = 1
+CACHE_FILE = ".schedule_cache.sqlite"
+# In-memory entries (a packed 60-month schedule is ~1 KB)
+MAX_MEMORY_ENTRIES = 100_000
+# On-disk entries; the oldest written are pruned past this
+MAX_DISK_ENTRIES = 1_000_000
+# Keys per SQLite lookup (stays under the bound-parameter limit)
+LOOKUP_BATCH = 500
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def schedule_key(kind, *params):
+    """SHA256 of (version, kind, params); numbers are normalized so 25000 and 25000.0 match."""
+    norm = (repr(float(p)) if isinstance(p, (int, float)) and not isinstance(p, bool) else repr(p) for p in params)
+    raw = f"{CACHE_VERSION}|{kind}|" + "|".join(norm)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def flat_schedule_key(loan, months):
+    """Key of a flat-EMI schedule: the amounts depend only on outstanding, EMI and horizon."""
+    return schedule_key("flat", loan["outstanding"], loan["emi"], months)
+
+
+def pack_schedule(emi_amounts, balances):
+    """(EMI paid, balance left) per month -> bytes (float64 EMIs, then balances)."""
+    return array('d', list(emi_amounts) + list(balances)).tobytes()
+
+
+def unpack_schedule(blob):
+    """bytes -> (emi_amounts, balances) as lists of floats."""
+    values = array('d')
+    values.frombytes(blob)
+    half = len(values) // 2
+    return values[:half].tolist(), values[half:].tolist()
+
+
+class ScheduleCache:
+    """LRU {key: bytes} in memory, backed by <base_dir>/.schedule_cache.sqlite when base_dir is given."""
+
+    def __init__(self, base_dir=None, max_entries=MAX_MEMORY_ENTRIES, max_disk_entries=MAX_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.path = Path(base_dir) / CACHE_FILE if base_dir else None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = self.disk_hits = self.misses = 0
+
+    def _connect(self):
+        if self._db is None and self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(self.path), timeout=10, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS schedules "
+                                 "(key TEXT PRIMARY KEY, value BLOB NOT NULL, written REAL NOT NULL)")
+            except sqlite3.Error as e:
+                print(f"[WARN] Schedule cache disabled on disk ({self.path.name}): {e}")
+                self.path = None
+                self._db = None
+        return self._db
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_many(self, keys):
+        """{key: value} for the keys found (memory first, then one disk query per batch)."""
+        found = {}
+        with self._lock:
+            missing = []
+            for key in dict.fromkeys(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                else:
+                    missing.append(key)
+            self.hits += len(found)  # disk hits are counted separately
+            db = self._connect() if missing else None
+            if db is not None:
+                try:
+                    for start in range(0, len(missing), LOOKUP_BATCH):
+                        batch = missing[start:start + LOOKUP_BATCH]
+                        marks = ",".join("?" * len(batch))
+                        rows = db.execute(f"SELECT key, value FROM schedules WHERE key IN ({marks})", batch).fetchall()
+                        for key, value in rows:
+                            found[key] = bytes(value)
+                            self._remember(key, found[key])
+                        self.disk_hits += len(rows)
+                except sqlite3.Error as e:
+                    print(f"[WARN] Could not read schedule cache: {e}")
+            self.misses += sum(1 for key in missing if key not in found)
+        return found
+
+    def get(self, key):
+        """Cached value for key, or None."""
+        return self.get_many([key]).get(key)
+
+    def put_many(self, items):
+        """Store {key: value} in memory and, in one transaction, on disk."""
+        if not items:
+            return
+        with self._lock:
+            for key, value in items.items():
+                self._remember(key, value)
+            db = self._connect()
+            if db is None:
+                return
+            try:
+                now = time.time()
+                db.executemany("INSERT OR REPLACE INTO schedules (key, value, written) VALUES (?, ?, ?)",
+                               [(key, value, now) for key, value in items.items()])
+                count = db.execute("SELECT COUNT(*) FROM schedules").fetchone()[0]
+                if count > self.max_disk_entries:
+                    db.execute("DELETE FROM schedules WHERE key IN "
+                               "(SELECT key FROM schedules ORDER BY written LIMIT ?)", (count - self.max_disk_entries,))
+                db.commit()
+            except sqlite3.Error as e:
+                print(f"[WARN] Could not save schedule cache: {e}")
+
+    def put(self, key, value):
+        self.put_many({key: value})
+
+    def get_or_compute(self, key, compute):
+        """Cached value, or compute() stored under key."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Drop every entry, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+            db = self._connect()
+            if db is not None:
+                db.execute("DELETE FROM schedules")
+                db.commit()
+
+    def stats(self):
+        """Entries in memory / on disk and the hit counters since start."""
+        disk = 0
+        db = self._connect()
+        if db is not None:
+            with self._lock:
+                disk = db.execute("SELECT COUNT(*) FROM schedules").fetchone()[0]
+        return {"memory_entries": len(self._memory), "disk_entries": disk, "hits": self.hits,
+                "disk_hits": self.disk_hits, "misses": self.misses}
+
+
+def shared_cache(base_dir=None):
+    """One ScheduleCache per data directory and process (the API reuses it across requests)."""
+    key = str(Path(base_dir).resolve()) if base_dir else None
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = ScheduleCache(base_dir)
+        return _shared[key]
+
+
+def main():
+    """CLI for the schedule cache."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Schedule cache (content-addressed, LRU + SQLite)')
+    parser.add_argument('base_dir', nargs='?', default=os.getcwd(), help='Directory holding .schedule_cache.sqlite')
+    parser.add_argument('--clear', action='store_true', help='Delete every cached schedule')
+
+    args = parser.parse_args()
+
+    cache = ScheduleCache(args.base_dir)
+    if args.clear:
+        cache.clear()
+        print(f"[OK] Cleared {cache.path}")
+    stats = cache.stats()
+    print(f"[OK] {stats['disk_entries']} schedules cached in {cache.path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Streaming reader for bank / LoanLens statements (CSV or XLSX).
+Rows come out one at a time (or in chunks) as typed dicts: the csv module for CSV,
+openpyxl read-only mode for XLSX, so a several-hundred-MB upload never sits in RAM.
+Values that do not parse as numbers are kept as text and counted; rows with more fields than
+the header are skipped. The first few of each are kept as samples.
+"""
+import csv
+import re
+import sys
+from pathlib import Path
+from itertools import islice
+
+# UTF-8 for Windows console
+if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
+    try:
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    except (AttributeError, ValueError):
+        pass  # stdout already wrapped or closed
+
+# Rows per chunk from iter_chunks()
+CHUNK_ROWS = 5000
+# Bytes read to detect the CSV delimiter (csv.Sniffer slows down sharply on larger samples)
+SNIFF_BYTES = 8192
+# Invalid rows kept (with reason) in the report; the rest are only counted
+MAX_ERROR_SAMPLES = 20
+# Known amount column names (after column_key); "EMI Date" or "Interest Type" stay text
+AMOUNT_COLUMNS = frozenset({
+    'debit', 'credit', 'dr', 'cr', 'amount', 'withdrawal', 'deposit', 'balance',
+    'debit amount', 'credit amount', 'withdrawal amount', 'withdrawal amt', 'deposit amount',
+    'deposit amt', 'transaction amount', 'txn amount', 'opening balance', 'closing balance',
+    'running balance', 'balance remaining', 'emi', 'emi amount', 'monthly emi', 'principal',
+    'principal amount', 'principal part', 'principal component', 'outstanding',
+    'outstanding principal', 'principal outstanding', 'outstanding amount', 'outstanding balance',
+    'interest', 'interest amount', 'interest part', 'interest component', 'loan amount',
+    'sanction amount', 'sanctioned amount',
+})
+# Known whole-number column names
+INTEGER_COLUMNS = frozenset({
+    'tenure', 'tenure months', 'tenure total months', 'tenure remaining months', 'months',
+    'remaining months', 'months remaining', 'installments', 'installments paid', 'emis paid',
+})
+XLSX_TYPES = ('.xlsx', '.xlsm')
+
+def to_amount(value):
+    """'Rs 1,50,000.00' / '₹ 80,000' / 80000 -> float; None for blank. Raises ValueError otherwise."""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    text = str(value).strip()
+    for token in (',', '₹', 'Rs.', 'Rs', 'INR'):
+        text = text.replace(token, '')
+    text = text.strip()
+    if not text or text in ('-', '--'):
+        return None
+    if text.startswith('(') and text.endswith(')'):
+        text = '-' + text[1:-1]
+    return float(text)
+
+def to_integer(value):
+    """Whole number (tenure, installments); None for blank."""
+    amount = to_amount(value)
+    return None if amount is None else int(amount)
+
+def column_key(name):
+    """'Withdrawal Amt. (INR)' / 'emi_amount' -> 'withdrawal amt' / 'emi amount'"""
+    text = re.sub(r"\(.*?\)", " ", str(name).lower())
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text).split())
+
+def column_types(columns):
+    """{column: converter} for columns whose whole name is a known amount / count column."""
+    types = {}
+    for col in columns:
+        key = column_key(col)
+        if key in INTEGER_COLUMNS:
+            types[col] = to_integer
+        elif key in AMOUNT_COLUMNS:
+            types[col] = to_amount
+    return types
+
+def sniff_delimiter(sample):
+    """Delimiter of a CSV sample (',', tab, ';' or '|')."""
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=',\t;|').delimiter
+    except csv.Error:
+        return ',' if ',' in sample else '\t' if '\t' in sample else ';'
+
+class StatementReader:
+    """Typed, validated rows of one CSV/XLSX statement, read lazily."""
+
+    def __init__(self, path, chunk_rows=CHUNK_ROWS, max_error_samples=MAX_ERROR_SAMPLES):
+        self.path = Path(path)
+        self.chunk_rows = chunk_rows
+        self.max_error_samples = max_error_samples
+        self.is_xlsx = self.path.suffix.lower() in XLSX_TYPES
+        self.columns = []
+        self.rows_read = 0
+        self.invalid_rows = 0
+        self.errors = []  # [(row number, message)] - first max_error_samples only
+        self.text_values = 0  # numeric-column values kept as text
+        self.warnings = []  # [(row number, message)] - first max_error_samples only
+
+    def _reject(self, line_no, message):
+        self.invalid_rows += 1
+        if len(self.errors) < self.max_error_samples:
+            self.errors.append((line_no, message))
+
+    def _raw_rows(self):
+        """Yield (line number, [cell values]); sets self.columns from the header row."""
+        if self.is_xlsx:
+            from openpyxl import load_workbook
+            wb = load_workbook(self.path, read_only=True, data_only=True)
+            try:
+                values = wb.active.iter_rows(values_only=True)
+                self.columns = [str(c).strip() if c is not None else '' for c in next(values, ())]
+                for line_no, row in enumerate(values, start=2):
+                    yield line_no, row
+            finally:
+                wb.close()  # read-only workbooks keep the file open until closed
+        else:
+            with open(self.path, 'r', encoding='utf-8-sig', newline='') as f:
+                delimiter = sniff_delimiter(f.read(SNIFF_BYTES))
+                f.seek(0)
+                reader = csv.reader(f, delimiter=delimiter)
+                self.columns = [c.strip() for c in next(reader, [])]
+                for row in reader:
+                    yield reader.line_num, row
+
+    def header(self):
+        """Column names, reading only the first row."""
+        rows = self._raw_rows()
+        try:
+            next(rows, None)
+        finally:
+            rows.close()
+        return self.columns
+
+    def iter_rows(self):
+        """Yield {column: value} with numeric columns converted; blank and over-long rows skipped."""
+        rows = self._raw_rows()
+        types = None
+        try:
+            for line_no, row in rows:
+                if types is None:
+                    types = column_types(self.columns)
+                if not any(v not in (None, '') for v in row):
+                    continue
+                self.rows_read += 1
+                if len(row) > len(self.columns):
+                    self._reject(line_no, f"{len(row)} fields, header has {len(self.columns)}")
+                    continue
+                record = dict(zip(self.columns, row))
+                for col, convert in types.items():
+                    try:
+                        record[col] = convert(record.get(col))
+                    except (ValueError, TypeError):
+                        self.text_values += 1  # the row stays valid; the cell stays text
+                        if len(self.warnings) < self.max_error_samples:
+                            self.warnings.append((line_no, f"{col}: not a number ({str(record.get(col))[:40]!r})"))
+                yield record
+        finally:
+            rows.close()
+
+    def iter_chunks(self, chunk_rows=None):
+        """Yield lists of up to chunk_rows typed rows."""
+        rows = self.iter_rows()
+        size = chunk_rows or self.chunk_rows
+        try:
+            while True:
+                chunk = list(islice(rows, size))
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            rows.close()
+
+    def report(self):
+        """Row counts and sampled errors (after iterating)."""
+        return {
+            'rows': self.rows_read,
+            'valid_rows': self.rows_read - self.invalid_rows,
+            'invalid_rows': self.invalid_rows,
+            'errors': [{'row': line_no, 'error': message} for line_no, message in self.errors],
+            'text_values': self.text_values,
+            'warnings': [{'row': line_no, 'warning': message} for line_no, message in self.warnings],
+        }
+
+def main():
+    """CLI: stream a statement and report row counts and invalid rows."""
+    import argparse
+    parser = argparse.ArgumentParser(description='Stream and validate a CSV/XLSX statement')
+    parser.add_argument('statement', help='CSV/XLSX statement')
+    parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS, help='Rows per chunk')
+
+    args = parser.parse_args()
+
+    reader = StatementReader(args.statement, chunk_rows=args.chunk_rows)
+    chunks = sum(1 for _ in reader.iter_chunks())
+    report = reader.report()
+    print(f"[OK] {args.statement}: {report['valid_rows']:,} rows in {chunks} chunks, "
+          f"{report['invalid_rows']:,} invalid")
+    print(f"  Columns: {', '.join(reader.columns)}")
+    for error in report['errors']:
+        print(f"  [!] row {error['row']}: {error['error']}")
+    if report['text_values']:
+        print(f"  [WARN] {report['text_values']:,} numeric-column values kept as text")
+    for warning in report['warnings']:
+        print(f"  [WARN] row {warning['row']}: {warning['warning']}")
+
+if __name__ == "__main__":
+    main()
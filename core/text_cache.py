@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Persistent PDF text cache keyed by document SHA256 (same hash as DuplicateDetector).
+Per-page text and finished parses are stored gzip-compressed in .text_cache/, so a known
+statement never goes through pdfplumber again and a re-upload returns its cached parse.
+Pages are extracted lazily in page order (long PDFs across a process pool), so a parser
+that stops reading once it has its fields only pays for the pages it read.
+"""
+import gzip
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+
+# UTF-8 for Windows console
+if sys.platform == 'win32' and hasattr(sys.stdout, 'buffer'):
+    try:
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+    except (AttributeError, ValueError):
+        pass  # stdout already wrapped or closed
+
+from .duplicate_detector import sha256_file
+
+# Bump when page extraction changes, so stale text is re-extracted
+CACHE_VERSION = 1
+# Pages always read in-process first (statement summary fields live here)
+FIRST_PAGES = 2
+# PDFs with at least this many pages extract the rest over a process pool
+PARALLEL_MIN_PAGES = 24
+PAGES_PER_TASK = 4
+# Text carried over from the previous page so matches spanning a page break are found
+PAGE_OVERLAP = 500
+
+def default_page_workers(page_count):
+    """1 for short PDFs, else up to 8 processes."""
+    if page_count < PARALLEL_MIN_PAGES:
+        return 1
+    return max(1, min(os.cpu_count() or 1, 8))
+
+def _extract_text(page):
+    text = page.extract_text() or ""
+    if hasattr(page, 'close'):
+        page.close()  # drop pdfplumber's per-page object cache (200-page statements)
+    return text
+
+def _extract_pages(pdf_path, indexes):
+    """Process-pool task: text of the given page indexes."""
+    import pdfplumber
+    with pdfplumber.open(pdf_path) as pdf:
+        return [_extract_text(pdf.pages[i]) for i in indexes]
+
+def scan_fields(pages, patterns, required=None, min_pages=0):
+    """
+    First match of each compiled pattern over (index, text) pages in page order.
+    Stops pulling pages once every required field has matched and either every pattern has
+    matched or min_pages pages have been read (the other fields are looked for that far).
+    Returns {name: re.Match}.
+    """
+    required = set(patterns if required is None else required)
+    found = {}
+    tail = ""
+    read = 0
+    try:
+        for _, text in pages:
+            read += 1
+            window = f"{tail}\n{text}" if tail else text
+            for name, pattern in patterns.items():
+                if name not in found:
+                    match = pattern.search(window)
+                    if match:
+                        found[name] = match
+            if required <= found.keys() and (read >= min_pages or len(found) == len(patterns)):
+                break
+            tail = text[-PAGE_OVERLAP:]
+    finally:
+        if hasattr(pages, 'close'):
+            pages.close()  # early exit: stop extraction, cache what was read
+    return found
+
+class PdfTextCache:
+    """SHA256 -> {page_count, pages, parses} in <base_dir>/.text_cache/<sha[:2]>/<sha>.json.gz"""
+
+    def __init__(self, base_dir=None):
+        self.base_dir = Path(base_dir) if base_dir else Path.cwd()
+        self.cache_dir = self.base_dir / ".text_cache"
+
+    @staticmethod
+    def hash_bytes(content):
+        """SHA256 of in-memory content (uploads) - same key as sha256_file on the saved file."""
+        return hashlib.sha256(content).hexdigest()
+
+    def _entry_path(self, sha256):
+        return self.cache_dir / sha256[:2] / f"{sha256}.json.gz"
+
+    def load(self, sha256):
+        """Cached entry for sha256, or None."""
+        path = self._entry_path(sha256)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except Exception as e:
+            print(f"[WARN] Could not read text cache {path.name}: {e}")
+            return None
+        if entry.get("version") != CACHE_VERSION:
+            return None
+        return entry
+
+    def save(self, sha256, entry):
+        """Write entry atomically (parallel workers may cache the same document)."""
+        entry["version"] = CACHE_VERSION
+        entry["sha256"] = sha256
+        entry["updated_at"] = datetime.now().isoformat()
+        path = self._entry_path(sha256)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        try:
+            with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=6) as f:
+                json.dump(entry, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp, path)
+        except Exception as e:
+            print(f"[WARN] Could not save text cache {path.name}: {e}")
+            if tmp.exists():
+                tmp.unlink()
+
+    def iter_pages(self, pdf_path, sha256=None, workers=None):
+        """
+        Yield (index, text) in page order ('' for image-only pages). Cached pages cost nothing;
+        pdfplumber opens only when a missing page is reached. Stopping early (close() or break)
+        leaves later pages unextracted; the pages read so far are cached.
+        """
+        sha256 = sha256 or sha256_file(pdf_path)
+        entry = self.load(sha256) or {"pages": {}, "parses": {}}
+        pages = entry["pages"]
+        extracted = 0
+        try:
+            i = 0
+            while str(i) in pages:
+                yield i, pages[str(i)]
+                i += 1
+            if entry.get("page_count") is not None and i >= entry["page_count"]:
+                return
+
+            import pdfplumber
+            with pdfplumber.open(pdf_path) as pdf:
+                page_count = entry["page_count"] = len(pdf.pages)
+                # Summary pages in-process: most parsers are done after these
+                while i < min(FIRST_PAGES, page_count):
+                    if str(i) not in pages:
+                        pages[str(i)] = _extract_text(pdf.pages[i])
+                        extracted += 1
+                    yield i, pages[str(i)]
+                    i += 1
+                if workers is None:
+                    workers = default_page_workers(page_count)
+                if workers <= 1:
+                    while i < page_count:
+                        if str(i) not in pages:
+                            pages[str(i)] = _extract_text(pdf.pages[i])
+                            extracted += 1
+                        yield i, pages[str(i)]
+                        i += 1
+                    return
+            # Rest of a long PDF: waves of workers * PAGES_PER_TASK pages, consumed in order
+            wave = workers * PAGES_PER_TASK
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                for start in range(i, page_count, wave):
+                    end = min(page_count, start + wave)
+                    missing = [j for j in range(start, end) if str(j) not in pages]
+                    tasks = [missing[k:k + PAGES_PER_TASK] for k in range(0, len(missing), PAGES_PER_TASK)]
+                    for indexes, texts in zip(tasks, pool.map(_extract_pages, [str(pdf_path)] * len(tasks), tasks)):
+                        for j, text in zip(indexes, texts):
+                            pages[str(j)] = text
+                        extracted += len(indexes)
+                    for j in range(start, end):
+                        yield j, pages[str(j)]
+        finally:
+            if extracted:
+                self.save(sha256, entry)
+
+    def pages(self, pdf_path, sha256=None, workers=None):
+        """Per-page text of the whole PDF; pdfplumber only for pages not cached yet."""
+        return [text for _, text in self.iter_pages(pdf_path, sha256, workers)]
+
+    def text(self, pdf_path, sha256=None, workers=None):
+        """Whole-document text, pages joined with newlines."""
+        return "\n".join(self.pages(pdf_path, sha256, workers))
+
+    def find_fields(self, pdf_path, patterns, required=None, sha256=None, workers=None, min_pages=0):
+        """scan_fields over this PDF's pages: extraction stops once the required fields are found."""
+        return scan_fields(self.iter_pages(pdf_path, sha256, workers), patterns, required, min_pages)
+
+    @staticmethod
+    def parse_key(parser, version):
+        """'hdfc', 2 -> 'hdfc@2': a parser fix (new VERSION) misses the old cached parses."""
+        return f"{parser}@{version}"
+
+    def get_parse(self, sha256, parser, version):
+        """Cached parse result of `parser` (at this parser VERSION) for this document, or None."""
+        entry = self.load(sha256)
+        if not entry:
+            return None
+        return entry.get("parses", {}).get(self.parse_key(parser, version))
+
+    def put_parse(self, sha256, parser, version, result):
+        """Store a parse result next to the page text."""
+        entry = self.load(sha256) or {"pages": {}, "parses": {}}
+        entry.setdefault("parses", {})[self.parse_key(parser, version)] = result
+        self.save(sha256, entry)
+
+    def stats(self):
+        """Number of cached documents and compressed bytes on disk."""
+        files = list(self.cache_dir.rglob('*.json.gz')) if self.cache_dir.exists() else []
+        return {"documents": len(files), "bytes": sum(f.stat().st_size for f in files)}
+
+def main():
+    """CLI for the PDF text cache."""
+    import argparse
+    parser = argparse.ArgumentParser(description='PDF text cache (SHA256-keyed)')
+    parser.add_argument('pdf', nargs='*', help='Extract (or load cached) text for these PDFs')
+    parser.add_argument('--stats', action='store_true', help='Show cache size')
+
+    args = parser.parse_args()
+
+    cache = PdfTextCache()
+
+    for pdf in args.pdf:
+        pages = cache.pages(pdf)
+        print(f"[OK] {pdf}: {len(pages)} pages, {sum(len(p) for p in pages)} chars")
+
+    if args.stats or not args.pdf:
+        stats = cache.stats()
+        print(f"[OK] {stats['documents']} documents cached ({stats['bytes'] / 1024:.1f} KB) in {cache.cache_dir}")
+
+if __name__ == "__main__":
+    main()
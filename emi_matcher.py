@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+EMI detection in bank statements (CSV/XLSX)
+A debit is an EMI when its narration names the lender and its amount falls in that lender's
+band. Bands come from the EMIs in masters.json (+/- BAND_TOLERANCE), not hard-coded amounts.
+Whole columns are matched at once with pandas string ops - 100k-row statements in milliseconds.
+Without pandas, rows are tagged by a keyword automaton (Aho-Corasick) built once from all
+lender aliases: one pass over each narration, however many aliases there are.
+
+Benchmark: py emi_matcher.py --bench 100000
+"""
+import re
+import csv
+import sys
+import json
+import time
+import argparse
+from collections import deque
+from functools import lru_cache
+from itertools import islice
+
+try:
+    import pandas as pd
+    import numpy as np
+    HAS_PANDAS = True
+except ImportError:
+    HAS_PANDAS = False
+
+# Narration keywords per provider code (upper-case; matched as substrings)
+LENDER_KEYWORDS = {
+    "L&T": ["L&T", "L AND T", "LNT"],
+    "HDFC": ["HDFC"],
+    "Tata": ["TATA CAP", "TCFSL"],
+    "Bajaj": ["BAJAJ FIN", "BAJAJFIN", "BFL"],
+}
+BAND_TOLERANCE = 0.0625  # 80,000 EMI -> 75,000..85,000
+# Used only when no loans are known (the amounts _parse_csv used to hard-code)
+DEFAULT_LOANS = [
+    {"provider": "L&T", "emi": 80000, "start_date": "2024-04-03"},
+    {"provider": "HDFC", "emi": 189000, "start_date": "2024-04-05"},
+]
+DESC_COLUMNS = ["description", "narration", "desc"]
+AMOUNT_COLUMNS = ["debit", "amount", "withdrawal"]
+
+
+def masters_loans(path="masters.json"):
+    """Loans from masters.json ([] if missing or unreadable)."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("loans") or []
+    except (OSError, ValueError):
+        return []
+
+
+def amount_bands(loans, tolerance=BAND_TOLERANCE):
+    """[(provider, emi, low, high, start_date)] for loans whose provider has narration keywords."""
+    bands = []
+    for loan in loans or DEFAULT_LOANS:
+        provider = loan.get("provider")
+        emi = loan.get("emi") or loan.get("emi_amount") or 0
+        if provider in LENDER_KEYWORDS and emi > 0:
+            bands.append((provider, emi, emi * (1 - tolerance), emi * (1 + tolerance),
+                          loan.get("start_date", "")))
+    return bands
+
+
+def keyword_pattern(provider):
+    """Compiled alternation of a provider's narration keywords."""
+    return re.compile("|".join(re.escape(k) for k in LENDER_KEYWORDS[provider]))
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick matcher over {label: [keywords]} (case-insensitive substrings).
+    Transitions are resolved into a full table at build time, so a scan is one dict
+    lookup per character with no backtracking.
+    """
+
+    def __init__(self, keywords):
+        goto = [{}]
+        out = [()]
+        for label, aliases in keywords.items():
+            for alias in aliases:
+                state = 0
+                for ch in alias.upper():
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        goto.append({})
+                        out.append(())
+                        nxt = goto[state][ch] = len(goto) - 1
+                    state = nxt
+                if label not in out[state]:
+                    out[state] += (label,)
+
+        # Breadth-first: a state's failure target is shallower, so its table is already complete
+        fail = [0] * len(goto)
+        delta = [dict(g) for g in goto]
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, t in delta[fail[state]].items():
+                delta[state].setdefault(ch, t)
+            for ch, t in goto[state].items():
+                fail[t] = delta[fail[state]].get(ch, 0) if state else 0
+                out[t] += tuple(l for l in out[fail[t]] if l not in out[t])
+                queue.append(t)
+        self._delta = delta
+        self._out = out
+
+    def tag(self, text):
+        """Label of the first keyword to end in text, or None."""
+        delta, out = self._delta, self._out
+        state = 0
+        for ch in text.upper():
+            state = delta[state].get(ch, 0)
+            if out[state]:
+                return out[state][0]
+        return None
+
+    def labels(self, text):
+        """Every label with a keyword in text, in order of first occurrence."""
+        delta, out = self._delta, self._out
+        found = {}
+        state = 0
+        for ch in text.upper():
+            state = delta[state].get(ch, 0)
+            for label in out[state]:
+                found[label] = True
+        return list(found)
+
+
+@lru_cache(maxsize=None)
+def lender_automaton():
+    """The shared automaton over LENDER_KEYWORDS (built on first use)."""
+    return KeywordAutomaton(LENDER_KEYWORDS)
+
+
+def to_amount(value):
+    """Statement amount as float ('1,50,000.00' -> 150000.0); 0 when blank or not a number."""
+    try:
+        return float(str(value).replace(",", "").strip() or 0)
+    except ValueError:
+        return 0.0
+
+
+def find_column(columns, candidates):
+    """First column whose lower-cased name is in candidates (statement header names vary)."""
+    lower = {str(c).strip().lower(): c for c in columns}
+    return next((lower[k] for k in candidates if k in lower), None)
+
+
+def match_emis_frame(df, bands):
+    """
+    EMI debits in a statement DataFrame, in row order:
+    [{'provider', 'emi', 'date'}]. Providers are tried in band order (first match wins per row).
+    """
+    desc_col = find_column(df.columns, DESC_COLUMNS)
+    amt_col = find_column(df.columns, AMOUNT_COLUMNS)
+    if desc_col is None or amt_col is None or not bands:
+        return []
+    desc = df[desc_col].astype(str).str.upper()
+    amt = pd.to_numeric(df[amt_col], errors="coerce").fillna(0).to_numpy()
+
+    # One keyword scan per provider, then cheap numeric band checks per loan
+    keyword_hits = {p: desc.str.contains(keyword_pattern(p)).to_numpy()
+                    for p in dict.fromkeys(b[0] for b in bands)}
+    conditions = [keyword_hits[provider] & (amt >= low) & (amt <= high)
+                  for provider, _, low, high, _ in bands]
+    band_index = np.select(conditions, list(range(len(bands))), default=-1)
+
+    matches = []
+    for i in band_index[band_index >= 0]:
+        provider, emi, _, _, start_date = bands[i]
+        matches.append({"provider": provider, "emi": emi, "date": start_date})
+    return matches
+
+
+def match_emis_rows(rows, bands, automaton=None):
+    """
+    match_emis_frame for plain dict rows (csv.DictReader) - no pandas needed.
+    Only debits inside some band reach the automaton, and each of those is scanned once.
+    """
+    if not bands:
+        return []
+    automaton = automaton or lender_automaton()
+    low = min(b[2] for b in bands)
+    high = max(b[3] for b in bands)
+    matches = []
+    desc_col = amt_col = None
+    for row in rows:
+        if desc_col is None:
+            desc_col = find_column(row.keys(), DESC_COLUMNS)
+            amt_col = find_column(row.keys(), AMOUNT_COLUMNS)
+            if desc_col is None or amt_col is None:
+                return []
+        amt = to_amount(row.get(amt_col))
+        if amt < low or amt > high:
+            continue
+        providers = automaton.labels(str(row.get(desc_col) or ""))
+        if not providers:
+            continue
+        for provider, emi, band_low, band_high, start_date in bands:
+            if provider in providers and band_low <= amt <= band_high:
+                matches.append({"provider": provider, "emi": emi, "date": start_date})
+                break
+    return matches
+
+
+def iter_statement_rows(path):
+    """Statement rows as typed dicts without pandas, streamed (CSV or .xlsx read-only)."""
+    from core.statement_reader import StatementReader
+    return StatementReader(path).iter_rows()
+
+
+def typed_frame(df):
+    """Strip header names and convert known amount/count columns in place (unparsable -> NaN)."""
+    from core.statement_reader import column_types
+    df.columns = [str(c).strip() for c in df.columns]
+    for col in column_types(df.columns):
+        values = df[col]
+        if not pd.api.types.is_numeric_dtype(values):
+            values = values.astype(str).str.replace(r"[,₹]|Rs\.?|INR", "", regex=True).str.strip()
+            negative = values.str.startswith("(") & values.str.endswith(")")  # "(1,500)" -> -1500
+            if negative.any():
+                values = values.where(~negative, "-" + values.str[1:-1])
+        df[col] = pd.to_numeric(values, errors="coerce")
+    return df
+
+
+def read_statement_chunks(path, chunk_rows=None):
+    """
+    Statement as a stream of typed DataFrames: pd.read_csv in chunks for CSV, openpyxl
+    read-only rows for XLSX, so memory is bounded by the chunk, not the file.
+    """
+    from pathlib import Path
+    from core.statement_reader import CHUNK_ROWS, SNIFF_BYTES, XLSX_TYPES, sniff_delimiter
+    chunk_rows = chunk_rows or CHUNK_ROWS
+    if Path(path).suffix.lower() in XLSX_TYPES:
+        from openpyxl import load_workbook
+        wb = load_workbook(path, read_only=True, data_only=True)
+        try:
+            values = wb.active.iter_rows(values_only=True)
+            columns = [str(c).strip() if c is not None else "" for c in next(values, ())]
+            while True:
+                chunk = list(islice(values, chunk_rows))
+                if not chunk:
+                    return
+                rows = [row[:len(columns)] for row in chunk if any(v not in (None, "") for v in row)]
+                if rows:
+                    yield typed_frame(pd.DataFrame.from_records(rows, columns=columns))
+        finally:
+            wb.close()  # read-only workbooks keep the file open until closed
+    with open(path, "r", encoding="utf-8-sig", newline="") as f:
+        delimiter = sniff_delimiter(f.read(SNIFF_BYTES))
+    # thousands="," lets the C parser read "1,50,000" itself; typed_frame only cleans what is left
+    for df in pd.read_csv(path, sep=delimiter, encoding="utf-8-sig", chunksize=chunk_rows, thousands=",",
+                          on_bad_lines="skip", skip_blank_lines=True):
+        yield typed_frame(df)
+
+
+def match_emis_chunks(chunks, bands):
+    """match_emis_frame over a stream of DataFrames (read_statement_chunks), in row order."""
+    matches = []
+    for df in chunks:
+        matches.extend(match_emis_frame(df, bands))
+    return matches
+
+
+BENCH_NARRATIONS = ["NEFT SALARY CREDIT", "UPI GROCERY STORE", "ACH DR L&T FINANCE LTD",
+                    "ECS HDFC BANK LOAN", "ATM WDL", "POS AMAZON", "ACH TATA CAPITAL"]
+BENCH_AMOUNTS = [80000, 189000, 1500, 250, 45000]
+
+
+def benchmark(n_rows=100000):
+    """Time match_emis_rows (and match_emis_frame with pandas) over a synthetic statement."""
+    import random
+    rnd = random.Random(7)
+    rows = [{"Narration": rnd.choice(BENCH_NARRATIONS), "Debit": str(rnd.choice(BENCH_AMOUNTS))}
+            for _ in range(n_rows)]
+    bands = amount_bands(DEFAULT_LOANS + [{"provider": "Tata", "emi": 45000, "start_date": "2024-04-10"}])
+    lender_automaton()  # built once, outside the timing
+
+    timings = {}
+    start = time.perf_counter()
+    matches = match_emis_rows(rows, bands)
+    timings["automaton (rows)"] = time.perf_counter() - start
+    if HAS_PANDAS:
+        df = pd.DataFrame(rows)
+        df["Debit"] = df["Debit"].astype(int)
+        start = time.perf_counter()
+        assert len(match_emis_frame(df, bands)) == len(matches)
+        timings["pandas (frame)"] = time.perf_counter() - start
+    for name, elapsed in timings.items():
+        print(f"EMI matcher, {name}: {n_rows:,} rows, {len(matches):,} EMIs in {elapsed*1000:.1f} ms "
+              f"({n_rows / elapsed / 1e6:.2f}M rows/sec)")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect lender EMIs in a bank statement")
+    parser.add_argument("statement", nargs="?", help="CSV/XLSX statement")
+    parser.add_argument("--bench", type=int, nargs="?", const=100000, metavar="ROWS",
+                        help="Benchmark on a synthetic statement (default 100000 rows)")
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.bench)
+        return 0
+    if not args.statement:
+        parser.print_help()
+        return 1
+    bands = amount_bands(masters_loans())
+    if HAS_PANDAS:
+        matches = match_emis_chunks(read_statement_chunks(args.statement), bands)
+    else:
+        matches = match_emis_rows(iter_statement_rows(args.statement), bands)
+    counts = {}
+    for m in matches:
+        counts[m["provider"]] = counts.get(m["provider"], 0) + 1
+    print(f"[OK] {len(matches)} EMIs: " + ", ".join(f"{p} x{n}" for p, n in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
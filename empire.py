@@ -8,9 +8,23 @@ import os
 import json
 import csv
 import sys
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 
+from core.schedule_cache import shared_cache
+from core.text_cache import PdfTextCache
+from statement_parsers import parse_document
+from emi_matcher import (amount_bands, iter_statement_rows, masters_loans, match_emis_chunks,
+                         match_emis_rows, read_statement_chunks)
+from ots_letters import build_letter_jobs, default_workers, generate_letters
+from ots_scenarios import portfolio_surface, surface_table_html
+from portfolio_view import build_portfolio_view
+from projection_store import HAS_NUMPY, ProjectionStore
+from projection_writer import (HAS_OPENPYXL, PROJECTION_COLUMNS, ProjectionWorkbook,
+                               iter_projection_rows)
+from virtual_table import (VIRTUAL_TABLE_CSS, grid_block, render_mode_from_argv,
+                           use_virtual, write_sidecar)
+
 # Set UTF-8 encoding for Windows console
 if sys.platform == 'win32':
     import io
@@ -32,7 +46,7 @@ try:
     from reportlab.lib.pagesizes import letter
     from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
     from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
     HAS_REPORTLAB = True
 except ImportError:
     pass
@@ -53,16 +67,40 @@ except ImportError:
 DATA_DIR = Path.cwd()
 OUTPUT_DIR = DATA_DIR
 OTS_PDF_DIR = OUTPUT_DIR / "ots-pdfs"
+
+def set_data_dir(path):
+    """Point the analyzer (and the verifier generator) at another portfolio folder (batch mode)."""
+    global DATA_DIR, OUTPUT_DIR, OTS_PDF_DIR
+    DATA_DIR = Path(path)
+    OUTPUT_DIR = DATA_DIR
+    OTS_PDF_DIR = OUTPUT_DIR / "ots-pdfs"
+    import generate_verifier_html
+    generate_verifier_html.set_data_dir(DATA_DIR)
+
 LOAN_DOCS = {
     "lt_pdf": "FORECLOSURE_BL240910207908339.pdf",
     "hdfc_docx": "hdfc24loan1.docx",
     "csv": "25aprilcsv.xlsx"
 }
 
+# Column specs for the virtual dashboard table (amounts in Rs, shown in lakhs)
+DASHBOARD_GRID_COLUMNS = """[
+                    {key: 'provider', label: 'Loan Provider'},
+                    {key: 'os', label: 'OS (Rs L)', render: function(v) { return (v / 100000).toFixed(2); }},
+                    {key: 'ots', label: 'OTS (Rs L)', render: function(v) { return (v / 100000).toFixed(2); }},
+                    {key: 'savings', label: 'Savings (Rs L)', render: function(v) { return (v / 100000).toFixed(2); }},
+                    {key: 'account_ref', label: 'Account Ref', render: function(v) { return '<span class="badge">' + escapeHtml(v) + '</span>'; }}
+                ]"""
+
 # =============== CORE ANALYZER ===============
 class DebtEmpireAnalyzer:
-    def __init__(self):
+    def __init__(self, render_mode="auto", letter_workers=None, strict_masters=False):
         self.loans = []
+        self.render_mode = render_mode  # auto / inline / virtual (large portfolios)
+        self.letter_workers = letter_workers  # OTS letter processes (None = by batch size)
+        # Batch runs: an unreadable masters.json fails the run instead of falling back to sample loans
+        self.strict_masters = strict_masters
+        self.masters_error = None
         self.hardcoded_loans = [
             {"provider": "L&T", "outstanding": 2574000, "emi": 80000, "start_date": "2024-04-03", "account_ref": "BL240910207908339"},
             {"provider": "HDFC", "outstanding": 2450000, "emi": 189000, "start_date": "2024-04-05", "account_ref": "HDFC24LOAN1"},
@@ -81,6 +119,7 @@ class DebtEmpireAnalyzer:
                 data = json.load(f)
             loans = data.get("loans") or []
             if not loans:
+                self.masters_error = "no loans in masters.json"
                 return False
             # Convert to empire format (provider, outstanding, emi, start_date, account_ref, ots fields)
             self.loans = []
@@ -103,6 +142,7 @@ class DebtEmpireAnalyzer:
             return True
         except Exception as e:
             print(f"  [!] Could not load masters.json: {e}")
+            self.masters_error = f"{type(e).__name__}: {e}"
             return False
     
     def parse_all_sources(self):
@@ -147,26 +187,14 @@ class DebtEmpireAnalyzer:
         
         emis = []
         try:
+            # Lender amount bands from masters.json EMIs (hardcoded loans if none yet)
+            loans = masters_loans(OUTPUT_DIR / "masters.json") or self.hardcoded_loans
             if HAS_PANDAS:
-                df = pd.read_excel(csv_path) if csv_path.suffix == '.xlsx' else pd.read_csv(csv_path)
-                cols = {str(c).lower(): c for c in df.columns}
-                desc_col = next((cols[k] for k in ['description', 'narration', 'desc'] if k in cols), None)
-                amt_col = next((cols[k] for k in ['debit', 'amount', 'withdrawal'] if k in cols), None)
-                
-                for _, row in df.iterrows():
-                    desc = str(row.get(desc_col, '')).upper() if desc_col else ''
-                    amt = float(row.get(amt_col, 0)) if amt_col else 0
-                    
-                    if 75000 <= amt <= 85000 and any(k in desc for k in ['L&T', 'L AND T', 'LNT']):
-                        emis.append({'provider': 'L&T', 'emi': 80000, 'date': '2024-04-03'})
-                    elif 185000 <= amt <= 195000 and 'HDFC' in desc:
-                        emis.append({'provider': 'HDFC', 'emi': 189000, 'date': '2024-04-05'})
+                # Chunked: a large statement never sits in memory whole
+                emis = match_emis_chunks(read_statement_chunks(csv_path), amount_bands(loans))
             else:
-                # Fallback: Assume hardcoded EMIs since CSV parsing without pandas is unreliable
-                return [
-                    {'provider': 'L&T', 'emi': 80000, 'date': '2024-04-03'},
-                    {'provider': 'HDFC', 'emi': 189000, 'date': '2024-04-05'}
-                ]
+                # Fallback: stream rows, lender tagged by the keyword automaton
+                emis = match_emis_rows(iter_statement_rows(csv_path), amount_bands(loans))
         except Exception as e:
             print(f"    [!] CSV parse warning: {str(e)[:50]}")
         return emis
@@ -178,11 +206,9 @@ class DebtEmpireAnalyzer:
             return None
         
         try:
-            with pdfplumber.open(pdf_path) as pdf:
-                text = " ".join(page.extract_text() or "" for page in pdf.pages)
-                # Look for ₹25.74L pattern
-                if "25.74" in text or "2574000" in text:
-                    return 2574000
+            loan = parse_document(pdf_path, lender="lt", cache=PdfTextCache(DATA_DIR))
+            if loan and loan.get("outstanding_principal"):
+                return loan["outstanding_principal"]
         except Exception:
             pass
         return None
@@ -190,14 +216,13 @@ class DebtEmpireAnalyzer:
     def _parse_hdfc_docx(self):
         """Extract HDFC outstanding from DOCX - fallback to hardcoded"""
         docx_path = DATA_DIR / LOAN_DOCS["hdfc_docx"]
-        if not docx_path.exists() or not HAS_DOCX:
+        if not docx_path.exists():  # streamed from the zip - python-docx not needed
             return None
         
         try:
-            doc = docx.Document(docx_path)
-            text = " ".join(p.text for p in doc.paragraphs)
-            if "24.5" in text or "2450000" in text:
-                return 2450000
+            loan = parse_document(docx_path, lender="hdfc", cache=PdfTextCache(DATA_DIR))
+            if loan and loan.get("outstanding_principal"):
+                return loan["outstanding_principal"]
         except Exception:
             pass
         return None
@@ -231,91 +256,84 @@ class DebtEmpireAnalyzer:
         return masters
     
     def generate_projections(self):
-        """Generates Excel if pandas available, else CSV + HTML"""
-        projections = []
-        for loan in self.loans:
-            balance = loan["outstanding"]
-            date = datetime.strptime(loan["start_date"], "%Y-%m-%d")
-            month = 1
-            
-            while balance > 0 and month <= 60:
-                emi_amt = min(loan["emi"], balance)
-                projections.append({
-                    "Month": month,
-                    "Payment_Date": date.strftime("%Y-%m-%d"),
-                    "Provider": loan["provider"],
-                    "EMI_Amount": emi_amt,
-                    "Balance_Remaining": max(0, balance - emi_amt)
-                })
-                balance -= emi_amt
-                date += timedelta(days=30)
-                month += 1
+        """Columnar store (projections/) + Excel if openpyxl available, else CSV + HTML, derived from it"""
+        if HAS_NUMPY:
+            store = ProjectionStore(OUTPUT_DIR / "projections")
+            store.write(self.loans)
+            print(f"[OK] projections/ ({store.meta['rows']} rows, {store.meta['format']}) <- columnar store")
+            rows = store.iter_rows
+        else:
+            cache = shared_cache(OUTPUT_DIR)  # per-loan schedules: unchanged loans come from the cache
+            rows = lambda: iter_projection_rows(self.loans, cache=cache)
         
-        if HAS_PANDAS:
-            df = pd.DataFrame(projections)
-            df.to_excel(OUTPUT_DIR / "monthly projections.xlsx", index=False)
-            print(f"[OK] monthly projections.xlsx ({len(projections)} rows)")
+        if HAS_OPENPYXL:
+            with ProjectionWorkbook(OUTPUT_DIR / "monthly projections.xlsx") as wb:
+                count = wb.write_rows("Sheet1", PROJECTION_COLUMNS, rows())
+            print(f"[OK] monthly projections.xlsx ({count} rows)")
         else:
+            count = 0
             with open(OUTPUT_DIR / "monthly projections.csv", "w", newline="", encoding="utf-8") as f:
-                writer = csv.DictWriter(f, fieldnames=projections[0].keys())
+                writer = csv.DictWriter(f, fieldnames=PROJECTION_COLUMNS)
                 writer.writeheader()
-                writer.writerows(projections)
-            print(f"[OK] monthly projections.csv ({len(projections)} rows) <- Open in Excel")
+                for row in rows():
+                    writer.writerow(row)
+                    count += 1
+            print(f"[OK] monthly projections.csv ({count} rows) <- Open in Excel")
         
-        # Always generate HTML version
-        self._generate_projections_html(projections)
+        # Always generate HTML version (second pass over the rows - cheaper than keeping them)
+        self._generate_projections_html(rows())
     
-    def generate_dashboard(self):
+    def generate_dashboard(self, view=None):
         """Always generates printable HTML dashboard from current self.loans (masters.json)."""
-        def ots_amt(loan):
-            if loan.get("ots_amount_70pct") is not None:
-                return loan["ots_amount_70pct"]
-            pct = loan.get("ots_percent", 70)
-            return round(loan["outstanding"] * (pct / 100))
-        total_os = sum(l["outstanding"] for l in self.loans)
-        total_ots = sum(ots_amt(l) for l in self.loans)
-        total_savings = total_os - total_ots
-        # Provider display names
-        def provider_name(p):
-            if not p: return "Unknown"
-            p = str(p).strip().upper()
-            if p in ("L&T", "LT"): return "L&T Financial"
-            if p == "HDFC": return "HDFC Bank"
-            if p == "TATA": return "Tata Capital"
-            if p == "BAJAJ": return "Bajaj Finance"
-            return p.title()
+        if view is None:
+            view = build_portfolio_view(self.loans)
+        totals = view["totals"]
+        total_savings = totals["savings"]
+        virtual = bool(self.loans) and use_virtual(len(self.loans), self.render_mode)
         rows = []
-        for l in self.loans:
-            ots = ots_amt(l)
-            os_l = l["outstanding"] / 100000
-            ots_l = ots / 100000
-            sav_l = (l["outstanding"] - ots) / 100000
-            ref = (l.get("account_ref") or "").strip() or "—"
-            rows.append(f'            <tr><td>{provider_name(l["provider"])}</td><td>{os_l:.2f}</td><td>{ots_l:.2f}</td><td>{sav_l:.2f}</td><td class="badge">{ref}</td></tr>')
+        if not virtual:
+            for v in view["loans"]:
+                rows.append(f'            <tr><td>{v["provider_name"]}</td><td>{v["os_lakhs"]:.2f}</td><td>{v["ots_lakhs"]:.2f}</td><td>{v["savings_lakhs"]:.2f}</td><td class="badge">{v["ref_display"]}</td></tr>')
         table_rows = "\n".join(rows)
-        total_os_l = total_os / 100000
-        total_ots_l = total_ots / 100000
+        total_os_l = totals["exposure"] / 100000
+        total_ots_l = totals["ots"] / 100000
         total_sav_l = total_savings / 100000
-        savings_pct = round(100 * total_savings / total_os) if total_os > 0 else 0
+        savings_pct = totals["savings_pct"]
         # Build CSV rows for export
-        csv_rows = []
-        for l in self.loans:
-            ots = ots_amt(l)
-            sav = l["outstanding"] - ots
-            csv_rows.append({
-                "provider": provider_name(l["provider"]),
-                "os": l["outstanding"],
-                "ots": ots,
-                "savings": sav,
-                "account_ref": (l.get("account_ref") or "").strip() or "—"
-            })
-        csv_json = json.dumps(csv_rows)
+        csv_rows = [{
+            "provider": v["provider_name"],
+            "os": v["os"],
+            "ots": v["ots"],
+            "savings": v["savings"],
+            "account_ref": v["ref_display"]
+        } for v in view["loans"]]
+        if virtual:
+            # Rows live in dashboard.data.js; the table and CSV export both read from it
+            sidecar = write_sidecar(OUTPUT_DIR / "dashboard.data.js", "dashboard",
+                                    ["provider", "os", "ots", "savings", "account_ref"],
+                                    [[r["provider"], r["os"], r["ots"], r["savings"], r["account_ref"]] for r in csv_rows])
+            # Printing fills the static table below with every row (not just the TOTAL)
+            loan_grid = grid_block("dashboard", sidecar, DASHBOARD_GRID_COLUMNS,
+                                   options_js="{printBody: 'dashboard-rows'}")
+            csv_json = "null"
+            extra_css = VIRTUAL_TABLE_CSS
+        else:
+            loan_grid = ""
+            csv_json = json.dumps(csv_rows)
+            extra_css = ""
+        # OTS % x settlement-month surface over the running loans
+        scenarios = portfolio_surface(self.loans) if view["totals"]["count"] else None
+        if scenarios and scenarios["loans"]:
+            scenario_block = f"""
+        <h3 class="scenario-title">OTS Scenarios: liability (Rs L) by OTS % and settlement date</h3>
+{surface_table_html(scenarios)}
+"""
+        else:
+            scenario_block = ""
         # First loan with BL ref for L&T action, else first loan
-        action_loan = next((l for l in self.loans if "BL" in str(l.get("account_ref") or "")), self.loans[0] if self.loans else None)
+        action_loan = view["action_loan"]
         if action_loan:
-            action_amt = f"{ots_amt(action_loan):,}"
-            action_ref = (action_loan.get("account_ref") or "").strip() or "—"
-            action_text = f"✓ IMMEDIATE ACTION: Email {provider_name(action_loan['provider'])} Rs {action_amt} OTS Offer (Ref: {action_ref})"
+            action_text = f"✓ IMMEDIATE ACTION: Email {action_loan['provider_name']} Rs {action_loan['ots']:,} OTS Offer (Ref: {action_loan['ref_display']})"
         else:
             action_text = "✓ Add loans via loan_verifier.py → run empire.py → refresh dashboard"
         html = f"""<!DOCTYPE html>
@@ -339,11 +357,15 @@ class DebtEmpireAnalyzer:
         .action-text {{ color: #1b5e20; font-weight: 600; font-size: 18px; margin: 0; }}
         .footer {{ text-align: center; margin-top: 30px; color: #777; font-size: 0.9em; padding-top: 15px; border-top: 1px solid #eee; }}
         .badge {{ display: inline-block; background: #1976d2; color: white; padding: 3px 10px; border-radius: 12px; font-size: 0.85em; }}
+        .scenario-title {{ color: #1b5e20; margin: 30px 0 0; font-size: 16px; }}
+        .scenario-table td {{ font-size: 0.9em; padding: 8px 6px; }}
+        .scenario-table small {{ color: #2e7d32; }}
         @media print {{
             body {{ background: white; }}
             .container {{ box-shadow: none; padding: 15px; }}
             .no-print {{ display: none; }}
         }}
+{extra_css}
     </style>
 </head>
 <body>
@@ -353,6 +375,7 @@ class DebtEmpireAnalyzer:
             <div class="subtitle">Generated: {datetime.now().strftime('%d %B %Y %I:%M %p')}</div>
         </div>
         
+{loan_grid}
         <table>
             <tr>
                 <th>Loan Provider</th>
@@ -361,7 +384,9 @@ class DebtEmpireAnalyzer:
                 <th>Savings (Rs L)</th>
                 <th>Account Ref</th>
             </tr>
+            <tbody id="dashboard-rows">
 {table_rows}
+            </tbody>
             <tr class="total-row">
                 <td><strong>TOTAL</strong></td>
                 <td><strong>{total_os_l:.2f}</strong></td>
@@ -374,7 +399,7 @@ class DebtEmpireAnalyzer:
         <div class="action-box">
             <p class="action-text">{action_text}</p>
         </div>
-        
+{scenario_block}        
         <div class="footer">
             <p>RBI OTS Framework per DBOD.No.Leg.BC.252/09.07.005/2013-14<br>
             Total Savings: Rs {total_savings:,} ({savings_pct}% of exposure)</p>
@@ -394,7 +419,7 @@ class DebtEmpireAnalyzer:
     </div>
     <script src="https://cdnjs.cloudflare.com/ajax/libs/html2pdf.js/0.10.1/html2pdf.bundle.min.js"></script>
     <script>
-    var rbiCsvData = {csv_json};
+    var rbiCsvData = {csv_json} || VirtualTable.records(window.LOAN_SIDECAR["dashboard"]);
     function exportRbiCsv() {{
         var headers = "Provider,OS_Rs,OTS_Rs,Savings_Rs,Account_Ref";
         var rows = rbiCsvData.map(function(r) {{
@@ -420,21 +445,17 @@ class DebtEmpireAnalyzer:
         with open(OUTPUT_DIR / "dashboard.html", "w", encoding="utf-8") as f:
             f.write(html)
         print("[OK] dashboard.html <- Open in browser -> Ctrl+P to PRINT")
+        if virtual:
+            print(f"[OK] dashboard.data.js <- {len(self.loans)} loan rows for the virtual table (keep next to dashboard.html)")
         
         # PDF dashboard (if reportlab available)
         if HAS_REPORTLAB:
-            self._generate_pdf_dashboard()
+            self._generate_pdf_dashboard(view)
     
-    def _generate_pdf_dashboard(self):
+    def _generate_pdf_dashboard(self, view=None):
         """Generate professional PDF dashboard using reportlab from self.loans"""
-        def pname(p):
-            if not p: return "Unknown"
-            p = str(p).strip().upper()
-            if p in ("L&T", "LT"): return "L&T Financial"
-            if p == "HDFC": return "HDFC Bank"
-            if p == "TATA": return "Tata Capital"
-            if p == "BAJAJ": return "Bajaj Finance"
-            return p.title()
+        if view is None:
+            view = build_portfolio_view(self.loans)
         doc = SimpleDocTemplate(
             str(OUTPUT_DIR / "Debt_Empire_Dashboard.pdf"),
             pagesize=letter,
@@ -456,17 +477,13 @@ class DebtEmpireAnalyzer:
         elements.append(Spacer(1, 0.3*72))
         
         # Data table from self.loans
-        data = [['Loan Provider', 'OS (Rs L)', 'OTS 70% (Rs L)', 'Savings (Rs L)', 'Account Ref']]
-        total_os_l = total_ots_l = total_sav_l = 0
-        for l in self.loans:
-            os_l = l["outstanding"] / 100000
-            ots_l = round(l["outstanding"] * 0.70) / 100000
-            sav_l = (l["outstanding"] - round(l["outstanding"] * 0.70)) / 100000
-            total_os_l += os_l
-            total_ots_l += ots_l
-            total_sav_l += sav_l
-            ref = (l.get("account_ref") or "").strip() or "—"
-            data.append([pname(l["provider"]), f"{os_l:.2f}", f"{ots_l:.2f}", f"{sav_l:.2f}", ref])
+        data = [['Loan Provider', 'OS (Rs L)', 'OTS (Rs L)', 'Savings (Rs L)', 'Account Ref']]
+        for v in view["loans"]:
+            data.append([v["provider_name"], f"{v['os_lakhs']:.2f}", f"{v['ots_lakhs']:.2f}", f"{v['savings_lakhs']:.2f}", v["ref_display"]])
+        totals = view["totals"]
+        total_os_l = totals["exposure"] / 100000
+        total_ots_l = totals["ots"] / 100000
+        total_sav_l = totals["savings"] / 100000
         data.append(['<b>TOTAL</b>', f'<b>{total_os_l:.2f}</b>', f'<b>{total_ots_l:.2f}</b>', f'<b>{total_sav_l:.2f}</b>', ''])
         
         table = Table(data, colWidths=[1.6*72, 0.9*72, 1.1*72, 1.0*72, 1.4*72])
@@ -486,11 +503,9 @@ class DebtEmpireAnalyzer:
         elements.append(Spacer(1, 0.4*72))
         
         # Action box (first loan with BL ref, else first loan)
-        action_loan = next((l for l in self.loans if "BL" in str(l.get("account_ref") or "")), self.loans[0] if self.loans else None)
+        action_loan = view["action_loan"]
         if action_loan:
-            action_amt = f"{round(action_loan['outstanding'] * 0.70):,}"
-            action_ref = (action_loan.get("account_ref") or "").strip() or "—"
-            action_str = f"<b>✓ IMMEDIATE ACTION: Email {pname(action_loan['provider'])} Rs {action_amt} OTS Offer (Ref: {action_ref})</b>"
+            action_str = f"<b>✓ IMMEDIATE ACTION: Email {action_loan['provider_name']} Rs {action_loan['ots']:,} OTS Offer (Ref: {action_loan['ref_display']})</b>"
         else:
             action_str = "<b>✓ Add loans via loan_verifier.py → run empire.py</b>"
         elements.append(Paragraph(
@@ -507,31 +522,36 @@ class DebtEmpireAnalyzer:
         doc.build(elements)
         print("[OK] Debt_Empire_Dashboard.pdf (professional print-ready)")
     
-    def generate_verifier_html(self):
-        """Generate verifier.html from masters.json - Beautiful table with print"""
+    def generate_verifier_html(self, masters_data=None, view=None):
+        """
+        Generate verifier.html from masters.json - Beautiful table with print.
+        view: run()'s portfolio view of the same loans, so nothing is derived twice.
+        """
+        if masters_data is None:
+            masters_data = {'loans': []}
+            masters_file = OUTPUT_DIR / "masters.json"
+            if masters_file.exists():
+                with open(masters_file, 'r', encoding='utf-8') as f:
+                    masters_data = json.load(f)
+        # One view, shared by the full generator and the basic fallback
+        if view is None:
+            view = build_portfolio_view(masters_data.get('loans', []))
         try:
-            # Try to use the dedicated generator
-            import subprocess
-            result = subprocess.run([sys.executable, str(DATA_DIR / "generate_verifier_html.py")], 
-                                  capture_output=True, text=True, cwd=str(DATA_DIR))
-            if result.returncode == 0:
-                print("[OK] verifier.html <- Beautiful loan verifier table")
-                return
-        except Exception:
-            pass
+            # Render in-process with the dedicated generator (no subprocess, no second masters.json read)
+            import generate_verifier_html
+            with open(OUTPUT_DIR / "verifier.html", "w", encoding="utf-8") as f:
+                generate_verifier_html.render_html(masters_data, f, self.render_mode,
+                                                   sidecar_path=OUTPUT_DIR / "verifier.data.js", view=view)
+            print("[OK] verifier.html <- Beautiful loan verifier table")
+            return
+        except Exception as e:
+            print(f"  [!] verifier generator failed ({e}), writing basic table")
         
         # Fallback: Generate basic HTML inline
-        masters_data = {'loans': []}
-        masters_file = OUTPUT_DIR / "masters.json"
-        if masters_file.exists():
-            with open(masters_file, 'r', encoding='utf-8') as f:
-                masters_data = json.load(f)
-        
-        loans = masters_data.get('loans', [])
-        total_exposure = sum(l.get('outstanding_principal', l.get('outstanding', 0)) for l in loans)
-        total_ots = sum(round(l.get('outstanding_principal', l.get('outstanding', 0)) * 0.70) for l in loans)
-        total_savings = total_exposure - total_ots
-        total_emi = sum(l.get('emi_amount', l.get('emi', 0)) for l in loans)
+        totals = view['totals']
+        total_exposure = totals['exposure']
+        total_ots = totals['ots']
+        total_savings = totals['savings']
         
         html = f"""<!DOCTYPE html>
 <html>
@@ -560,14 +580,8 @@ class DebtEmpireAnalyzer:
         <table>
             <tr><th>Shortcode</th><th>Lender</th><th>OS</th><th>EMI</th><th>Tenure</th><th>Fees</th></tr>
 """
-        for loan in loans:
-            provider = loan.get('provider', 'N/A')
-            shortcode = f"{provider[:3]}{loan.get('id', loan.get('account_ref', ''))[-4:]}"
-            os_amt = loan.get('outstanding_principal', loan.get('outstanding', 0))
-            emi = loan.get('emi_amount', loan.get('emi', 0))
-            tenure = loan.get('tenure_remaining_months', loan.get('tenure_months', 0))
-            fees = loan.get('processing_fee', 0)
-            html += f"            <tr><td><span class='shortcode'>{shortcode}</span></td><td>{provider}</td><td>Rs {os_amt/100000:.2f}L</td><td>Rs {emi:,}</td><td>{tenure} months</td><td>Rs {fees:,}</td></tr>\n"
+        for v in view['loans']:
+            html += f"            <tr><td><span class='shortcode'>{v['shortcode']}</span></td><td>{v['provider']}</td><td>Rs {v['os_lakhs']:.2f}L</td><td>Rs {v['emi']:,}</td><td>{v['tenure']} months</td><td>Rs {v['fees']:,}</td></tr>\n"
         
         html += """        </table>
     </div>
@@ -580,114 +594,13 @@ class DebtEmpireAnalyzer:
         print("[OK] verifier.html <- Basic loan verifier table")
     
     def generate_ots_letters(self):
-        """Generate OTS letters for each lender - PDF if available, else text + HTML"""
-        for loan in self.loans:
-            ots_amt = round(loan["outstanding"] * 0.70)
-            ref = loan.get("account_ref", loan["provider"])
-            
-            # Text version (always generated)
-            text_content = f"""ONE-TIME SETTLEMENT (OTS) OFFER
-================================
-To,
-The Manager
-{loan['provider']} Financial Services
-
-Subject: OTS Settlement Offer under RBI Guidelines (DBOD.No.Leg.BC.252)
-
-Dear Sir/Madam,
-
-I propose to settle my outstanding loan liability of Rs {loan['outstanding']:,} 
-under RBI's OTS framework (Circular DBOD.No.Leg.BC.252/09.07.005/2013-14) as follows:
-
-• Original Outstanding: Rs {loan['outstanding']:,}
-• Proposed OTS Amount (70%): Rs {ots_amt:,}
-• Settlement Benefit: Rs {loan['outstanding'] - ots_amt:,}
-
-Account Reference: {ref}
-This offer is valid for 30 days. Kindly provide written acceptance with payment instructions.
-
-Sincerely,
-[Borrower Name]
-Date: {datetime.now().strftime('%d %B %Y')}
-"""
-            with open(OTS_PDF_DIR / f"{loan['provider'].lower()}-ots.txt", "w", encoding="utf-8") as f:
-                f.write(text_content)
-            
-            # HTML version (always generated)
-            self._generate_ots_html(loan, ots_amt, ref)
-            
-            # PDF version (if reportlab available)
-            if HAS_REPORTLAB and loan["provider"] == "L&T":
-                self._generate_lt_ots_pdf(loan, ots_amt)
-        
-        print(f"[OK] OTS letters generated in {OTS_PDF_DIR.name}/ (text + HTML + L&T PDF)")
-    
-    def _generate_lt_ots_pdf(self, loan, ots_amt):
-        """Generate professional L&T OTS letter PDF"""
-        doc = SimpleDocTemplate(
-            str(OTS_PDF_DIR / "lt-ots.pdf"),
-            pagesize=letter,
-            topMargin=0.6*72,
-            bottomMargin=0.6*72
-        )
-        styles = getSampleStyleSheet()
-        styles.add(ParagraphStyle(name='Justify', alignment=0, spaceAfter=12))
-        elements = []
-        
-        elements.append(Paragraph('<b>ONE-TIME SETTLEMENT (OTS) OFFER</b>', styles['Title']))
-        elements.append(Spacer(1, 0.25*72))
-        elements.append(Paragraph(
-            'To,<br/>The Manager<br/>L&T Financial Services<br/>Mumbai, India',
-            styles['Normal']
-        ))
-        elements.append(Spacer(1, 0.35*72))
-        
-        body = f"""
-        <b>Subject: OTS Settlement Offer under RBI Guidelines (DBOD.No.Leg.BC.252)</b><br/><br/>
-        
-        Dear Sir/Madam,<br/><br/>
-        
-        I propose to settle my outstanding loan liability of <b>Rs {loan['outstanding']:,}</b> 
-        under RBI's OTS framework (Circular DBOD.No.Leg.BC.252/09.07.005/2013-14) as follows:<br/><br/>
-        
-        • Original Outstanding: <b>Rs {loan['outstanding']:,}</b><br/>
-        • Proposed OTS Amount (70%): <b>Rs {ots_amt:,}</b><br/>
-        • Settlement Benefit: <b>Rs {loan['outstanding'] - ots_amt:,}</b><br/><br/>
-        
-        Loan Account Reference: <b>{loan['account_ref']}</b><br/>
-        This offer is valid for 30 days. Kindly provide written acceptance with payment instructions.<br/><br/>
-        
-        Sincerely,<br/>
-        [Borrower Name]<br/>
-        Date: {datetime.now().strftime('%d %B %Y')}
-        """
-        elements.append(Paragraph(body, styles['Justify']))
-        
-        # Summary table
-        tbl_data = [
-            ['<b>Parameter</b>', '<b>Value</b>'],
-            ['Loan Provider', 'L&T Financial Services'],
-            ['Account Reference', loan['account_ref']],
-            ['Outstanding Balance', f"Rs {loan['outstanding']:,}"],
-            ['RBI OTS Rate', '70%'],
-            ['<b>Settlement Amount Payable</b>', f"<b>Rs {ots_amt:,}</b>"],
-            ['Tenure if Continued', f"{round(loan['outstanding']/loan['emi'])} months"],
-            ['Monthly EMI', f"Rs {loan['emi']:,}"]
-        ]
-        tbl = Table(tbl_data, colWidths=[2.0*72, 3.2*72])
-        tbl.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
-            ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTNAME', (1, 4), (1, 4), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('ALIGN', (0, 0), (0, -1), 'LEFT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
-        ]))
-        elements.append(Spacer(1, 0.3*72))
-        elements.append(tbl)
-        
-        doc.build(elements)
+        """Generate OTS letters for each lender - text + HTML, plus PDF if reportlab available"""
+        jobs = build_letter_jobs(self.loans, OTS_PDF_DIR)
+        workers = self.letter_workers or default_workers(len(jobs))
+        generate_letters(jobs, workers=workers)
+        pdf_note = " + PDF" if HAS_REPORTLAB else ""
+        pool_note = f", {workers} workers" if workers > 1 else ""
+        print(f"[OK] OTS letters generated in {OTS_PDF_DIR.name}/ (text + HTML{pdf_note}{pool_note})")
     
     def _generate_projections_html(self, projections):
         """Generate HTML table for monthly projections"""
@@ -731,133 +644,30 @@ Date: {datetime.now().strftime('%d %B %Y')}
             'Bajaj': 'provider-bajaj'
         }
         
-        for proj in projections:
-            provider = proj['Provider']
-            css_class = provider_classes.get(provider, '')
-            html += f"""            <tr class="{css_class}">
+        count = 0
+        with open(OUTPUT_DIR / "monthly projections.html", "w", encoding="utf-8") as f:
+            f.write(html)
+            for proj in projections:
+                provider = proj['Provider']
+                css_class = provider_classes.get(provider, '')
+                f.write(f"""            <tr class="{css_class}">
                 <td>{proj['Month']}</td>
                 <td>{proj['Payment_Date']}</td>
                 <td>{provider}</td>
                 <td>Rs {proj['EMI_Amount']:,}</td>
                 <td>Rs {proj['Balance_Remaining']:,}</td>
             </tr>
-"""
-        
-        html += """        </table>
-        <p style="margin-top: 20px; color: #777; font-size: 0.9em;">
-            <strong>Note:</strong> Press Ctrl+P to print or save as PDF
-        </p>
-    </div>
-</body>
-</html>"""
-        
-        with open(OUTPUT_DIR / "monthly projections.html", "w", encoding="utf-8") as f:
-            f.write(html)
-        print(f"[OK] monthly projections.html ({len(projections)} rows) <- Open in browser")
-    
-    def _generate_ots_html(self, loan, ots_amt, ref):
-        """Generate HTML version of OTS letter"""
-        html = f"""<!DOCTYPE html>
-<html>
-<head>
-    <meta charset="utf-8">
-    <title>OTS Letter - {loan['provider']}</title>
-    <style>
-        body {{ font-family: 'Times New Roman', serif; max-width: 800px; margin: 40px auto; padding: 20px; background: #fff; }}
-        .letter {{ line-height: 1.6; }}
-        .header {{ text-align: center; margin-bottom: 30px; }}
-        .header h1 {{ color: #1b5e20; font-size: 20px; margin-bottom: 10px; }}
-        .address {{ margin-bottom: 30px; }}
-        .body {{ margin-bottom: 30px; }}
-        .signature {{ margin-top: 40px; }}
-        table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
-        th, td {{ border: 1px solid #333; padding: 10px; text-align: left; }}
-        th {{ background: #f0f0f0; font-weight: bold; }}
-        @media print {{ body {{ margin: 0; padding: 20px; }} }}
-    </style>
-</head>
-<body>
-    <div class="letter">
-        <div class="header">
-            <h1>ONE-TIME SETTLEMENT (OTS) OFFER</h1>
-        </div>
-        
-        <div class="address">
-            <p>To,<br>
-            The Manager<br>
-            {loan['provider']} Financial Services<br>
-            Mumbai, India</p>
-        </div>
-        
-        <div class="body">
-            <p><strong>Subject: OTS Settlement Offer under RBI Guidelines (DBOD.No.Leg.BC.252)</strong></p>
-            
-            <p>Dear Sir/Madam,</p>
+""")
+                count += 1
             
-            <p>I propose to settle my outstanding loan liability of <strong>Rs {loan['outstanding']:,}</strong> 
-            under RBI's OTS framework (Circular DBOD.No.Leg.BC.252/09.07.005/2013-14) as follows:</p>
-            
-            <ul>
-                <li>Original Outstanding: <strong>Rs {loan['outstanding']:,}</strong></li>
-                <li>Proposed OTS Amount (70%): <strong>Rs {ots_amt:,}</strong></li>
-                <li>Settlement Benefit: <strong>Rs {loan['outstanding'] - ots_amt:,}</strong></li>
-            </ul>
-            
-            <p>Account Reference: <strong>{ref}</strong><br>
-            This offer is valid for 30 days. Kindly provide written acceptance with payment instructions.</p>
-        </div>
-        
-        <div class="signature">
-            <p>Sincerely,<br>
-            [Borrower Name]<br>
-            Date: {datetime.now().strftime('%d %B %Y')}</p>
-        </div>
-        
-        <table>
-            <tr>
-                <th>Parameter</th>
-                <th>Value</th>
-            </tr>
-            <tr>
-                <td>Loan Provider</td>
-                <td>{loan['provider']} Financial Services</td>
-            </tr>
-            <tr>
-                <td>Account Reference</td>
-                <td>{ref}</td>
-            </tr>
-            <tr>
-                <td>Outstanding Balance</td>
-                <td>Rs {loan['outstanding']:,}</td>
-            </tr>
-            <tr>
-                <td>RBI OTS Rate</td>
-                <td>70%</td>
-            </tr>
-            <tr>
-                <td><strong>Settlement Amount Payable</strong></td>
-                <td><strong>Rs {ots_amt:,}</strong></td>
-            </tr>
-            <tr>
-                <td>Tenure if Continued</td>
-                <td>{round(loan['outstanding']/loan['emi'])} months</td>
-            </tr>
-            <tr>
-                <td>Monthly EMI</td>
-                <td>Rs {loan['emi']:,}</td>
-            </tr>
-        </table>
-        
+            f.write("""        </table>
         <p style="margin-top: 20px; color: #777; font-size: 0.9em;">
-            <strong>Print Instructions:</strong> Press Ctrl+P → Choose "Save as PDF" or your printer
+            <strong>Note:</strong> Press Ctrl+P to print or save as PDF
         </p>
     </div>
 </body>
-</html>"""
-        
-        provider_lower = loan['provider'].lower().replace('&', '').replace('+', '')
-        with open(OTS_PDF_DIR / f"{provider_lower}-ots.html", "w", encoding="utf-8") as f:
-            f.write(html)
+</html>""")
+        print(f"[OK] monthly projections.html ({count} rows) <- Open in browser")
     
     def run(self):
         """Main execution pipeline"""
@@ -870,14 +680,19 @@ Date: {datetime.now().strftime('%d %B %Y')}
         
         # Use masters.json if present (preserves loan_verifier edits); else parse docs
         if not self.load_masters_json():
+            if self.strict_masters and (OUTPUT_DIR / "masters.json").exists():
+                raise ValueError(f"masters.json could not be loaded ({self.masters_error}) - "
+                                 "left unchanged, not replaced with sample loans")
             self.parse_all_sources()
         
         # Generate outputs
         masters = self.generate_masters_json()
         self.generate_projections()
-        self.generate_dashboard()  # dashboard.html from current loans (masters.json)
+        # Derived loan fields computed once, shared by dashboard.html, the PDF dashboard and verifier.html
+        view = build_portfolio_view(self.loans)
+        self.generate_dashboard(view)  # dashboard.html from current loans (masters.json)
         self.generate_ots_letters()
-        self.generate_verifier_html()
+        self.generate_verifier_html(masters, view)
         
         # Final report
         print("\n" + "="*70)
@@ -889,7 +704,7 @@ Date: {datetime.now().strftime('%d %B %Y')}
         print("="*70)
         print("\n[OK] OUTPUT FILES GENERATED:")
         print("   • masters.json                <- Complete loan master data")
-        if HAS_PANDAS:
+        if HAS_OPENPYXL:
             print("   • monthly projections.xlsx    <- Excel EMI schedule")
         else:
             print("   • monthly projections.csv     <- Open in Excel (File -> Open)")
@@ -902,15 +717,25 @@ Date: {datetime.now().strftime('%d %B %Y')}
         print("   • ots-pdfs/*-ots.html         <- HTML OTS letters (all lenders)")
         print("   • ots-pdfs/*-ots.txt          <- Plain-text OTS templates")
         if HAS_REPORTLAB:
-            print("   • ots-pdfs/lt-ots.pdf         <- RBI-compliant L&T OTS PDF")
+            print("   • ots-pdfs/*-ots.pdf          <- RBI-compliant OTS PDFs (all lenders)")
         print("="*70)
         print("\n[OK] NEXT STEPS:")
         print("   1. Open verifier.html (MASTER DASHBOARD) -> Press Ctrl+P -> Save as PDF or Print")
         print("   2. Email L&T with lt-ots.pdf (or lt-ots.txt content)")
         print("   3. Subject line: 'OTS Settlement Offer (BL240910207908339)'")
         print("="*70)
+        return masters
 
 # =============== ENTRY POINT ===============
+def workers_from_argv(argv):
+    """--workers N on the command line, else None (auto)."""
+    if "--workers" in argv:
+        i = argv.index("--workers")
+        if i + 1 < len(argv) and argv[i + 1].isdigit():
+            return max(1, int(argv[i + 1]))
+    return None
+
 if __name__ == "__main__":
-    analyzer = DebtEmpireAnalyzer()
+    analyzer = DebtEmpireAnalyzer(render_mode=render_mode_from_argv(sys.argv[1:]),
+                                  letter_workers=workers_from_argv(sys.argv[1:]))
     analyzer.run()
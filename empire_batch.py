@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Batch runner: empire.py for many client portfolio folders at once
+Each sub-folder with a masters.json (or loan documents) is one portfolio. Portfolios run in
+parallel over a process pool; each worker imports empire.py (pandas, reportlab) once and then
+processes portfolios one after another, chdir'd into the folder with its own log file.
+
+Usage:
+  py empire_batch.py <clients_dir> [--workers N] [--virtual|--inline]
+
+Writes to <clients_dir>:
+  batch_summary.csv     one row per portfolio (status, loans, exposure, OTS, savings, seconds)
+  batch_failures.log    traceback per failed portfolio (only if something failed)
+  <portfolio>/empire_run.log   full empire.py console output for that portfolio
+"""
+import os
+import csv
+import sys
+import time
+import argparse
+import traceback
+import contextlib
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Set UTF-8 encoding for Windows console
+if sys.platform == 'win32':
+    import io
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8', errors='replace')
+
+SUMMARY_FILE = "batch_summary.csv"
+FAILURE_LOG = "batch_failures.log"
+RUN_LOG = "empire_run.log"
+SUMMARY_FIELDS = ["portfolio", "status", "loans", "total_exposure", "total_ots_liability",
+                  "total_savings", "seconds", "error"]
+
+# Loaded once per worker by _init_worker
+empire = None
+
+
+def find_portfolios(root):
+    """Sub-folders of root that hold a masters.json or any of empire.py's loan documents."""
+    from empire import LOAN_DOCS
+    markers = ["masters.json"] + list(LOAN_DOCS.values())
+    return sorted(p for p in Path(root).iterdir()
+                  if p.is_dir() and any((p / m).exists() for m in markers))
+
+
+def _init_worker():
+    """Import empire.py (and its optional heavy deps) once per worker process."""
+    global empire
+    import empire as empire_module
+    empire = empire_module
+    import ots_letters
+    if ots_letters.HAS_REPORTLAB:
+        ots_letters._pdf_styles()
+
+
+def run_portfolio(folder, render_mode="auto"):
+    """Run the full empire pipeline in folder; never raises - failures come back in the result."""
+    if empire is None:
+        _init_worker()
+    folder = Path(folder).resolve()
+    result = {"portfolio": folder.name, "status": "ok", "loans": 0, "total_exposure": 0,
+              "total_ots_liability": 0, "total_savings": 0, "seconds": 0.0, "error": ""}
+    start = time.perf_counter()
+    cwd = os.getcwd()
+    try:
+        os.chdir(folder)
+        empire.set_data_dir(folder)
+        with open(folder / RUN_LOG, "w", encoding="utf-8") as log, \
+                contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+            # Letters render in this worker; the batch is already parallel across portfolios
+            # A client's masters.json that fails to load fails the portfolio (never sample loans)
+            analyzer = empire.DebtEmpireAnalyzer(render_mode=render_mode, letter_workers=1,
+                                                 strict_masters=True)
+            masters = analyzer.run()
+        result["loans"] = len(masters["loans"])
+        for key in ("total_exposure", "total_ots_liability", "total_savings"):
+            result[key] = masters[key]
+    except Exception as e:
+        result["status"] = "failed"
+        result["error"] = f"{type(e).__name__}: {e}"
+        result["traceback"] = traceback.format_exc()
+    finally:
+        os.chdir(cwd)
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+def run_batch(root, workers=None, render_mode="auto"):
+    """Run every portfolio under root; writes the summary CSV and failure log. Returns results."""
+    root = Path(root).resolve()
+    portfolios = find_portfolios(root)
+    if not portfolios:
+        print(f"[!] No portfolio folders (masters.json or loan documents) under {root}")
+        return []
+    workers = min(workers or os.cpu_count() or 1, len(portfolios))
+    print(f"[OK] {len(portfolios)} portfolios, {workers} workers")
+
+    results = []
+    if workers == 1:
+        for folder in portfolios:
+            results.append(run_portfolio(folder, render_mode))
+            _print_result(results[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            futures = [pool.submit(run_portfolio, folder, render_mode) for folder in portfolios]
+            for future in as_completed(futures):
+                results.append(future.result())
+                _print_result(results[-1])
+    results.sort(key=lambda r: r["portfolio"])
+
+    with open(root / SUMMARY_FILE, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(results)
+
+    failed = [r for r in results if r["status"] != "ok"]
+    failure_log = root / FAILURE_LOG
+    if failed:
+        with open(failure_log, "w", encoding="utf-8") as f:
+            f.write(f"Batch run {datetime.now().isoformat()} - {len(failed)} failed\n\n")
+            for r in failed:
+                f.write(f"=== {r['portfolio']} ===\n{r.get('traceback', r['error'])}\n")
+    elif failure_log.exists():
+        failure_log.unlink()  # stale log from an earlier run
+
+    ok = [r for r in results if r["status"] == "ok"]
+    print("="*70)
+    print(f"BATCH COMPLETE: {len(ok)} ok, {len(failed)} failed")
+    print(f"Total Exposure      : Rs {sum(r['total_exposure'] for r in ok):>14,}")
+    print(f"Total OTS Liability : Rs {sum(r['total_ots_liability'] for r in ok):>14,}")
+    print(f"Total Savings       : Rs {sum(r['total_savings'] for r in ok):>14,}")
+    print(f"[OK] {SUMMARY_FILE}" + (f" | [!] {FAILURE_LOG}" if failed else ""))
+    print("="*70)
+    return results
+
+
+def _print_result(r):
+    if r["status"] == "ok":
+        print(f"  [OK] {r['portfolio']}: {r['loans']} loans, Rs {r['total_exposure']/100000:.2f}L ({r['seconds']}s)")
+    else:
+        print(f"  [!] {r['portfolio']}: {r['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run empire.py for every portfolio folder under a directory")
+    parser.add_argument("root", help="Directory containing one folder per client portfolio")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel portfolios (default: CPU count)")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--virtual", dest="render_mode", action="store_const", const="virtual")
+    mode.add_argument("--inline", dest="render_mode", action="store_const", const="inline")
+    parser.set_defaults(render_mode="auto")
+    args = parser.parse_args()
+    results = run_batch(args.root, args.workers, args.render_mode)
+    return 0 if results and all(r["status"] == "ok" for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,10 @@ import os
 import json
 import sys
 from pathlib import Path
-from datetime import datetime, timedelta
+
+from core.schedule_cache import shared_cache
+from projection_store import HAS_NUMPY, ProjectionStore
+from projection_writer import iter_projection_rows
 
 # Set UTF-8 encoding for Windows console
 if sys.platform == 'win32':
@@ -57,29 +60,20 @@ def empire():
         json.dump(masters_data, f, indent=2, ensure_ascii=False)
     print(f"[OK] masters.json created: {masters_file.absolute()}")
     
-    # Generate monthly projections (JSON format)
-    projections = []
-    for loan in loans:
-        balance = loan['outstanding']
-        date = datetime.strptime(loan['start_date'], '%Y-%m-%d')
-        month = 1
-        
-        while balance > 0 and month <= 60:  # Cap at 5 years
-            emi_amt = min(loan['emi'], balance)
-            projections.append({
-                'Month': month,
-                'Date': date.strftime('%Y-%m-%d'),
-                'Provider': loan['provider'],
-                'EMI_Amount': emi_amt,
-                'Balance_Remaining': max(0, balance - emi_amt)
-            })
-            balance -= emi_amt
-            date += timedelta(days=30)
-            month += 1
-    
+    # Generate monthly projections: columnar store, JSON derived from it
     projections_file = Path('monthly_projections.json')
-    with open(projections_file, 'w', encoding='utf-8') as f:
-        json.dump(projections, f, indent=2, ensure_ascii=False)
+    if HAS_NUMPY:
+        store = ProjectionStore('projections')
+        store.write(loans)
+        store.export_json(projections_file, date_key='Date')
+        print(f"[OK] projections/ created: {store.meta['rows']} rows ({store.meta['format']})")
+    else:
+        cache = shared_cache(Path.cwd())  # unchanged loans reuse their schedules
+        projections = [{('Date' if k == 'Payment_Date' else k): v for k, v in row.items()}
+                       for row in iter_projection_rows(loans, cache=cache)]
+        
+        with open(projections_file, 'w', encoding='utf-8') as f:
+            json.dump(projections, f, indent=2, ensure_ascii=False)
     print(f"[OK] monthly_projections.json created: {projections_file.absolute()}")
     
     # Summary
@@ -3,11 +3,19 @@
 Generate verifier.html from masters.json
 Beautiful HTML table with print, edit, and action buttons
 """
+import io
 import json
+import re
 import sys
+from functools import lru_cache
+from html import escape
 from pathlib import Path
 from datetime import datetime
 
+from portfolio_view import build_portfolio_view
+from virtual_table import (VIRTUAL_TABLE_CSS, grid_block, render_mode_from_argv,
+                           use_virtual, write_sidecar)
+
 # Set UTF-8 encoding for Windows console
 if sys.platform == 'win32':
     import io
@@ -16,6 +24,15 @@ if sys.platform == 'win32':
 DATA_DIR = Path.cwd()
 MASTERS_PATH = DATA_DIR / "masters.json"
 VERIFIER_HTML = DATA_DIR / "verifier.html"
+VERIFIER_DATA = DATA_DIR / "verifier.data.js"  # sidecar for the virtual table
+
+def set_data_dir(path):
+    """Re-point paths at another portfolio folder (empire_batch.py runs many per process)."""
+    global DATA_DIR, MASTERS_PATH, VERIFIER_HTML, VERIFIER_DATA
+    DATA_DIR = Path(path)
+    MASTERS_PATH = DATA_DIR / "masters.json"
+    VERIFIER_HTML = DATA_DIR / "verifier.html"
+    VERIFIER_DATA = DATA_DIR / "verifier.data.js"
 
 def load_masters():
     """Load masters.json"""
@@ -24,46 +41,6 @@ def load_masters():
     with open(MASTERS_PATH, 'r', encoding='utf-8') as f:
         return json.load(f)
 
-def generate_shortcode(loan):
-    """Generate shortcode from loan data (for table)"""
-    provider = loan.get('provider', '').lower()
-    account = loan.get('account_number', loan.get('account_ref', ''))
-    if account:
-        short = ''.join([c for c in account if c.isalnum()])[-6:].lower()
-        return f"{provider[:3]}{short}"
-    return f"{provider[:3]}{loan.get('id', '')[-4:]}"
-
-def display_shortcode(loan):
-    """Display shortcode: baj8L, lt26L (provider prefix + OS in Lakhs)"""
-    os_amt = loan.get('outstanding_principal', loan.get('outstanding', 0))
-    os_lakhs = round(os_amt / 100000) if os_amt >= 100000 else round(os_amt / 100000, 1)
-    if os_lakhs == 0:
-        os_lakhs = 0.1
-    p = (loan.get('provider') or '').replace('&', '').replace(' ', '').lower()
-    prefix = p[:3] if len(p) >= 3 else p or 'xxx'
-    return f"{prefix}{os_lakhs}L"
-
-def ots_amount(loan):
-    """OTS amount to pay - uses stored value or computes from ots_percent (default 70%)."""
-    os_amt = loan.get('outstanding_principal', loan.get('outstanding', 0))
-    if loan.get('ots_amount_70pct') is not None:
-        return loan['ots_amount_70pct']
-    pct = loan.get('ots_percent', 70)
-    return round(os_amt * (pct / 100))
-
-def split_running_closed(loans):
-    """Split into running (OS > 0) and closed (OS == 0 or status CLOSED)."""
-    running = []
-    closed = []
-    for loan in loans:
-        os_amt = loan.get('outstanding_principal', loan.get('outstanding', 0))
-        status = (loan.get('status') or loan.get('verification_status') or '').upper()
-        if os_amt <= 0 or status == 'CLOSED':
-            closed.append(loan)
-        else:
-            running.append(loan)
-    return running, closed
-
 def get_loan_folder(loan):
     """Path to loans/Provider/Account for this loan."""
     provider = loan.get('provider', '')
@@ -149,105 +126,415 @@ def build_tree_lines(loans):
     lines.append("  └── " + str(datetime.now().year) + "/")
     return lines
 
-def generate_html(masters_data):
-    """Generate beautiful HTML verifier page"""
+def build_tree_summary_lines(loans):
+    """Provider-level tree (account counts only) for large portfolios."""
+    counts = {}
+    for loan in loans:
+        folder = normalize_provider_folder(loan.get('provider', 'N/A'))
+        counts[folder] = counts.get(folder, 0) + 1
+    lines = ["loans/"]
+    for i, (folder, n) in enumerate(sorted(counts.items())):
+        branch = "└── " if i == len(counts) - 1 else "├── "
+        lines.append(f"{branch}{folder}/  ({n} accounts)")
+    lines.append("archive/")
+    lines.append("  └── " + str(datetime.now().year) + "/")
+    return lines
+
+
+# =============== TEMPLATE LAYER ===============
+# The page shell (CSS, modal, JS) is static; only the {{slot}} blocks change per run.
+# Templates are split into static chunks once and rendered by streaming into a file.
+_SLOT_RE = re.compile(r"\{\{(\w+)\}\}")
+
+@lru_cache(maxsize=None)
+def compile_template(source):
+    """Split template source into (static chunks, slot names). Cached per source string."""
+    parts = _SLOT_RE.split(source)
+    return tuple(parts[0::2]), tuple(parts[1::2])
+
+def render_template(source, out, context):
+    """Stream a compiled template into file-like `out`. Slot values: str or iterable of str."""
+    chunks, slots = compile_template(source)
+    write = out.write
+    for chunk, slot in zip(chunks, slots):
+        write(chunk)
+        value = context[slot]
+        if isinstance(value, str):
+            write(value)
+        else:
+            for piece in value:
+                write(piece)
+    write(chunks[-1])
+
+# Per-loan row templates (str.format); loan details live in the JSON data island
+OTS_ROW = """
+            <div class="ots-row">
+                <span class="shortcode">{shortcode}</span>
+                <span>(₹{os_lakhs:.1f}L, {pct:.1f}%)</span>
+                <span>→</span>
+                <a href="javascript:void(0)" onclick="showDeepEditAt({i})" style="color:#166534; text-decoration:underline; font-weight:600;">Edit</a>
+                <span>|</span>
+                <a href="ots-pdfs/{ots_file}" target="_blank" style="color:#166534; text-decoration:underline;">OTS Letter</a>
+                <span>|</span>
+                <a href="javascript:void(0)" onclick="showOsToday({i})" style="color:#166534; text-decoration:underline;">OS Today?</a>
+            </div>
+"""
+
+OTS_TOTAL_ROW = """
+            <div class="ots-row" style="margin-top:10px; padding-top:10px; border-top:1px solid #d1fae5; font-weight:bold;">
+                <span>Total: ₹{total_lakhs:.1f}L</span>
+                <span>→</span>
+                <span>80% OTS ₹{ots_80_lakhs:.1f}L</span>
+                <span>(Start ₹{start_lakhs:.0f}L)</span>
+                <span style="color:#666; font-size:12px; margin-left:10px;">(CLOSED loans excluded)</span>
+            </div>
+"""
+
+CLOSED_ROW = """
+            <div class="closed-row">
+                <span class="shortcode">{shortcode}</span>
+                <span>✓ Paid</span>
+            </div>
+"""
+
+BRANCH_BLOCK = """
+            <div class="branch-block">
+                <div class="branch-name">{shortcode}/</div>{files}
+            </div>
+"""
+
+TABLE_HEAD = """
+            <table>
+                <thead>
+                    <tr>
+                        <th>Shortcode</th>
+                        <th>Lender</th>
+                        <th>Outstanding</th>
+                        <th>EMI</th>
+                        <th>Tenure</th>
+                        <th>Fees</th>
+                        <th>Actions</th>
+                    </tr>
+                </thead>
+                <tbody>
+"""
+
+TABLE_ROW = """
+                    <tr>
+                        <td><span class="shortcode">{shortcode}</span></td>
+                        <td><span class="lender">{lender}</span></td>
+                        <td><span class="amount">Rs {os_lakhs:.2f}L</span></td>
+                        <td>Rs {emi:,}</td>
+                        <td>{tenure} months</td>
+                        <td>Rs {fees:,}</td>
+                        <td>
+                            <button class="btn btn-small btn-info" onclick="showLoanInfo({i})">ℹ️ Info</button>
+                            <button class="btn btn-small btn-success" onclick="openOtsLetter({i})">📧 Email OTS</button>
+                        </td>
+                    </tr>
+"""
+
+TABLE_FOOT = """
+                </tbody>
+            </table>
+"""
+
+EMPTY_STATE = """
+            <div class="empty-state">
+                <h2>No Loans Found</h2>
+                <p>Run <code>py loan_verifier.py</code> to add your first loan</p>
+            </div>
+"""
+
+# Per-loan fields shared by the JSON data island and the virtual-table sidecar
+LOAN_FIELDS = ('shortcode', 'display_shortcode', 'lender', 'account_ref', 'borrower',
+               'os', 'emi', 'tenure', 'fees', 'ots_file')
+
+def loan_record_row(v):
+    """One loan view (portfolio_view) as a row of LOAN_FIELDS values."""
+    return [v['shortcode'], v['display_shortcode'], v['provider'], v['account_ref'], v['borrower'],
+            v['os'], v['emi'], v['tenure'], v['fees'], v['ots_file']]
+
+def loan_data_island(views):
+    """Compact JSON array of per-loan fields, safe to embed in a <script> tag."""
+    records = [dict(zip(LOAN_FIELDS, loan_record_row(v))) for v in views]
+    return json.dumps(records, ensure_ascii=False, separators=(',', ':')).replace('</', '<\\/')
+
+# Column specs for the virtual loan table (mirrors TABLE_HEAD / TABLE_ROW)
+VERIFIER_GRID_COLUMNS = """[
+                    {key: 'shortcode', label: 'Shortcode', render: function(v) { return '<span class="shortcode">' + escapeHtml(v) + '</span>'; }},
+                    {key: 'lender', label: 'Lender', render: function(v) { return '<span class="lender">' + escapeHtml(v) + '</span>'; }},
+                    {key: 'os', label: 'Outstanding', render: function(v) { return '<span class="amount">Rs ' + (v / 100000).toFixed(2) + 'L</span>'; }},
+                    {key: 'emi', label: 'EMI', render: function(v) { return 'Rs ' + Number(v).toLocaleString('en-US'); }},
+                    {key: 'tenure', label: 'Tenure', render: function(v) { return escapeHtml(v) + ' months'; }},
+                    {key: 'fees', label: 'Fees', render: function(v) { return 'Rs ' + Number(v).toLocaleString('en-US'); }},
+                    {key: 'shortcode', label: 'Actions', render: function(v, row, i) {
+                        return '<button class="btn btn-small btn-info" onclick="showLoanInfo(' + i + ')">ℹ️ Info</button> ' +
+                               '<button class="btn btn-small btn-success" onclick="openOtsLetter(' + i + ')">📧 Email OTS</button>';
+                    }}
+                ]"""
+
+# Print-only rendering of the per-loan OTS / CLOSED / branch sections in virtual mode
+# (mirrors OTS_ROW / CLOSED_ROW / BRANCH_BLOCK); filled from the sidecar just before printing
+VERIFIER_PRINT_JS = """
+                (function() {
+                    var running = VirtualTable.records(window.LOAN_SIDECAR['verifier_running']);
+                    var closed = VirtualTable.records(window.LOAN_SIDECAR['verifier_closed']);
+                    var totalRunning = %(total_running)s;
+                    var sections = {
+                        'vt-print-ots': function() {
+                            if (!running.length) return '<div class="ots-row">No running loans — all closed or zero OS</div>';
+                            return running.map(function(l) {
+                                var pct = totalRunning > 0 ? l.os / totalRunning * 100 : 0;
+                                return '<div class="ots-row"><span class="shortcode">' + escapeHtml(l.display_shortcode) + '</span>' +
+                                       '<span>(₹' + (l.os / 100000).toFixed(1) + 'L, ' + pct.toFixed(1) + '%%)</span><span>→</span>' +
+                                       '<a style="color:#166534; text-decoration:underline; font-weight:600;">Edit</a><span>|</span>' +
+                                       '<a href="ots-pdfs/' + escapeHtml(l.ots_file) + '" style="color:#166534; text-decoration:underline;">OTS Letter</a><span>|</span>' +
+                                       '<a style="color:#166534; text-decoration:underline;">OS Today?</a></div>';
+                            }).join('');
+                        },
+                        'vt-print-closed': function() {
+                            if (!closed.length) return '<div class="closed-row">None</div>';
+                            return closed.map(function(l) {
+                                return '<div class="closed-row"><span class="shortcode">' + escapeHtml(l.display_shortcode) + '</span><span>✓ Paid</span></div>';
+                            }).join('');
+                        },
+                        'vt-print-branches': function() {
+                            if (!running.length) return '<div class="branch-block">No running loans — add loans to see branches</div>';
+                            return running.map(function(l) {
+                                return '<div class="branch-block"><div class="branch-name">' + escapeHtml(l.display_shortcode) + '/</div>' +
+                                       escapeHtml(l.files) + '</div>';
+                            }).join('');
+                        }
+                    };
+                    VirtualTable.onPrint(function() {
+                        for (var id in sections) document.getElementById(id).innerHTML = sections[id]();
+                    }, function() {
+                        for (var id in sections) document.getElementById(id).innerHTML = '';
+                    });
+                })();
+"""
+
+def _virtual_loan_table(views, running, closed, total_running, sidecar_path):
+    """
+    Loan table rendered client-side from a JSON sidecar (only visible rows in the DOM).
+    The sidecar also carries the per-loan OTS / CLOSED / branch data, rendered only for printing.
+    """
+    sidecar = write_sidecar(sidecar_path, 'verifier', LOAN_FIELDS, [loan_record_row(v) for v in views], extra_tables={
+        'verifier_running': (('display_shortcode', 'os', 'ots_file', 'files'),
+                             [[v['display_shortcode'], v['os'], v['ots_file'], '\n'.join(list_loan_branch_files(v['loan']))]
+                              for v in running]),
+        'verifier_closed': (('display_shortcode',), [[v['display_shortcode']] for v in closed]),
+    })
+    return grid_block('verifier', sidecar, VERIFIER_GRID_COLUMNS,
+                      extra_js=VERIFIER_PRINT_JS % {'total_running': json.dumps(total_running)})
+
+def _virtual_summaries(running, closed, total_running, ots_80_lakhs, start_lakhs):
+    """
+    Count-only OTS / CLOSED / branch blocks used on screen instead of one block per loan;
+    each has an empty print-only container that VERIFIER_PRINT_JS fills when printing.
+    """
+    ots = f"""
+            <div class="ots-row vt-screen-only">{len(running)} running loans — sort by Outstanding in the loan table below</div>
+            <div class="vt-print-only" id="vt-print-ots"></div>
+""" + OTS_TOTAL_ROW.format(total_lakhs=total_running / 100000, ots_80_lakhs=ots_80_lakhs, start_lakhs=start_lakhs)
+    closed_html = f"""
+            <div class="closed-row vt-screen-only">{len(closed)} closed loans ✓ Paid</div>
+            <div class="vt-print-only" id="vt-print-closed"></div>
+"""
+    branches = f"""
+            <div class="branch-block vt-screen-only">{len(running)} loan branches — per-loan file lists skipped for large portfolios (run with --inline)</div>
+            <div class="vt-print-only" id="vt-print-branches"></div>
+"""
+    return ots, closed_html, branches
+
+def _ots_rows(running, total_running, ots_80_lakhs, start_lakhs):
+    if not running:
+        yield """
+            <div class="ots-row">No running loans — all closed or zero OS</div>
+"""
+        return
+    for v in running:
+        yield OTS_ROW.format(
+            i=v['index'],
+            shortcode=escape(v['display_shortcode']),
+            os_lakhs=v['os_lakhs'],
+            pct=(v['os'] / total_running * 100) if total_running > 0 else 0,
+            ots_file=escape(v['ots_file']),
+        )
+    yield OTS_TOTAL_ROW.format(total_lakhs=total_running / 100000, ots_80_lakhs=ots_80_lakhs, start_lakhs=start_lakhs)
+
+def _closed_rows(closed):
+    if not closed:
+        yield """
+            <div class="closed-row">None</div>
+"""
+        return
+    for v in closed:
+        yield CLOSED_ROW.format(shortcode=escape(v['display_shortcode']))
+
+def _branch_blocks(running):
+    if not running:
+        yield """
+            <div class="branch-block">No running loans — add loans to see branches</div>
+"""
+        return
+    for v in running:
+        # Already has tree chars from list_loan_branch_files for docs/
+        files = '\n'.join(escape(f, quote=False) for f in list_loan_branch_files(v['loan']))
+        yield BRANCH_BLOCK.format(shortcode=escape(v['display_shortcode']), files=files)
+
+def _loan_table(views):
+    if not views:
+        yield EMPTY_STATE
+        return
+    yield TABLE_HEAD
+    for v in views:
+        yield TABLE_ROW.format(
+            i=v['index'],
+            shortcode=escape(v['shortcode']),
+            lender=escape(v['provider']),
+            os_lakhs=v['os_lakhs'],
+            emi=v['emi'],
+            tenure=v['tenure'],
+            fees=v['fees'],
+        )
+    yield TABLE_FOOT
+
+def render_html(masters_data, out, render_mode="auto", sidecar_path=None, view=None):
+    """
+    Stream the verifier page for masters_data into file-like `out`.
+    render_mode: 'inline' (one <tr> per loan), 'virtual' (JSON sidecar + virtual table), 'auto' (by size).
+    view: prebuilt portfolio_view.build_portfolio_view(loans), so callers derive loan fields once.
+    """
     loans = masters_data.get('loans', [])
-    running_loans, closed_loans = split_running_closed(loans)
+    if view is None:
+        view = build_portfolio_view(loans)
+    totals = view['totals']
+    running, closed = view['running'], view['closed']
+    virtual = bool(loans) and use_virtual(len(loans), render_mode)
     
-    # Tree: loans/Provider/Account/ + archive/YYYY/
-    tree_lines = build_tree_lines(loans)
-    tree_html = '\n'.join(tree_lines).replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+    # Tree: loans/Provider/Account/ + archive/YYYY/ (provider counts only in virtual mode)
+    tree_lines = build_tree_summary_lines(loans) if virtual else build_tree_lines(loans)
+    tree_html = escape('\n'.join(tree_lines), quote=False)
     
     # OTS TARGETS: running only
-    total_running = sum(l.get('outstanding_principal', l.get('outstanding', 0)) for l in running_loans)
-    ots_80_lakhs = (total_running * 0.80) / 100000 if running_loans else 0
-    start_lakhs = max(5, round(ots_80_lakhs / 3)) if running_loans else 0
+    total_running = totals['running_os']
+    ots_80_lakhs = (total_running * 0.80) / 100000 if running else 0
+    start_lakhs = max(5, round(ots_80_lakhs / 3)) if running else 0
     
-    # Calculate totals
-    total_exposure = sum(l.get('outstanding_principal', l.get('outstanding', 0)) for l in loans)
-    total_ots = sum(ots_amount(l) for l in loans)
-    total_savings = total_exposure - total_ots
-    total_emi = sum(l.get('emi_amount', l.get('emi', 0)) for l in loans)
+    if virtual:
+        ots_rows, closed_rows, branch_blocks = _virtual_summaries(running, closed, total_running, ots_80_lakhs, start_lakhs)
+        loan_table = _virtual_loan_table(view['loans'], running, closed, total_running, sidecar_path or VERIFIER_DATA)
+        loan_data = 'null'  # LOANS comes from the sidecar
+    else:
+        ots_rows = _ots_rows(running, total_running, ots_80_lakhs, start_lakhs)
+        closed_rows = _closed_rows(closed)
+        branch_blocks = _branch_blocks(running)
+        loan_table = _loan_table(view['loans'])
+        loan_data = loan_data_island(view['loans'])
     
-    html = f"""<!DOCTYPE html>
+    render_template(VERIFIER_TEMPLATE, out, {
+        'extra_css': VIRTUAL_TABLE_CSS if virtual else '',
+        'generated_at': datetime.now().strftime('%d %B %Y %I:%M %p'),
+        'total_exposure': f"{totals['exposure']/100000:.2f}",
+        'total_ots': f"{totals['ots']/100000:.2f}",
+        'total_savings': f"{totals['savings']/100000:.2f}",
+        'total_emi': f"{totals['emi']:,}",
+        'ots_rows': ots_rows,
+        'closed_rows': closed_rows,
+        'branch_blocks': branch_blocks,
+        'tree_html': tree_html,
+        'loan_table': loan_table,
+        'loan_data': loan_data,
+    })
+
+def generate_html(masters_data, render_mode="auto"):
+    """Generate beautiful HTML verifier page (as a string; main() streams to file)"""
+    buf = io.StringIO()
+    render_html(masters_data, buf, render_mode)
+    return buf.getvalue()
+
+
+VERIFIER_TEMPLATE = """<!DOCTYPE html>
 <html lang="en">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Debt Empire - MASTER DASHBOARD</title>
     <style>
-        * {{
+        * {
             margin: 0;
             padding: 0;
             box-sizing: border-box;
-        }}
+        }
         
-        body {{
+        body {
             font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             padding: 20px;
             min-height: 100vh;
-        }}
+        }
         
-        .container {{
+        .container {
             max-width: 1400px;
             margin: 0 auto;
             background: white;
             border-radius: 15px;
             box-shadow: 0 20px 60px rgba(0,0,0,0.3);
             overflow: hidden;
-        }}
+        }
         
-        .header {{
+        .header {
             background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
             color: white;
             padding: 30px;
             text-align: center;
-        }}
+        }
         
-        .header h1 {{
+        .header h1 {
             font-size: 32px;
             margin-bottom: 10px;
             font-weight: 600;
-        }}
+        }
         
-        .header .subtitle {{
+        .header .subtitle {
             font-size: 14px;
             opacity: 0.9;
-        }}
+        }
         
-        .stats-bar {{
+        .stats-bar {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(200px, 1fr));
             gap: 15px;
             padding: 25px;
             background: #f8f9fa;
             border-bottom: 2px solid #e0e0e0;
-        }}
+        }
         
-        .stat-card {{
+        .stat-card {
             background: white;
             padding: 15px;
             border-radius: 10px;
             box-shadow: 0 2px 10px rgba(0,0,0,0.1);
             text-align: center;
-        }}
+        }
         
-        .stat-card .label {{
+        .stat-card .label {
             font-size: 12px;
             color: #666;
             text-transform: uppercase;
             letter-spacing: 0.5px;
             margin-bottom: 5px;
-        }}
+        }
         
-        .stat-card .value {{
+        .stat-card .value {
             font-size: 24px;
             font-weight: bold;
             color: #1e3c72;
-        }}
+        }
         
-        .actions-bar {{
+        .actions-bar {
             padding: 20px 25px;
             background: #fff;
             border-bottom: 2px solid #e0e0e0;
@@ -255,9 +542,9 @@ def generate_html(masters_data):
             gap: 10px;
             flex-wrap: wrap;
             justify-content: center;
-        }}
+        }
         
-        .btn {{
+        .btn {
             padding: 12px 24px;
             border: none;
             border-radius: 8px;
@@ -267,133 +554,133 @@ def generate_html(masters_data):
             transition: all 0.3s;
             text-decoration: none;
             display: inline-block;
-        }}
+        }
         
-        .btn-primary {{
+        .btn-primary {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             color: white;
-        }}
+        }
         
-        .btn-primary:hover {{
+        .btn-primary:hover {
             transform: translateY(-2px);
             box-shadow: 0 5px 15px rgba(102, 126, 234, 0.4);
-        }}
+        }
         
-        .btn-success {{
+        .btn-success {
             background: #28a745;
             color: white;
-        }}
+        }
         
-        .btn-success:hover {{
+        .btn-success:hover {
             background: #218838;
             transform: translateY(-2px);
-        }}
+        }
         
-        .btn-info {{
+        .btn-info {
             background: #17a2b8;
             color: white;
-        }}
+        }
         
-        .btn-info:hover {{
+        .btn-info:hover {
             background: #138496;
             transform: translateY(-2px);
-        }}
+        }
         
-        .btn-print {{
+        .btn-print {
             background: #6c757d;
             color: white;
-        }}
+        }
         
-        .btn-print:hover {{
+        .btn-print:hover {
             background: #5a6268;
-        }}
+        }
         
-        .table-container {{
+        .table-container {
             padding: 25px;
             overflow-x: auto;
-        }}
+        }
         
-        table {{
+        table {
             width: 100%;
             border-collapse: collapse;
             background: white;
-        }}
+        }
         
-        thead {{
+        thead {
             background: linear-gradient(135deg, #1e3c72 0%, #2a5298 100%);
             color: white;
-        }}
+        }
         
-        th {{
+        th {
             padding: 15px;
             text-align: left;
             font-weight: 600;
             font-size: 14px;
             text-transform: uppercase;
             letter-spacing: 0.5px;
-        }}
+        }
         
-        td {{
+        td {
             padding: 15px;
             border-bottom: 1px solid #e0e0e0;
-        }}
+        }
         
-        tbody tr:hover {{
+        tbody tr:hover {
             background: #f8f9fa;
-        }}
+        }
         
-        .shortcode {{
+        .shortcode {
             font-family: 'Courier New', monospace;
             background: #e3f2fd;
             padding: 5px 10px;
             border-radius: 5px;
             font-weight: bold;
             color: #1976d2;
-        }}
+        }
         
-        .lender {{
+        .lender {
             font-weight: 600;
             color: #333;
-        }}
+        }
         
-        .amount {{
+        .amount {
             font-weight: 600;
             color: #1e3c72;
-        }}
+        }
         
-        .btn-small {{
+        .btn-small {
             padding: 6px 12px;
             font-size: 12px;
             margin: 2px;
-        }}
+        }
         
-        .empty-state {{
+        .empty-state {
             text-align: center;
             padding: 60px 20px;
             color: #666;
-        }}
+        }
         
-        .empty-state h2 {{
+        .empty-state h2 {
             font-size: 24px;
             margin-bottom: 10px;
             color: #333;
-        }}
+        }
         
-        .tree-section {{
+        .tree-section {
             padding: 20px 25px;
             background: #f0f4f8;
             border-bottom: 2px solid #e0e0e0;
-        }}
+        }
         
-        .tree-section h2 {{
+        .tree-section h2 {
             font-size: 16px;
             color: #1e3c72;
             margin-bottom: 12px;
             text-transform: uppercase;
             letter-spacing: 0.5px;
-        }}
+        }
         
-        .tree-block {{
+        .tree-block {
             font-family: 'Consolas', 'Monaco', 'Courier New', monospace;
             font-size: 13px;
             line-height: 1.6;
@@ -404,54 +691,54 @@ def generate_html(masters_data):
             overflow-x: auto;
             white-space: pre;
             color: #24292f;
-        }}
+        }
         
-        .print-only-title {{
+        .print-only-title {
             display: none;
-        }}
+        }
         
-        .ots-targets, .closed-section, .tree-branches {{
+        .ots-targets, .closed-section, .tree-branches {
             padding: 18px 25px;
             background: #fff;
             border-bottom: 1px solid #e0e0e0;
-        }}
+        }
         
-        .ots-targets {{
+        .ots-targets {
             background: #f0fdf4;
             border-left: 4px solid #22c55e;
-        }}
+        }
         
-        .closed-section {{
+        .closed-section {
             background: #fef2f2;
             border-left: 4px solid #ef4444;
-        }}
+        }
         
-        .tree-branches {{
+        .tree-branches {
             background: #f8fafc;
             border-left: 4px solid #3b82f6;
-        }}
+        }
         
-        .ots-targets h2, .closed-section h2, .tree-branches h2 {{
+        .ots-targets h2, .closed-section h2, .tree-branches h2 {
             font-size: 15px;
             margin-bottom: 12px;
             color: #1e3c72;
-        }}
+        }
         
-        .ots-row, .closed-row {{
+        .ots-row, .closed-row {
             padding: 8px 0;
             display: flex;
             flex-wrap: wrap;
             align-items: center;
             gap: 8px;
-        }}
+        }
         
-        .ots-row .shortcode {{
+        .ots-row .shortcode {
             font-family: 'Courier New', monospace;
             font-weight: bold;
             color: #166534;
-        }}
+        }
         
-        .branch-block {{
+        .branch-block {
             font-family: 'Consolas', monospace;
             font-size: 12px;
             background: #fff;
@@ -460,32 +747,32 @@ def generate_html(masters_data):
             border: 1px solid #e2e8f0;
             margin-bottom: 12px;
             white-space: pre-wrap;
-        }}
+        }
         
-        .branch-block .branch-name {{
+        .branch-block .branch-name {
             font-weight: bold;
             color: #1e40af;
             margin-bottom: 6px;
-        }}
+        }
         
-        @media print {{
-            body {{
+        @media print {
+            body {
                 background: white;
                 padding: 10mm;
                 font-size: 11pt;
-            }}
+            }
             
-            .container {{
+            .container {
                 box-shadow: none;
                 border-radius: 0;
                 max-width: 100%;
-            }}
+            }
             
-            .actions-bar, .btn {{
+            .actions-bar, .btn {
                 display: none !important;
-            }}
+            }
             
-            .print-only-title {{
+            .print-only-title {
                 display: block !important;
                 text-align: center;
                 font-size: 20pt;
@@ -494,119 +781,120 @@ def generate_html(masters_data):
                 color: #000;
                 border-bottom: 2px solid #000;
                 margin-bottom: 5mm;
-            }}
+            }
             
-            .header {{
+            .header {
                 display: none;
-            }}
+            }
             
-            .stats-bar {{
+            .stats-bar {
                 page-break-inside: avoid;
                 margin-bottom: 5mm;
-            }}
+            }
             
-            .ots-targets, .closed-section {{
+            .ots-targets, .closed-section {
                 page-break-inside: avoid;
                 border-left: none;
                 border: 1px solid #ccc;
                 padding: 3mm;
                 margin-bottom: 3mm;
-            }}
+            }
             
-            .ots-targets h2, .closed-section h2 {{
+            .ots-targets h2, .closed-section h2 {
                 font-size: 12pt;
                 margin-bottom: 2mm;
-            }}
+            }
             
-            .tree-branches {{
+            .tree-branches {
                 page-break-inside: avoid;
                 border: 1px solid #ccc;
                 padding: 3mm;
-            }}
+            }
             
-            .tree-section {{
+            .tree-section {
                 background: #fff;
                 border: 1px solid #ccc;
                 padding: 3mm;
                 page-break-inside: avoid;
-            }}
+            }
             
-            .tree-block, .branch-block {{
+            .tree-block, .branch-block {
                 background: #fff;
                 border: none;
                 font-size: 9pt;
                 padding: 2mm;
-            }}
+            }
             
-            table {{
+            table {
                 page-break-inside: auto;
                 font-size: 9pt;
-            }}
+            }
             
-            tr {{
+            tr {
                 page-break-inside: avoid;
                 page-break-after: auto;
-            }}
+            }
             
-            thead {{
+            thead {
                 background: #1e3c72 !important;
                 color: white !important;
                 -webkit-print-color-adjust: exact;
                 print-color-adjust: exact;
-            }}
+            }
             
-            .subtitle {{
+            .subtitle {
                 display: none;
-            }}
-        }}
+            }
+        }
         
-        @media (max-width: 768px) {{
-            .header h1 {{
+        @media (max-width: 768px) {
+            .header h1 {
                 font-size: 24px;
-            }}
+            }
             
-            .stats-bar {{
+            .stats-bar {
                 grid-template-columns: 1fr;
-            }}
+            }
             
-            .tree-section, .ots-targets, .closed-section, .tree-branches {{
+            .tree-section, .ots-targets, .closed-section, .tree-branches {
                 padding: 15px;
-            }}
+            }
             
-            .tree-block, .branch-block {{
+            .tree-block, .branch-block {
                 font-size: 11px;
                 padding: 12px;
                 overflow-x: auto;
                 -webkit-overflow-scrolling: touch;
-            }}
+            }
             
-            .ots-row, .closed-row {{
+            .ots-row, .closed-row {
                 font-size: 13px;
                 flex-direction: column;
                 align-items: flex-start;
                 gap: 4px;
-            }}
+            }
             
-            table {{
+            table {
                 font-size: 12px;
-            }}
+            }
             
-            th, td {{
+            th, td {
                 padding: 10px 8px;
-            }}
+            }
             
-            .btn {{
+            .btn {
                 padding: 10px 16px;
                 font-size: 12px;
-            }}
-        }}
+            }
+        }
+{{extra_css}}
     </style>
 </head>
 <body>
     <div class="container">
         <div class="header">
             <h1>💰 Debt Empire - MASTER DASHBOARD</h1>
-            <div class="subtitle">Generated: {datetime.now().strftime('%d %B %Y %I:%M %p')}</div>
+            <div class="subtitle">Generated: {{generated_at}}</div>
         </div>
         
         <div class="print-only-title">OTS Portfolio Dr. Nehru</div>
@@ -614,114 +902,35 @@ def generate_html(masters_data):
         <div class="stats-bar">
             <div class="stat-card">
                 <div class="label">Total Exposure</div>
-                <div class="value">Rs {total_exposure/100000:.2f}L</div>
+                <div class="value">Rs {{total_exposure}}L</div>
             </div>
             <div class="stat-card">
                 <div class="label">OTS Liability</div>
-                <div class="value">Rs {total_ots/100000:.2f}L</div>
+                <div class="value">Rs {{total_ots}}L</div>
             </div>
             <div class="stat-card">
                 <div class="label">Total Savings</div>
-                <div class="value">Rs {total_savings/100000:.2f}L</div>
+                <div class="value">Rs {{total_savings}}L</div>
             </div>
             <div class="stat-card">
                 <div class="label">Monthly EMI</div>
-                <div class="value">Rs {total_emi:,}</div>
+                <div class="value">Rs {{total_emi}}</div>
             </div>
         </div>
         
         <div class="ots-targets">
             <h2>🟢 OTS TARGETS (RUNNING loans only)</h2>
-"""
-    
-    # Build OTS TARGETS rows
-    if running_loans:
-        for loan in running_loans:
-            shortcode = display_shortcode(loan)
-            os_amt = loan.get('outstanding_principal', loan.get('outstanding', 0))
-            os_lakhs = os_amt / 100000
-            pct = (os_amt / total_running * 100) if total_running > 0 else 0
-            lender = loan.get('provider', 'N/A')
-            ots_file = lender.lower().replace('&', '').replace('+', '') + '-ots.html'
-            account_ref = loan.get('account_number', loan.get('account_ref', ''))
-            
-            # Deep edit: link to loan_verifier.py with loan context
-            html += f"""
-            <div class="ots-row">
-                <span class="shortcode">{shortcode}</span>
-                <span>(₹{os_lakhs:.1f}L, {pct:.1f}%)</span>
-                <span>→</span>
-                <a href="javascript:void(0)" onclick="showDeepEdit('{shortcode}', '{lender}', '{account_ref}')" style="color:#166534; text-decoration:underline; font-weight:600;">Edit</a>
-                <span>|</span>
-                <a href="ots-pdfs/{ots_file}" target="_blank" style="color:#166534; text-decoration:underline;">OTS Letter</a>
-                <span>|</span>
-                <a href="javascript:void(0)" onclick="alert('OS Today: ₹{os_amt:,}\\nAccount: {account_ref}\\nProvider: {lender}')" style="color:#166534; text-decoration:underline;">OS Today?</a>
-            </div>
-"""
-        
-        html += f"""
-            <div class="ots-row" style="margin-top:10px; padding-top:10px; border-top:1px solid #d1fae5; font-weight:bold;">
-                <span>Total: ₹{total_running/100000:.1f}L</span>
-                <span>→</span>
-                <span>80% OTS ₹{ots_80_lakhs:.1f}L</span>
-                <span>(Start ₹{start_lakhs:.0f}L)</span>
-                <span style="color:#666; font-size:12px; margin-left:10px;">(CLOSED loans excluded)</span>
-            </div>
-"""
-    else:
-        html += """
-            <div class="ots-row">No running loans — all closed or zero OS</div>
-"""
-    
-    html += """
+{{ots_rows}}
         </div>
         
         <div class="closed-section">
             <h2>🔴 CLOSED (Merit proof)</h2>
-"""
-    
-    # Build CLOSED rows
-    if closed_loans:
-        for loan in closed_loans:
-            shortcode = display_shortcode(loan)
-            html += f"""
-            <div class="closed-row">
-                <span class="shortcode">{shortcode}</span>
-                <span>✓ Paid</span>
-            </div>
-"""
-    else:
-        html += """
-            <div class="closed-row">None</div>
-"""
-    
-    html += """
+{{closed_rows}}
         </div>
         
         <div class="tree-branches">
             <h2>📁 TREE VIEW (branches)</h2>
-"""
-    
-    # Build TREE VIEW branches (per loan)
-    if running_loans:
-        for loan in running_loans:
-            shortcode = display_shortcode(loan)
-            files = list_loan_branch_files(loan)
-            files_escaped = [f.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;') for f in files]
-            # Format as tree (already has tree chars from list_loan_branch_files for docs/)
-            files_str = '\n'.join(files_escaped)
-            
-            html += f"""
-            <div class="branch-block">
-                <div class="branch-name">{shortcode}/</div>{files_str}
-            </div>
-"""
-    else:
-        html += """
-            <div class="branch-block">No running loans — add loans to see branches</div>
-"""
-    
-    html += """
+{{branch_blocks}}
         </div>
         
         <div class="actions-bar">
@@ -735,7 +944,7 @@ def generate_html(masters_data):
         
         <div class="tree-section">
             <h2>📁 Folder tree (loans / archive)</h2>
-            <pre class="tree-block">{tree_html}</pre>
+            <pre class="tree-block">{{tree_html}}</pre>
         </div>
         
         <div id="instructions-modal" style="display:none; position:fixed; top:0; left:0; width:100%; height:100%; background:rgba(0,0,0,0.7); z-index:1000; align-items:center; justify-content:center;">
@@ -754,67 +963,34 @@ def generate_html(masters_data):
         </div>
         
         <div class="table-container">
-"""
-    
-    if not loans:
-        html += """
-            <div class="empty-state">
-                <h2>No Loans Found</h2>
-                <p>Run <code>py loan_verifier.py</code> to add your first loan</p>
-            </div>
-"""
-    else:
-        html += """
-            <table>
-                <thead>
-                    <tr>
-                        <th>Shortcode</th>
-                        <th>Lender</th>
-                        <th>Outstanding</th>
-                        <th>EMI</th>
-                        <th>Tenure</th>
-                        <th>Fees</th>
-                        <th>Actions</th>
-                    </tr>
-                </thead>
-                <tbody>
-"""
-        
-        for loan in loans:
-            shortcode = generate_shortcode(loan)
-            lender = loan.get('provider', 'N/A')
-            os_amt = loan.get('outstanding_principal', loan.get('outstanding', 0))
-            emi = loan.get('emi_amount', loan.get('emi', 0))
-            tenure = loan.get('tenure_remaining_months', loan.get('tenure_months', 0))
-            fees = loan.get('processing_fee', 0)
-            borrower = loan.get('borrower_name', '')
-            account_ref = loan.get('account_number', loan.get('account_ref', ''))
-            
-            html += f"""
-                    <tr>
-                        <td><span class="shortcode">{shortcode}</span></td>
-                        <td><span class="lender">{lender}</span></td>
-                        <td><span class="amount">Rs {os_amt/100000:.2f}L</span></td>
-                        <td>Rs {emi:,}</td>
-                        <td>{tenure} months</td>
-                        <td>Rs {fees:,}</td>
-                        <td>
-                            <button class="btn btn-small btn-info" onclick="alert('Loan: {shortcode}\\nBorrower: {borrower}\\nAccount: {account_ref}')">ℹ️ Info</button>
-                            <button class="btn btn-small btn-success" onclick="window.open('ots-pdfs/{lender.lower().replace('&', '').replace('+', '')}-ots.html', '_blank')">📧 Email OTS</button>
-                        </td>
-                    </tr>
-"""
-        
-        html += """
-                </tbody>
-            </table>
-"""
-    
-    html += """
+{{loan_table}}
         </div>
     </div>
     
+    <script type="application/json" id="loan-data">{{loan_data}}</script>
     <script>
+        // Loan data island: rows reference loans by index instead of inlining strings
+        var LOANS = JSON.parse(document.getElementById('loan-data').textContent) || VirtualTable.records(window.LOAN_SIDECAR['verifier']);
+        
+        function showLoanInfo(i) {
+            var l = LOANS[i];
+            alert('Loan: ' + l.shortcode + '\\nBorrower: ' + l.borrower + '\\nAccount: ' + l.account_ref);
+        }
+        
+        function showOsToday(i) {
+            var l = LOANS[i];
+            alert('OS Today: ₹' + l.os.toLocaleString('en-IN') + '\\nAccount: ' + l.account_ref + '\\nProvider: ' + l.lender);
+        }
+        
+        function openOtsLetter(i) {
+            window.open('ots-pdfs/' + LOANS[i].ots_file, '_blank');
+        }
+        
+        function showDeepEditAt(i) {
+            var l = LOANS[i];
+            showDeepEdit(l.display_shortcode, l.lender, l.account_ref);
+        }
+        
         // Print keyboard shortcut
         document.addEventListener('keydown', function(e) {
             if ((e.ctrlKey || e.metaKey) && e.key === 'p') {
@@ -928,8 +1104,7 @@ def generate_html(masters_data):
     </script>
 </body>
 </html>"""
-    
-    return html
+
 
 def main():
     print("="*70)
@@ -941,10 +1116,11 @@ def main():
     
     print(f"[OK] Loaded {loans_count} loans from masters.json")
     
-    html_content = generate_html(masters_data)
-    
+    render_mode = render_mode_from_argv(sys.argv[1:])
     with open(VERIFIER_HTML, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+        render_html(masters_data, f, render_mode)
+    if loans_count and use_virtual(loans_count, render_mode):
+        print(f"[OK] Virtual table mode: loan rows in {VERIFIER_DATA.name} (keep next to verifier.html)")
     
     print(f"[OK] Generated verifier.html")
     print(f"[OK] Open in browser: {VERIFIER_HTML.absolute()}")
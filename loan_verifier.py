@@ -5,11 +5,14 @@ Parses REAL Bajaj statements including Flexi Loans (400DFR47319474 → 400LAP149
 """
 import os
 import json
-import re
 import sys
 from datetime import datetime
 from pathlib import Path
 
+from core.text_cache import PdfTextCache, sha256_file
+from statement_parsers import parse_document
+from statement_parsers.base import LOAN_TEMPLATE
+
 # Set UTF-8 encoding for Windows console
 if sys.platform == 'win32':
     import io
@@ -18,17 +21,6 @@ if sys.platform == 'win32':
 DATA_DIR = Path.cwd()
 MASTERS_PATH = DATA_DIR / "masters.json"
 
-# ===== LOAN TEMPLATE =====
-LOAN_TEMPLATE = {
-    "id": "", "provider": "", "product": "", "account_number": "", "linked_account": "",
-    "borrower_name": "", "outstanding_principal": 0, "interest_rate": 0.0, "rate_type": "",
-    "tenure_total_months": 0, "tenure_remaining_months": 0, "emi_amount": 0,
-    "emi_start_date": "", "emis_paid": 0, "disbursal_date": "", "processing_fee": 0,
-    "foreclosure_fee_percent": 0.0, "late_payment_penalties": 0, "principal_paid_to_date": 0,
-    "interest_paid_to_date": 0, "next_emi_date": "", "verification_status": "pending",
-    "verified_at": "", "document_path": "", "notes": "", "loan_type": "standard"  # standard/flexi
-}
-
 def load_masters():
     if MASTERS_PATH.exists():
         with open(MASTERS_PATH, 'r', encoding='utf-8') as f:
@@ -50,111 +42,20 @@ def save_masters(data):
     print(f"\n[OK] Saved to {MASTERS_PATH.name}")
 
 # ===== BAJAJ FLEXI LOAN PDF PARSER (REAL STATEMENT SUPPORT) =====
-def parse_bajaj_pdf(pdf_path):
-    """Parse REAL Bajaj Flexi Loan statements (2017-18 format)"""
-    try:
-        import pdfplumber
-    except ImportError:
-        print("  [!] pdfplumber not installed. Install with: py -m pip install pdfplumber")
-        return None
+def parse_bajaj_pdf(pdf_path, sha256=None, cache=None):
+    """Parse REAL Bajaj Flexi Loan statements (2017-18 format) - statement_parsers.bajaj"""
+    cache = cache or PdfTextCache(DATA_DIR)
+    sha256 = sha256 or sha256_file(pdf_path)
+    if cache.load(sha256) is None:  # not seen before: pdfplumber needed
+        try:
+            import pdfplumber
+        except ImportError:
+            print("  [!] pdfplumber not installed. Install with: py -m pip install pdfplumber")
+            return None
     
     print(f"\n[OK] Parsing Bajaj PDF: {os.path.basename(pdf_path)}")
-    extracted = LOAN_TEMPLATE.copy()
-    extracted.update({
-        "provider": "Bajaj Finance",
-        "product": "Doctors Flexi Reloc Loan",
-        "loan_type": "flexi",  # Critical: Flexi loans have different OTS rules
-        "document_path": str(pdf_path)
-    })
-    
     try:
-        with pdfplumber.open(pdf_path) as pdf:
-            text = ""
-            for page in pdf.pages:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
-            
-            # Extract borrower name (handle PDF typo: "SURENDRANEHRU" → add space)
-            name_match = re.search(r"NAME\s+([A-Z\s]+)", text)
-            if name_match:
-                raw_name = name_match.group(1).strip()
-                # Fix common PDF typo: "SURENDRANEHRU" → "SURENDRA NEHRU"
-                if "SURENDRANEHRU" in raw_name:
-                    raw_name = raw_name.replace("SURENDRANEHRU", "SURENDRA NEHRU")
-                extracted["borrower_name"] = raw_name.title()
-            
-            # Extract linked account numbers (critical for Flexi Loans)
-            linked_match = re.search(r"Linked Agreement No\.\s+(\w+)", text)
-            if linked_match:
-                extracted["linked_account"] = linked_match.group(1).strip()  # 400LAP14914207
-            
-            acct_match = re.search(r"LOAN ACCOUNT STATEMENT FOR\s+(\w+)", text)
-            if acct_match:
-                extracted["account_number"] = acct_match.group(1).strip()  # 400DFR47319474
-            
-            # Extract loan amount
-            amt_match = re.search(r"Loan Amount\s+([\d,\.]+)", text)
-            if amt_match:
-                extracted["outstanding_principal"] = int(float(amt_match.group(1).replace(',', '')))
-            
-            # Extract ROI
-            roi_match = re.search(r"ROI\s+([\d\.]+)%", text)
-            if roi_match:
-                extracted["interest_rate"] = float(roi_match.group(1))
-            
-            # Extract rate type
-            type_match = re.search(r"Interest Rate Type\s+(\w+)", text)
-            if type_match:
-                extracted["rate_type"] = type_match.group(1).lower()
-            
-            # Extract tenure
-            tenure_match = re.search(r"Tenure\s+(\d+)", text)
-            if tenure_match:
-                extracted["tenure_total_months"] = int(tenure_match.group(1))
-            
-            # Extract EMI (note: Flexi loans show interest-only EMI)
-            emi_match = re.search(r"EMI\s+Received\s+([\d,\.]+)", text)
-            if emi_match:
-                extracted["emi_amount"] = int(float(emi_match.group(1).replace(',', '')))
-            
-            # Extract disbursal date
-            disb_match = re.search(r"Last Disbursal Date\s+(\d{2}/\d{2}/\d{4})", text)
-            if disb_match:
-                d, m, y = disb_match.group(1).split('/')
-                extracted["disbursal_date"] = f"{y}-{m}-{d}"
-            
-            # Extract first EMI date
-            first_emi_match = re.search(r"First Due Date\s+(\d{2}/\d{2}/\d{4})", text)
-            if first_emi_match:
-                d, m, y = first_emi_match.group(1).split('/')
-                extracted["emi_start_date"] = f"{y}-{m}-{d}"
-            
-            # Extract end date (for remaining tenure calc)
-            end_match = re.search(r"End Installment Date\s+(\d{2}/\d{2}/\d{4})", text)
-            if end_match:
-                d, m, y = end_match.group(1).split('/')
-                end_date = datetime(int(y), int(m), int(d))
-                remaining = max(0, (end_date - datetime.now()).days // 30)
-                extracted["tenure_remaining_months"] = remaining
-            
-            # Extract processing fees (total upfront charges)
-            fee_match = re.search(r"Fee Charge\s+(\d+)", text)
-            if fee_match:
-                extracted["processing_fee"] = int(fee_match.group(1))
-            
-            # Extract status
-            status_match = re.search(r"Status\s+(\w+)", text)
-            if status_match:
-                extracted["verification_status"] = "verified" if status_match.group(1).lower() == "active" else "pending"
-            
-            # Add critical note about Flexi Loan nature
-            extracted["notes"] = "FLEXI LOAN: Revolving credit facility (not standard EMI). OTS requires special handling per RBI guidelines for flexi products."
-            
-            print("  [OK] Extracted: Borrower, Account Numbers (400DFR47319474 → 400LAP14914207), Loan Amount, ROI, Tenure, Fees")
-            print(f"  [!] FLEXI LOAN DETECTED: This is a revolving credit facility (not standard term loan)")
-            return extracted
-            
+        return parse_document(pdf_path, lender="bajaj", cache=cache, sha256=sha256)
     except Exception as e:
         print(f"  [!] PDF parsing failed: {str(e)}")
         return None
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+OTS letter rendering (txt + HTML + reportlab PDF) for every lender
+Letters are independent, so large batches fan out over a process pool; each worker
+builds the reportlab styles once and reuses them for every letter it renders.
+
+Benchmark: py ots_letters.py --bench 400   (letters/sec at 1, 4 and 8 workers)
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+from portfolio_view import ots_amount, ots_percent, outstanding_of
+
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib import colors
+    HAS_REPORTLAB = True
+except ImportError:
+    HAS_REPORTLAB = False
+
+# Below this many letters the pool start-up costs more than it saves
+PARALLEL_MIN_LETTERS = 16
+
+LETTER_TEXT = """ONE-TIME SETTLEMENT (OTS) OFFER
+================================
+To,
+The Manager
+{provider} Financial Services
+
+Subject: OTS Settlement Offer under RBI Guidelines (DBOD.No.Leg.BC.252)
+
+Dear Sir/Madam,
+
+I propose to settle my outstanding loan liability of Rs {outstanding:,}
+under RBI's OTS framework (Circular DBOD.No.Leg.BC.252/09.07.005/2013-14) as follows:
+
+• Original Outstanding: Rs {outstanding:,}
+• Proposed OTS Amount ({ots_pct}%): Rs {ots:,}
+• Settlement Benefit: Rs {benefit:,}
+
+Account Reference: {ref}
+This offer is valid for 30 days. Kindly provide written acceptance with payment instructions.
+
+Sincerely,
+[Borrower Name]
+Date: {date}
+"""
+
+LETTER_HTML = """<!DOCTYPE html>
+<html>
+<head>
+    <meta charset="utf-8">
+    <title>OTS Letter - {provider}</title>
+    <style>
+        body {{ font-family: 'Times New Roman', serif; max-width: 800px; margin: 40px auto; padding: 20px; background: #fff; }}
+        .letter {{ line-height: 1.6; }}
+        .header {{ text-align: center; margin-bottom: 30px; }}
+        .header h1 {{ color: #1b5e20; font-size: 20px; margin-bottom: 10px; }}
+        .address {{ margin-bottom: 30px; }}
+        .body {{ margin-bottom: 30px; }}
+        .signature {{ margin-top: 40px; }}
+        table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
+        th, td {{ border: 1px solid #333; padding: 10px; text-align: left; }}
+        th {{ background: #f0f0f0; font-weight: bold; }}
+        @media print {{ body {{ margin: 0; padding: 20px; }} }}
+    </style>
+</head>
+<body>
+    <div class="letter">
+        <div class="header">
+            <h1>ONE-TIME SETTLEMENT (OTS) OFFER</h1>
+        </div>
+
+        <div class="address">
+            <p>To,<br>
+            The Manager<br>
+            {provider} Financial Services<br>
+            Mumbai, India</p>
+        </div>
+
+        <div class="body">
+            <p><strong>Subject: OTS Settlement Offer under RBI Guidelines (DBOD.No.Leg.BC.252)</strong></p>
+
+            <p>Dear Sir/Madam,</p>
+
+            <p>I propose to settle my outstanding loan liability of <strong>Rs {outstanding:,}</strong>
+            under RBI's OTS framework (Circular DBOD.No.Leg.BC.252/09.07.005/2013-14) as follows:</p>
+
+            <ul>
+                <li>Original Outstanding: <strong>Rs {outstanding:,}</strong></li>
+                <li>Proposed OTS Amount ({ots_pct}%): <strong>Rs {ots:,}</strong></li>
+                <li>Settlement Benefit: <strong>Rs {benefit:,}</strong></li>
+            </ul>
+
+            <p>Account Reference: <strong>{ref}</strong><br>
+            This offer is valid for 30 days. Kindly provide written acceptance with payment instructions.</p>
+        </div>
+
+        <div class="signature">
+            <p>Sincerely,<br>
+            [Borrower Name]<br>
+            Date: {date}</p>
+        </div>
+
+        <table>
+            <tr>
+                <th>Parameter</th>
+                <th>Value</th>
+            </tr>
+            <tr>
+                <td>Loan Provider</td>
+                <td>{provider} Financial Services</td>
+            </tr>
+            <tr>
+                <td>Account Reference</td>
+                <td>{ref}</td>
+            </tr>
+            <tr>
+                <td>Outstanding Balance</td>
+                <td>Rs {outstanding:,}</td>
+            </tr>
+            <tr>
+                <td>RBI OTS Rate</td>
+                <td>{ots_pct}%</td>
+            </tr>
+            <tr>
+                <td><strong>Settlement Amount Payable</strong></td>
+                <td><strong>Rs {ots:,}</strong></td>
+            </tr>
+            <tr>
+                <td>Tenure if Continued</td>
+                <td>{tenure} months</td>
+            </tr>
+            <tr>
+                <td>Monthly EMI</td>
+                <td>Rs {emi:,}</td>
+            </tr>
+        </table>
+
+        <p style="margin-top: 20px; color: #777; font-size: 0.9em;">
+            <strong>Print Instructions:</strong> Press Ctrl+P → Choose "Save as PDF" or your printer
+        </p>
+    </div>
+</body>
+</html>"""
+
+LETTER_PDF_BODY = """
+        <b>Subject: OTS Settlement Offer under RBI Guidelines (DBOD.No.Leg.BC.252)</b><br/><br/>
+
+        Dear Sir/Madam,<br/><br/>
+
+        I propose to settle my outstanding loan liability of <b>Rs {outstanding:,}</b>
+        under RBI's OTS framework (Circular DBOD.No.Leg.BC.252/09.07.005/2013-14) as follows:<br/><br/>
+
+        • Original Outstanding: <b>Rs {outstanding:,}</b><br/>
+        • Proposed OTS Amount ({ots_pct}%): <b>Rs {ots:,}</b><br/>
+        • Settlement Benefit: <b>Rs {benefit:,}</b><br/><br/>
+
+        Loan Account Reference: <b>{ref}</b><br/>
+        This offer is valid for 30 days. Kindly provide written acceptance with payment instructions.<br/><br/>
+
+        Sincerely,<br/>
+        [Borrower Name]<br/>
+        Date: {date}
+        """
+
+
+def letter_stem(provider):
+    """File stem used for HTML/PDF letters: 'L&T' -> 'lt' (see portfolio_view.ots_letter_file)."""
+    return provider.lower().replace('&', '').replace('+', '')
+
+
+def build_letter_jobs(loans, out_dir, date=None):
+    """
+    One job dict per loan with every field the templates need (picklable, no loan objects).
+    A provider's first loan keeps <provider>-ots.*; repeat accounts get the account ref
+    in the name so letters in a batch never overwrite each other.
+    """
+    date = date or datetime.now().strftime('%d %B %Y')
+    seen = set()
+    jobs = []
+    for loan in loans:
+        provider = loan["provider"]
+        # Same settlement figure as the dashboard / verifier (stored OTS amount or ots_percent, else 70%)
+        outstanding = outstanding_of(loan)
+        ots = ots_amount(loan)
+        ref = loan.get("account_ref", provider)
+        txt_stem, stem = provider.lower(), letter_stem(provider)
+        if stem in seen:
+            suffix = ''.join(c for c in str(ref) if c.isalnum())[-8:].lower() or str(len(jobs))
+            txt_stem, stem = f"{txt_stem}-{suffix}", f"{stem}-{suffix}"
+        seen.add(stem)
+        jobs.append({
+            "provider": provider,
+            "outstanding": outstanding,
+            "ots": ots,
+            "ots_pct": ots_percent(loan),
+            "benefit": outstanding - ots,
+            "ref": ref,
+            "emi": loan["emi"],
+            "tenure": round(outstanding / loan["emi"]),
+            "date": date,
+            "out_dir": str(out_dir),
+            "txt_stem": txt_stem,
+            "stem": stem,
+        })
+    return jobs
+
+
+@lru_cache(maxsize=None)
+def _pdf_styles():
+    """Stylesheet + summary table style, built once per process (getSampleStyleSheet is not cheap)."""
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='Justify', alignment=0, spaceAfter=12))
+    table_style = TableStyle([
+        ('BACKGROUND', (0, 0), (1, 0), colors.lightgrey),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTNAME', (1, 4), (1, 4), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ])
+    return styles, table_style
+
+
+def write_letter_pdf(job, path):
+    """Professional OTS letter PDF (the former L&T-only layout, now for any lender)"""
+    styles, table_style = _pdf_styles()
+    doc = SimpleDocTemplate(str(path), pagesize=letter, topMargin=0.6*72, bottomMargin=0.6*72)
+    elements = [
+        Paragraph('<b>ONE-TIME SETTLEMENT (OTS) OFFER</b>', styles['Title']),
+        Spacer(1, 0.25*72),
+        Paragraph(f"To,<br/>The Manager<br/>{job['provider']} Financial Services<br/>Mumbai, India", styles['Normal']),
+        Spacer(1, 0.35*72),
+        Paragraph(LETTER_PDF_BODY.format(**job), styles['Justify']),
+    ]
+    tbl_data = [
+        ['<b>Parameter</b>', '<b>Value</b>'],
+        ['Loan Provider', f"{job['provider']} Financial Services"],
+        ['Account Reference', job['ref']],
+        ['Outstanding Balance', f"Rs {job['outstanding']:,}"],
+        ['RBI OTS Rate', f"{job['ots_pct']}%"],
+        ['<b>Settlement Amount Payable</b>', f"<b>Rs {job['ots']:,}</b>"],
+        ['Tenure if Continued', f"{job['tenure']} months"],
+        ['Monthly EMI', f"Rs {job['emi']:,}"]
+    ]
+    tbl = Table(tbl_data, colWidths=[2.0*72, 3.2*72])
+    tbl.setStyle(table_style)
+    elements.append(Spacer(1, 0.3*72))
+    elements.append(tbl)
+    doc.build(elements)
+
+
+def render_letter(job, pdf=True):
+    """Write txt + HTML (+ PDF if reportlab) for one job. Returns number of files written."""
+    out_dir = Path(job["out_dir"])
+    with open(out_dir / f"{job['txt_stem']}-ots.txt", "w", encoding="utf-8") as f:
+        f.write(LETTER_TEXT.format(**job))
+    with open(out_dir / f"{job['stem']}-ots.html", "w", encoding="utf-8") as f:
+        f.write(LETTER_HTML.format(**job))
+    if pdf and HAS_REPORTLAB:
+        write_letter_pdf(job, out_dir / f"{job['stem']}-ots.pdf")
+        return 3
+    return 2
+
+
+def _render_chunk(jobs, pdf):
+    return sum(render_letter(job, pdf) for job in jobs)
+
+
+def _init_worker():
+    """Pay the reportlab start-up (imports, stylesheet) once per worker, not per letter."""
+    if HAS_REPORTLAB:
+        _pdf_styles()
+
+
+def default_workers(n_jobs):
+    """1 for small batches, else one worker per core."""
+    if n_jobs < PARALLEL_MIN_LETTERS:
+        return 1
+    return min(os.cpu_count() or 1, n_jobs)
+
+
+def generate_letters(jobs, workers=None, pdf=True):
+    """
+    Render all jobs, in-process for workers=1, else over a process pool.
+    Jobs are sent in chunks so each worker round-trip renders several letters.
+    Returns number of files written.
+    """
+    if workers is None:
+        workers = default_workers(len(jobs))
+    if workers <= 1 or len(jobs) <= 1:
+        return _render_chunk(jobs, pdf)
+    size = max(1, len(jobs) // (workers * 4))
+    chunks = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        return sum(pool.map(_render_chunk, chunks, [pdf] * len(chunks)))
+
+
+def benchmark(n_letters=200, worker_counts=(1, 4, 8)):
+    """Letters/sec for a synthetic batch at each worker count (files go to a temp dir)."""
+    providers = ["L&T", "HDFC", "Tata", "Bajaj"]
+    loans = [{
+        "provider": providers[i % len(providers)],
+        "outstanding": 500000 + 1000 * i,
+        "emi": 25000,
+        "account_ref": f"BENCH{i:06d}",
+    } for i in range(n_letters)]
+    print(f"OTS letter benchmark: {n_letters} letters, reportlab={HAS_REPORTLAB}, cores={os.cpu_count()}")
+    results = {}
+    for workers in worker_counts:
+        with tempfile.TemporaryDirectory() as tmp:
+            jobs = build_letter_jobs(loans, tmp)
+            start = time.perf_counter()
+            generate_letters(jobs, workers=workers)
+            elapsed = time.perf_counter() - start
+        results[workers] = n_letters / elapsed
+        print(f"  workers={workers:<2} {elapsed:7.2f}s  {results[workers]:8.1f} letters/sec")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OTS letter generation benchmark")
+    parser.add_argument("--bench", type=int, nargs="?", const=200, metavar="N",
+                        help="Benchmark N synthetic letters at 1, 4 and 8 workers (default 200)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8],
+                        help="Worker counts to benchmark")
+    args = parser.parse_args()
+    if args.bench is None:
+        parser.print_help()
+        return 1
+    benchmark(args.bench, tuple(args.workers))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+OTS settlement optimizer: which loans to settle with a limited lump sum
+0/1 knapsack over the running loans - cost is the OTS amount, value is the savings
+(or the EMI freed). Greedy + Dantzig bounds settle most portfolios outright; otherwise
+loans whose bound cannot beat the greedy plan are fixed in/out and only the remaining
+core goes through a capacity-scaled DP (numpy, one vector update per loan).
+
+Usage:     py ots_optimizer.py --budget 2000000 3500000 --objective emi
+Benchmark: py ots_optimizer.py --bench 5000   (5000 loans x 10 budgets)
+"""
+import sys
+import json
+import time
+import argparse
+
+import numpy as np
+
+from portfolio_view import is_closed, ots_amount, outstanding_of, provider_name
+
+OBJECTIVES = ("savings", "emi")
+# Upper limit on DP table cells (core loans x capacity steps); budgets are scaled to fit
+MAX_DP_CELLS = 20_000_000
+
+
+def settlement_items(loans):
+    """Running loans as arrays: (index, cost=OTS amount, savings, emi)."""
+    index, cost, savings, emi = [], [], [], []
+    for i, loan in enumerate(loans):
+        if is_closed(loan):
+            continue
+        ots = ots_amount(loan)
+        index.append(i)
+        cost.append(ots)
+        savings.append(outstanding_of(loan) - ots)
+        emi.append(loan.get('emi_amount', loan.get('emi', 0)) or 0)
+    return (np.array(index, dtype=np.int64), np.array(cost, dtype=np.float64),
+            np.array(savings, dtype=np.float64), np.array(emi, dtype=np.float64))
+
+
+def _greedy(order, cost, value, budget):
+    """Take loans in density order while they fit (skipping ones that don't). Returns (picked mask, value)."""
+    picked = np.zeros(len(cost), dtype=bool)
+    left = budget
+    for j in order:
+        if cost[j] <= left:
+            picked[j] = True
+            left -= cost[j]
+    return picked, value[picked].sum()
+
+
+def _scaled_dp(cost, value, capacity, max_cells=MAX_DP_CELLS):
+    """0/1 knapsack over a small core: costs rounded up to `unit` rupees. Returns (picked mask, unit)."""
+    k = len(cost)
+    unit = max(1, int(np.ceil(capacity * k / max_cells)))
+    steps = int(capacity // unit)
+    scaled = np.ceil(cost / unit).astype(np.int64)
+    best = np.zeros(steps + 1)
+    keep = np.zeros((k, steps + 1), dtype=bool)
+    for i in range(k):
+        c = scaled[i]
+        if c > steps:
+            continue
+        candidate = best[:steps + 1 - c] + value[i]
+        better = candidate > best[c:]
+        keep[i, c:] = better
+        best[c:] = np.where(better, candidate, best[c:])
+    picked = np.zeros(k, dtype=bool)
+    c = int(np.argmax(best))
+    for i in range(k - 1, -1, -1):
+        if keep[i, c]:
+            picked[i] = True
+            c -= scaled[i]
+    return picked, unit
+
+
+def optimize(loans, budget, objective="savings", items=None):
+    """
+    Best set of loans to settle within budget. objective 'savings' maximizes OS - OTS,
+    'emi' maximizes the monthly EMI freed. Returns a plan dict (indexes into loans).
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}")
+    index, cost, savings, emi = items if items is not None else settlement_items(loans)
+    value = savings if objective == "savings" else emi
+    method = "all fit"
+    exact = True
+
+    free = cost <= 0
+    usable = ~free & (cost <= budget) & (value > 0)
+    if budget <= 0:
+        # Nothing to spend: only loans that settle for nothing
+        picked = free
+        method = "no budget"
+    elif cost[usable].sum() <= budget:
+        picked = free | usable
+    else:
+        # Dantzig: sort by value density, critical loan s is the first that no longer fits
+        order = np.flatnonzero(usable)
+        order = order[np.argsort(-value[order] / cost[order], kind="stable")]
+        cum = np.cumsum(cost[order])
+        s = int(np.searchsorted(cum, budget, side="right"))
+        in_cost = cum[s - 1] if s else 0.0
+        ratio = value[order[s]] / cost[order[s]]
+        upper = value[order[:s]].sum() + (budget - in_cost) * ratio
+        picked, lower = _greedy(order, cost, value, budget)
+        method = "greedy (bound met)"
+
+        if lower < np.floor(upper + 1e-9) - 1e-9:
+            # Dembo-Hammer reduction: flipping loan j costs |v_j - ratio * c_j| off the bound
+            flip = np.abs(value[order] - ratio * cost[order])
+            fixed = upper - flip <= lower
+            fixed[s] = False
+            fixed_in = order[:s][fixed[:s]]
+            core = order[~fixed]
+            capacity = budget - cost[fixed_in].sum()
+            core_picked, unit = _scaled_dp(cost[core], value[core], capacity)
+            candidate = np.zeros(len(cost), dtype=bool)
+            candidate[fixed_in] = True
+            candidate[core[core_picked]] = True
+            # Rounding leaves slack when unit > 1: top up in density order
+            left = budget - cost[candidate].sum()
+            for j in order:
+                if not candidate[j] and cost[j] <= left:
+                    candidate[j] = True
+                    left -= cost[j]
+            method = f"bounds + DP over {len(core)} of {len(order)} loans"
+            exact = unit == 1
+            if value[candidate].sum() > lower:
+                picked = candidate
+            if not exact:
+                method += f" (Rs {unit:,} steps)"
+        picked |= free
+
+    chosen = np.flatnonzero(picked)
+    return {
+        "budget": budget,
+        "objective": objective,
+        "loans": [int(index[j]) for j in chosen],
+        "cost": float(cost[chosen].sum()),
+        "savings": float(savings[chosen].sum()),
+        "emi_freed": float(emi[chosen].sum()),
+        "remaining_emi": float(emi.sum() - emi[chosen].sum()),
+        "method": method,
+        "exact": exact,
+    }
+
+
+def optimize_budgets(loans, budgets, objective="savings"):
+    """optimize() for each budget level, sharing the item arrays."""
+    items = settlement_items(loans)
+    return [optimize(loans, b, objective, items=items) for b in budgets]
+
+
+def print_plan(loans, plan):
+    print(f"\nBudget Rs {plan['budget']:,.0f} ({plan['objective']}): settle {len(plan['loans'])} loans "
+          f"[{plan['method']}]")
+    for i in plan["loans"][:20]:
+        loan = loans[i]
+        print(f"  {provider_name(loan.get('provider')):<16} {loan.get('account_ref', ''):<20} "
+              f"OTS Rs {ots_amount(loan):>12,.0f}  saves Rs {outstanding_of(loan) - ots_amount(loan):>12,.0f}")
+    if len(plan["loans"]) > 20:
+        print(f"  ... {len(plan['loans']) - 20} more")
+    print(f"  Pay Rs {plan['cost']:,.0f} -> save Rs {plan['savings']:,.0f}, "
+          f"EMI freed Rs {plan['emi_freed']:,.0f}/month (Rs {plan['remaining_emi']:,.0f} left)")
+
+
+def benchmark(n_loans=5000, n_budgets=10):
+    """Synthetic portfolio, budgets from 5% to 50% of the total OTS liability."""
+    rng = np.random.default_rng(7)
+    outstanding = rng.integers(100000, 5000000, n_loans)
+    loans = [{"provider": "HDFC", "outstanding": int(o), "emi": int(o // rng.integers(12, 60)),
+              "ots_percent": int(rng.integers(40, 90))} for o in outstanding]
+    total = sum(ots_amount(l) for l in loans)
+    budgets = np.linspace(0.05, 0.5, n_budgets) * total
+    for objective in OBJECTIVES:
+        start = time.perf_counter()
+        plans = optimize_budgets(loans, budgets, objective)
+        elapsed = time.perf_counter() - start
+        print(f"OTS optimizer ({objective}): {n_loans:,} loans x {n_budgets} budgets in {elapsed * 1000:.0f} ms; "
+              f"last: {plans[-1]['method']}")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Choose which loans to settle (OTS) under a cash budget")
+    parser.add_argument("--budget", type=float, nargs="+", help="Lump sum(s) available, in Rs")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="savings",
+                        help="Maximize savings (default) or EMI freed")
+    parser.add_argument("--masters", default="masters.json", help="Portfolio file")
+    parser.add_argument("--json", action="store_true", help="Print plans as JSON")
+    parser.add_argument("--bench", type=int, nargs="?", const=5000, metavar="LOANS",
+                        help="Benchmark with synthetic loans (default 5000)")
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.bench)
+        return 0
+    if not args.budget:
+        parser.print_help()
+        return 1
+    with open(args.masters, "r", encoding="utf-8") as f:
+        loans = json.load(f).get("loans", [])
+    plans = optimize_budgets(loans, args.budget, args.objective)
+    if args.json:
+        print(json.dumps(plans, indent=2))
+    else:
+        for plan in plans:
+            print_plan(loans, plan)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+OTS scenario surface: settlement percentage x settlement date, whole portfolio at once
+For every (OTS %, months from now) cell: the OTS liability (pct of the balance left after
+that many more EMIs, rounded per loan like masters.json) and the savings against paying
+the loans out. Computed as loan x scenario arrays in numpy, in loan chunks.
+
+Usage:     py ots_scenarios.py --percents 50 60 70 --months 0 6 12
+Benchmark: py ots_scenarios.py --bench 100000   (loan x scenario cells/sec)
+"""
+import sys
+import json
+import time
+import argparse
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+from portfolio_view import LAKH, is_closed, outstanding_of
+
+DEFAULT_PERCENTS = (40, 50, 60, 70, 80, 90)
+DEFAULT_MONTHS = (0, 3, 6, 12, 24)
+# Loan x scenario cells evaluated per chunk (bounds temporary memory)
+CHUNK_CELLS = 4_000_000
+
+
+def portfolio_arrays(loans):
+    """(outstanding, emi) of the running loans as float arrays."""
+    running = [loan for loan in loans if not is_closed(loan)]
+    outstanding = np.array([outstanding_of(l) for l in running], dtype=np.float64)
+    emi = np.array([l.get('emi_amount', l.get('emi', 0)) or 0 for l in running], dtype=np.float64)
+    return outstanding, emi
+
+
+def scenario_surface(outstanding, emi, percents=DEFAULT_PERCENTS, months=DEFAULT_MONTHS):
+    """
+    Totals over the portfolio, shape (len(percents), len(months)):
+    liability = sum of round(balance_at_month * pct), savings = balance_at_month - liability,
+    plus paid[m] = EMIs paid before settling at month m.
+    """
+    pct = np.asarray(percents, dtype=np.float64) / 100
+    m = np.asarray(months, dtype=np.float64)
+    liability = np.zeros((len(pct), len(m)))
+    balance_total = np.zeros(len(m))
+    chunk = max(1, CHUNK_CELLS // max(1, len(pct) * len(m)))
+    for start in range(0, len(outstanding), chunk):
+        os_c = outstanding[start:start + chunk]
+        balance = np.maximum(0.0, os_c[:, None] - emi[start:start + chunk, None] * m[None, :])  # (L, M)
+        balance_total += balance.sum(axis=0)
+        # (P, L, M): per-loan rounding, as stored in masters.json (round() is half-to-even too)
+        liability += np.rint(balance[None, :, :] * pct[:, None, None]).sum(axis=1)
+    exposure = outstanding.sum()
+    return {
+        "percents": list(percents),
+        "months": list(months),
+        "exposure": float(exposure),
+        "loans": int(len(outstanding)),
+        "paid": (exposure - balance_total).tolist(),
+        "liability": liability.tolist(),
+        "savings": (balance_total[None, :] - liability).tolist(),
+    }
+
+
+def portfolio_surface(loans, percents=DEFAULT_PERCENTS, months=DEFAULT_MONTHS):
+    """scenario_surface for masters.json-style loan records (running loans only); None without numpy."""
+    if not HAS_NUMPY:
+        return None
+    return scenario_surface(*portfolio_arrays(loans), percents=percents, months=months)
+
+
+def surface_table_html(surface):
+    """Dashboard table: one row per OTS %, one column per settlement month (Rs L)."""
+    head = "".join(f"<th>{'Now' if m == 0 else f'+{m} mo'}</th>" for m in surface["months"])
+    rows = []
+    for pct, liability, savings in zip(surface["percents"], surface["liability"], surface["savings"]):
+        cells = "".join(f"<td>{l / LAKH:.2f}<br><small>saves {s / LAKH:.2f}</small></td>"
+                        for l, s in zip(liability, savings))
+        rows.append(f"            <tr><td><strong>{pct}%</strong></td>{cells}</tr>")
+    return (f"""        <table class="scenario-table">
+            <tr><th>OTS % \\ Settle</th>{head}</tr>
+""" + "\n".join(rows) + """
+        </table>""")
+
+
+def benchmark(n_loans=100000):
+    """Cells/sec over a synthetic portfolio: 11 percentages x 25 settlement months."""
+    rng = np.random.default_rng(7)
+    outstanding = rng.integers(100000, 5000000, n_loans).astype(np.float64)
+    emi = np.floor(outstanding / rng.integers(12, 60, n_loans))
+    percents = list(range(40, 95, 5))
+    months = list(range(0, 25))
+    start = time.perf_counter()
+    scenario_surface(outstanding, emi, percents, months)
+    elapsed = time.perf_counter() - start
+    cells = n_loans * len(percents) * len(months)
+    print(f"OTS scenarios: {n_loans:,} loans x {len(percents) * len(months)} scenarios = {cells:,} cells "
+          f"in {elapsed * 1000:.0f} ms ({cells / elapsed / 1e6:.1f}M cells/sec)")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OTS savings/liability surface (percent x settlement month)")
+    parser.add_argument("--percents", type=float, nargs="+", default=list(DEFAULT_PERCENTS), help="OTS percentages")
+    parser.add_argument("--months", type=int, nargs="+", default=list(DEFAULT_MONTHS), help="Months from now")
+    parser.add_argument("--masters", default="masters.json", help="Portfolio file")
+    parser.add_argument("--json", metavar="FILE", help="Also write the surface as JSON")
+    parser.add_argument("--bench", type=int, nargs="?", const=100000, metavar="LOANS",
+                        help="Benchmark with synthetic loans (default 100000)")
+    args = parser.parse_args()
+    if not HAS_NUMPY:
+        print("[!] numpy not installed")
+        return 1
+    if args.bench:
+        benchmark(args.bench)
+        return 0
+    with open(args.masters, "r", encoding="utf-8") as f:
+        loans = json.load(f).get("loans", [])
+    surface = portfolio_surface(loans, args.percents, args.months)
+    print(f"OTS liability / savings (Rs L) for {surface['loans']} running loans, "
+          f"exposure Rs {surface['exposure'] / LAKH:.2f}L")
+    print(f"{'OTS %':>7} " + " ".join(f"{('Now' if m == 0 else f'+{m} mo'):>17}" for m in surface["months"]))
+    for pct, liability, savings in zip(surface["percents"], surface["liability"], surface["savings"]):
+        print(f"{pct:>6g}% " + " ".join(f"{l / LAKH:>8.2f} / {s / LAKH:<6.2f}" for l, s in zip(liability, savings)))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(surface, f, indent=2)
+        print(f"[OK] {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
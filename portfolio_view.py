@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Portfolio view-model shared by all HTML/PDF generators
+Per-loan derived fields (OTS amount, provider name, lakhs, shortcodes, running/closed)
+and portfolio totals are computed once, in one pass, and every renderer reads them.
+"""
+
+# Display names for dashboard/PDF (keys are upper-cased provider codes)
+PROVIDER_NAMES = {
+    "L&T": "L&T Financial",
+    "LT": "L&T Financial",
+    "HDFC": "HDFC Bank",
+    "TATA": "Tata Capital",
+    "BAJAJ": "Bajaj Finance",
+}
+
+LAKH = 100000
+
+
+def provider_name(p):
+    """Provider display name: 'L&T' -> 'L&T Financial', unknown -> Title Case."""
+    if not p:
+        return "Unknown"
+    p = str(p).strip().upper()
+    return PROVIDER_NAMES.get(p) or p.title()
+
+
+def outstanding_of(loan):
+    """OS amount: verifier records use outstanding_principal, empire records use outstanding."""
+    return loan.get('outstanding_principal', loan.get('outstanding', 0)) or 0
+
+
+def ots_amount(loan):
+    """OTS amount to pay - uses stored value or computes from ots_percent (default 70%)."""
+    if loan.get('ots_amount_70pct') is not None:
+        return loan['ots_amount_70pct']
+    pct = loan.get('ots_percent', 70)
+    return round(outstanding_of(loan) * (pct / 100))
+
+
+def ots_percent(loan):
+    """OTS amount as a whole percent of OS (70 when there is no OS to compare with)."""
+    os_amt = outstanding_of(loan)
+    if os_amt <= 0:
+        return loan.get('ots_percent', 70)
+    return round(100 * ots_amount(loan) / os_amt)
+
+
+def rate_of(loan):
+    """Interest % p.a. (interest_rate, or rate as the database stores it); None when not recorded."""
+    rate = loan.get('interest_rate') or loan.get('rate')
+    try:
+        return float(rate) if rate else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_floating(loan):
+    """Floating (repo-linked) rate: rate_type 'floating' / 'Float'."""
+    return str(loan.get('rate_type') or '').lower().startswith('float')
+
+
+def tenure_of(loan):
+    """Months left: stored tenure, else OS / EMI as masters.json records it (empire records carry neither)."""
+    tenure = loan.get('tenure_remaining_months', loan.get('tenure_months'))
+    if tenure is not None:
+        return tenure
+    emi = loan.get('emi_amount', loan.get('emi', 0))
+    return round(outstanding_of(loan) / emi) if emi else 0
+
+
+def is_closed(loan):
+    """Closed = OS <= 0 or status CLOSED."""
+    status = (loan.get('status') or loan.get('verification_status') or '').upper()
+    return outstanding_of(loan) <= 0 or status == 'CLOSED'
+
+
+def generate_shortcode(loan):
+    """Generate shortcode from loan data (for table)"""
+    provider = loan.get('provider', '').lower()
+    account = loan.get('account_number', loan.get('account_ref', ''))
+    if account:
+        short = ''.join([c for c in account if c.isalnum()])[-6:].lower()
+        return f"{provider[:3]}{short}"
+    return f"{provider[:3]}{loan.get('id', '')[-4:]}"
+
+
+def display_shortcode(loan):
+    """Display shortcode: baj8L, lt26L (provider prefix + OS in Lakhs)"""
+    os_amt = outstanding_of(loan)
+    os_lakhs = round(os_amt / LAKH) if os_amt >= LAKH else round(os_amt / LAKH, 1)
+    if os_lakhs == 0:
+        os_lakhs = 0.1
+    p = (loan.get('provider') or '').replace('&', '').replace(' ', '').lower()
+    prefix = p[:3] if len(p) >= 3 else p or 'xxx'
+    return f"{prefix}{os_lakhs}L"
+
+
+def ots_letter_file(lender):
+    """ots-pdfs/ file name for a lender (matches ots_letters.letter_stem)."""
+    return lender.lower().replace('&', '').replace('+', '') + '-ots.html'
+
+
+def split_running_closed(loans):
+    """Split into running (OS > 0) and closed (OS == 0 or status CLOSED)."""
+    running = []
+    closed = []
+    for loan in loans:
+        (closed if is_closed(loan) else running).append(loan)
+    return running, closed
+
+
+def build_portfolio_view(loans):
+    """
+    Derive every per-loan display field and the portfolio totals in one pass.
+    Returns {'loans': [view dicts], 'running': [...], 'closed': [...], 'totals': {...}, 'action_loan': view|None}.
+    Each view keeps the source record under 'loan' and its position under 'index'.
+    """
+    views = []
+    running = []
+    closed = []
+    total_os = total_ots = total_emi = running_os = 0
+    action_loan = None
+    for i, loan in enumerate(loans):
+        provider = loan.get('provider', 'N/A')
+        os_amt = outstanding_of(loan)
+        ots = ots_amount(loan)
+        account_ref = loan.get('account_number', loan.get('account_ref', '')) or ''
+        view = {
+            'index': i,
+            'loan': loan,
+            'provider': provider,
+            'provider_name': provider_name(provider),
+            'account_ref': account_ref,
+            'ref_display': str(account_ref).strip() or "—",
+            'borrower': loan.get('borrower_name', ''),
+            'os': os_amt,
+            'emi': loan.get('emi_amount', loan.get('emi', 0)),
+            'tenure': tenure_of(loan),
+            'fees': loan.get('processing_fee', 0),
+            'ots': ots,
+            'savings': os_amt - ots,
+            'os_lakhs': os_amt / LAKH,
+            'ots_lakhs': ots / LAKH,
+            'savings_lakhs': (os_amt - ots) / LAKH,
+            'shortcode': generate_shortcode(loan),
+            'display_shortcode': display_shortcode(loan),
+            'ots_file': ots_letter_file(provider),
+            'closed': is_closed(loan),
+        }
+        views.append(view)
+        total_os += os_amt
+        total_ots += ots
+        total_emi += view['emi']
+        if view['closed']:
+            closed.append(view)
+        else:
+            running.append(view)
+            running_os += os_amt
+        # Dashboard action: first loan with an L&T-style BL ref, else the first loan
+        if action_loan is None and "BL" in str(loan.get('account_ref') or ""):
+            action_loan = view
+    if action_loan is None and views:
+        action_loan = views[0]
+    total_savings = total_os - total_ots
+    totals = {
+        'count': len(views),
+        'exposure': total_os,
+        'ots': total_ots,
+        'savings': total_savings,
+        'emi': total_emi,
+        'savings_pct': round(100 * total_savings / total_os) if total_os > 0 else 0,
+        'running_os': running_os,
+        'running_count': len(running),
+        'closed_count': len(closed),
+    }
+    return {'loans': views, 'running': running, 'closed': closed, 'totals': totals, 'action_loan': action_loan}
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Portfolio prepayment simulator: avalanche, snowball, OTS-first and custom orders
+All loans are simulated together, month by month. The monthly budget is the EMIs paid
+today plus any extra, so EMI freed by a closed loan rolls into the next one, and lump sums
+land in the months given. Every strategy is one row of (strategy x loan) arrays, so dozens
+of strategies cost one vectorized pass per month.
+
+  avalanche  surplus to the highest interest rate first
+  snowball   surplus to the smallest balance first
+  ots        surplus saved until the cheapest loan can be settled at its OTS %
+  custom     surplus in a given provider order (e.g. HDFC,L&T)
+
+Usage:     py prepayment_sim.py --extra 0 25000 --lump 6:500000 --order HDFC,L&T
+Benchmark: py prepayment_sim.py --bench 2000   (2000 loans x 48 strategies x 60 months)
+"""
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+from core.orchestrator import with_loan_details
+from portfolio_view import LAKH, is_closed, outstanding_of, rate_of
+
+STRATEGIES = ("avalanche", "snowball", "ots", "custom")
+HORIZON_MONTHS = 60
+# Assumed when a loan record has no interest_rate (% p.a.)
+DEFAULT_RATE = 12.0
+DEFAULT_OTS_PERCENT = 70
+
+
+def portfolio_arrays(loans, default_rate=DEFAULT_RATE):
+    """Running loans as arrays: providers, balance, emi, monthly rate, OTS fraction."""
+    running = [l for l in loans if not is_closed(l)]
+    providers = [l.get('provider', '') for l in running]
+    balance = np.array([outstanding_of(l) for l in running], dtype=np.float64)
+    emi = np.array([l.get('emi_amount', l.get('emi', 0)) or 0 for l in running], dtype=np.float64)
+    rate = np.array([r if r is not None else default_rate for r in map(rate_of, running)], dtype=np.float64)
+    ots = np.array([(l.get('ots_percent') or DEFAULT_OTS_PERCENT) / 100 for l in running])
+    return providers, balance, emi, rate / 1200, ots
+
+
+def custom_rank(providers, order):
+    """Rank per loan from a provider order list; unlisted providers go last, in file order."""
+    position = {p.upper(): i for i, p in enumerate(order)}
+    return np.array([position.get(p.upper(), len(order)) for p in providers], dtype=np.float64)
+
+
+def build_strategies(providers, extras=(0,), lumps=None, order=None):
+    """Strategy specs: every base strategy x every extra monthly amount."""
+    specs = []
+    for kind in STRATEGIES:
+        if kind == "custom" and not order:
+            continue
+        for extra in extras:
+            specs.append({"name": f"{kind}" + (f" +{extra:,.0f}/mo" if extra else ""),
+                          "kind": kind, "extra": float(extra), "lumps": dict(lumps or {}), "order": order})
+    return specs
+
+
+def simulate(specs, providers, balance, emi, monthly_rate, ots_fraction, months=HORIZON_MONTHS):
+    """
+    Run all strategies at once. Returns per-strategy totals and the (strategy x month)
+    balance path: {'names', 'paid', 'interest', 'settled_savings', 'debt_free_month', 'path'}.
+    """
+    S, L = len(specs), len(balance)
+    kind = np.array([STRATEGIES.index(s["kind"]) for s in specs])
+    extra = np.array([s["extra"] for s in specs])
+    lump = np.zeros((S, months + 1))
+    for i, spec in enumerate(specs):
+        for month, amount in spec["lumps"].items():
+            if 1 <= int(month) <= months:
+                lump[i, int(month)] += amount
+    rank = np.zeros((S, L))
+    for i, spec in enumerate(specs):
+        if spec["kind"] == "custom":
+            rank[i] = custom_rank(providers, spec["order"])
+    is_avalanche = (kind == 0)[:, None]
+    is_snowball = (kind == 1)[:, None]
+    is_ots = kind == 2
+
+    bal = np.tile(balance, (S, 1))
+    budget = emi.sum() + extra  # EMIs committed today stay committed: freed EMI rolls over
+    reserve = np.zeros(S)       # OTS-first: cash saved towards the next settlement
+    paid = np.zeros(S)
+    interest_total = np.zeros(S)
+    savings = np.zeros(S)
+    debt_free = np.full(S, -1)
+    path = np.zeros((S, months + 1))
+    path[:, 0] = bal.sum(axis=1)
+    rows = np.arange(S)[:, None]
+
+    for month in range(1, months + 1):
+        interest = bal * monthly_rate
+        due = np.minimum(emi, bal + interest)
+        bal = bal + interest - due
+        cash = budget + lump[:, month] - due.sum(axis=1)
+        paid += due.sum(axis=1)
+        interest_total += interest.sum(axis=1)
+
+        # Surplus to prepayment, in each strategy's priority order (closed loans last)
+        score = np.where(is_avalanche, -monthly_rate, np.where(is_snowball, bal, rank))
+        score = np.where(bal > 0.005, score, np.inf)
+        order = np.argsort(score, axis=1, kind="stable")
+        ordered = bal[rows, order]
+        before = np.cumsum(ordered, axis=1) - ordered
+        direct = np.where(is_ots, 0.0, cash)
+        prepay = np.clip(direct[:, None] - before, 0, ordered)
+        bal[rows, order] = ordered - prepay
+        paid += prepay.sum(axis=1)
+
+        # OTS-first: bank the surplus, settle the cheapest loans the reserve now covers
+        reserve += np.where(is_ots, cash, 0.0)
+        while True:
+            cost = np.where(bal > 0.005, bal * ots_fraction, np.inf)
+            cheapest = np.argmin(cost, axis=1)
+            price = cost[np.arange(S), cheapest]
+            settle = is_ots & (price <= reserve)
+            if not settle.any():
+                break
+            idx = np.flatnonzero(settle)
+            reserve[idx] -= price[idx]
+            paid[idx] += price[idx]
+            savings[idx] += bal[idx, cheapest[idx]] - price[idx]
+            bal[idx, cheapest[idx]] = 0.0
+
+        total = bal.sum(axis=1)
+        path[:, month] = total
+        debt_free = np.where((debt_free < 0) & (total <= 0.5), month, debt_free)
+
+    return {
+        "names": [s["name"] for s in specs],
+        "paid": paid,
+        "interest": interest_total,
+        "settled_savings": savings,
+        "debt_free_month": debt_free,
+        "left": path[:, -1],
+        "path": path,
+    }
+
+
+def parse_lumps(values):
+    """['6:500000', '12:200000'] -> {6: 500000.0, 12: 200000.0}"""
+    lumps = {}
+    for v in values or []:
+        month, amount = v.split(":", 1)
+        lumps[int(month)] = lumps.get(int(month), 0) + float(amount)
+    return lumps
+
+
+def print_results(result):
+    print(f"{'Strategy':<26} {'Debt-free':>10} {'Paid (L)':>10} {'Interest (L)':>13} "
+          f"{'OTS saved (L)':>14} {'Left (L)':>9}")
+    for i in np.argsort(result["paid"] + result["left"]):
+        month = result["debt_free_month"][i]
+        print(f"{result['names'][i]:<26} {('month ' + str(month)) if month > 0 else '-':>10} "
+              f"{result['paid'][i] / LAKH:>10.2f} {result['interest'][i] / LAKH:>13.2f} "
+              f"{result['settled_savings'][i] / LAKH:>14.2f} {result['left'][i] / LAKH:>9.2f}")
+
+
+def benchmark(n_loans=2000):
+    """Synthetic portfolio, 4 strategies x 12 extra amounts over 60 months."""
+    rng = np.random.default_rng(7)
+    balance = rng.integers(100000, 5000000, n_loans).astype(np.float64)
+    emi = np.floor(balance / rng.integers(24, 120, n_loans))
+    rate = rng.uniform(9, 24, n_loans) / 1200
+    ots = np.full(n_loans, 0.7)
+    providers = [f"P{i % 7}" for i in range(n_loans)]
+    specs = build_strategies(providers, extras=list(range(0, 1200000, 100000)),
+                             lumps={6: 2000000}, order=["P3", "P1"])
+    start = time.perf_counter()
+    simulate(specs, providers, balance, emi, rate, ots)
+    elapsed = time.perf_counter() - start
+    print(f"Prepayment simulator: {n_loans:,} loans x {len(specs)} strategies x {HORIZON_MONTHS} months "
+          f"in {elapsed * 1000:.0f} ms")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare prepayment strategies across the portfolio")
+    parser.add_argument("--extra", type=float, nargs="+", default=[0], help="Extra Rs per month (one run each)")
+    parser.add_argument("--lump", nargs="+", metavar="MONTH:RS", help="Lump sums, e.g. 6:500000")
+    parser.add_argument("--order", help="Custom provider order, e.g. HDFC,L&T")
+    parser.add_argument("--months", type=int, default=HORIZON_MONTHS, help="Horizon in months")
+    parser.add_argument("--default-rate", type=float, default=DEFAULT_RATE,
+                        help="Interest %% p.a. for loans without interest_rate")
+    parser.add_argument("--masters", default="masters.json", help="Portfolio file")
+    parser.add_argument("--bench", type=int, nargs="?", const=2000, metavar="LOANS",
+                        help="Benchmark with synthetic loans (default 2000)")
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.bench)
+        return 0
+    with open(args.masters, "r", encoding="utf-8") as f:
+        loans = json.load(f).get("loans", [])
+    # masters.json has no rates: take interest_rate from loans/<folder>/loan.json
+    loans = with_loan_details(loans, Path(args.masters).resolve().parent / "loans")
+    providers, balance, emi, rate, ots = portfolio_arrays(loans, args.default_rate)
+    if not len(balance):
+        print("[!] No running loans")
+        return 1
+    defaulted = sum(1 for l in loans if not is_closed(l) and rate_of(l) is None)
+    if defaulted:
+        print(f"[WARN] {defaulted} of {len(balance)} loans have no interest_rate "
+              f"(masters.json or loans/<folder>/loan.json): simulated at {args.default_rate}%")
+        if defaulted == len(balance):
+            print("[WARN] Every rate is the default, so avalanche pays loans in file order")
+    order = [p.strip() for p in args.order.split(",")] if args.order else None
+    specs = build_strategies(providers, args.extra, parse_lumps(args.lump), order)
+    print(f"{len(balance)} running loans, Rs {balance.sum() / LAKH:.2f}L outstanding, "
+          f"Rs {emi.sum():,.0f}/month EMI, {args.months}-month horizon")
+    print_results(simulate(specs, providers, balance, emi, rate, ots, args.months))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
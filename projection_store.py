@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Columnar projection store
+Schedules are computed column-wise (numpy, no per-month Python loop) and written once per
+run to projections/: Parquet when pyarrow is installed, else one .npy file per column.
+Readers memory-map the columns and slice by provider or month range, touching only the
+rows they return. monthly_projections.json / .csv / .xlsx / .html are derived from it.
+
+Usage:     py projection_store.py projections --provider HDFC --from 1 --to 12
+Benchmark: py projection_store.py --bench 20000   (store write + slice vs JSON re-parse)
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
+
+STORE_VERSION = 1
+PROJECTION_MONTHS = 60
+DAYS_PER_MONTH = 30  # same step as the row-by-row generator (projection_writer)
+COLUMNS = ("loan", "month", "payment_date", "provider", "emi_amount", "balance_remaining")
+# Row dicts use the spreadsheet names (see projection_writer.PROJECTION_COLUMNS)
+ROW_KEYS = {"month": "Month", "payment_date": "Payment_Date", "provider": "Provider",
+            "emi_amount": "EMI_Amount", "balance_remaining": "Balance_Remaining"}
+ROWS_PER_BATCH = 65536
+
+
+def schedule_columns(loans, months=PROJECTION_MONTHS):
+    """
+    Flat-EMI schedules of all loans as numpy columns (rows grouped by loan, month ascending),
+    identical to projection_writer.iter_projection_rows. Returns (columns, providers, offsets).
+    """
+    outstanding = np.array([l["outstanding"] for l in loans], dtype=np.float64)
+    emi = np.array([l["emi"] for l in loans], dtype=np.float64)
+    # Whole-rupee portfolios (the usual case) stay integers, so exports print as before
+    if np.all(outstanding % 1 == 0) and np.all(emi % 1 == 0):
+        outstanding = outstanding.astype(np.int64)
+        emi = emi.astype(np.int64)
+
+    # Months until paid off (a zero EMI never pays off: capped at `months`)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        to_payoff = np.where(emi > 0, np.ceil(outstanding / np.where(emi > 0, emi, 1)), months)
+    counts = np.where(outstanding > 0, np.minimum(to_payoff, months), 0).astype(np.int64)
+    offsets = np.concatenate(([0], np.cumsum(counts)))
+
+    loan = np.repeat(np.arange(len(loans), dtype=np.int32), counts)
+    month = (np.arange(offsets[-1], dtype=np.int64) - np.repeat(offsets[:-1], counts) + 1)
+    balance_before = outstanding[loan] - (month - 1) * emi[loan]
+    emi_amount = np.minimum(emi[loan], balance_before)
+
+    providers = list(dict.fromkeys(l["provider"] for l in loans))
+    codes = np.array([providers.index(l["provider"]) for l in loans], dtype=np.int16)
+    starts = np.array([l["start_date"] for l in loans], dtype="datetime64[D]")
+    columns = {
+        "loan": loan,
+        "month": month.astype(np.int16),
+        "payment_date": starts[loan] + (month - 1) * DAYS_PER_MONTH,
+        "provider": codes[loan],
+        "emi_amount": emi_amount,
+        "balance_remaining": np.maximum(0, balance_before - emi_amount),
+    }
+    return columns, providers, offsets
+
+
+class ProjectionStore:
+    """projections/ directory: meta.json + columns (.npy each, or schedule.parquet)."""
+
+    def __init__(self, directory="projections"):
+        self.dir = Path(directory)
+        self.meta_path = self.dir / "meta.json"
+        self._meta = None
+
+    def exists(self):
+        return self.meta_path.exists()
+
+    @property
+    def meta(self):
+        if self._meta is None:
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self._meta = json.load(f)
+            if self._meta.get("version") != STORE_VERSION:
+                raise ValueError(f"{self.meta_path}: store version {self._meta.get('version')}, "
+                                 f"expected {STORE_VERSION} - regenerate with empire.py")
+        return self._meta
+
+    def write(self, loans, months=PROJECTION_MONTHS, fmt=None):
+        """Compute and store all schedules; returns the row count. fmt: 'parquet' or 'npy'."""
+        fmt = fmt or ("parquet" if HAS_ARROW else "npy")
+        columns, providers, offsets = schedule_columns(loans, months)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        if self.meta_path.exists():
+            self.meta_path.unlink()  # readers see no store until the new columns are complete
+        if fmt == "parquet":
+            table = pa.table({name: columns[name] for name in COLUMNS})
+            tmp = self.dir / f"schedule.parquet.{os.getpid()}.tmp"
+            pq.write_table(table, tmp)
+            os.replace(tmp, self.dir / "schedule.parquet")
+        else:
+            for name in COLUMNS:
+                tmp = self.dir / f"{name}.{os.getpid()}.tmp.npy"
+                np.save(tmp, columns[name])
+                os.replace(tmp, self.dir / f"{name}.npy")
+        np.save(self.dir / "offsets.npy", offsets)
+        self._meta = {
+            "version": STORE_VERSION,
+            "format": fmt,
+            "rows": int(offsets[-1]),
+            "months": months,
+            "providers": providers,
+            "loans": [{"provider": l["provider"], "account_ref": l.get("account_ref", "")} for l in loans],
+        }
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump(self._meta, f, indent=2, ensure_ascii=False)
+        return self._meta["rows"]
+
+    def _column(self, name):
+        """One column, memory-mapped (pages are read only when sliced)."""
+        if self.meta["format"] == "parquet":
+            table = pq.read_table(self.dir / "schedule.parquet", columns=[name], memory_map=True)
+            return table.column(name).to_numpy()
+        return np.load(self.dir / f"{name}.npy", mmap_mode="r")
+
+    def _row_ranges(self, provider=None, loans=None):
+        """[(start, end)] row ranges of the selected loans (all loans if no filter)."""
+        offsets = np.load(self.dir / "offsets.npy", mmap_mode="r")
+        selected = range(len(self.meta["loans"])) if loans is None else loans
+        if provider is not None:
+            selected = [i for i in selected if self.meta["loans"][i]["provider"] == provider]
+        return [(int(offsets[i]), int(offsets[i + 1])) for i in selected]
+
+    def read(self, provider=None, month_from=None, month_to=None, loans=None, columns=COLUMNS):
+        """
+        {column: numpy array} for the rows matching the filters. Each loan's rows are months
+        1..n in order, so provider / loan / month filters resolve to row ranges from
+        offsets.npy and only those rows are read from the mapped columns.
+        """
+        ranges = []
+        for start, end in self._row_ranges(provider, loans):
+            lo = start + max(0, (month_from or 1) - 1)
+            hi = min(end, start + month_to) if month_to is not None else end
+            if lo < hi:
+                ranges.append((lo, hi))
+        if len(ranges) == 1:
+            (lo, hi), = ranges
+            return {name: np.array(self._column(name)[lo:hi]) for name in columns}
+        index = np.concatenate([np.arange(lo, hi) for lo, hi in ranges]) if ranges else np.zeros(0, np.int64)
+        return {name: np.asarray(self._column(name)[index]) for name in columns}
+
+    def iter_rows(self, **filters):
+        """Row dicts (Month, Payment_Date, Provider, EMI_Amount, Balance_Remaining), batch-converted."""
+        data = self.read(**filters)
+        providers = self.meta["providers"]
+        for start in range(0, len(data["month"]), ROWS_PER_BATCH):
+            batch = {name: data[name][start:start + ROWS_PER_BATCH] for name in ROW_KEYS}
+            batch["payment_date"] = batch["payment_date"].astype(str)
+            batch = {name: values.tolist() for name, values in batch.items()}
+            batch["provider"] = [providers[c] for c in batch["provider"]]
+            for values in zip(*(batch[name] for name in ROW_KEYS)):
+                yield dict(zip(ROW_KEYS.values(), values))
+
+    def export_json(self, path, date_key="Payment_Date"):
+        """Derived monthly_projections.json (same shape as the old hand-written array)."""
+        rows = self.iter_rows()
+        if date_key != "Payment_Date":
+            rows = ({(date_key if k == "Payment_Date" else k): v for k, v in r.items()} for r in rows)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(rows), f, indent=2, ensure_ascii=False)
+
+
+def benchmark(n_loans=20000):
+    """Store write + provider/month slice, against writing and re-parsing the JSON array."""
+    import random
+    import tempfile
+    rnd = random.Random(7)
+    loans = [{"provider": rnd.choice(["L&T", "HDFC", "Tata", "Bajaj"]), "outstanding": rnd.randrange(500000, 5000000),
+              "emi": rnd.randrange(20000, 200000), "start_date": "2024-04-03"} for _ in range(n_loans)]
+    store = ProjectionStore(Path(tempfile.mkdtemp()) / "projections")
+    timings = {}
+    start = time.perf_counter()
+    rows = store.write(loans)
+    timings["store write (%s)" % store.meta["format"]] = time.perf_counter() - start
+    start = time.perf_counter()
+    sliced = ProjectionStore(store.dir).read(provider="HDFC", month_from=1, month_to=12)
+    timings["store slice HDFC months 1-12"] = time.perf_counter() - start
+
+    json_path = store.dir / "monthly_projections.json"
+    store.export_json(json_path)
+    start = time.perf_counter()
+    with open(json_path, "r", encoding="utf-8") as f:
+        parsed = [r for r in json.load(f) if r["Provider"] == "HDFC" and r["Month"] <= 12]
+    timings["JSON re-parse + filter"] = time.perf_counter() - start
+    assert len(parsed) == len(sliced["month"])
+    print(f"Projection store: {n_loans:,} loans, {rows:,} rows, {len(parsed):,} rows in slice")
+    for name, elapsed in timings.items():
+        print(f"  {name:<30} {elapsed * 1000:9.1f} ms")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Columnar projection store")
+    parser.add_argument("store", nargs="?", default="projections", help="Store directory")
+    parser.add_argument("--provider", help="Only this provider (e.g. HDFC)")
+    parser.add_argument("--from", dest="month_from", type=int, help="First month")
+    parser.add_argument("--to", dest="month_to", type=int, help="Last month")
+    parser.add_argument("--bench", type=int, nargs="?", const=20000, metavar="LOANS",
+                        help="Benchmark with synthetic loans (default 20000)")
+    args = parser.parse_args()
+    if not HAS_NUMPY:
+        print("[!] numpy not installed")
+        return 1
+    if args.bench:
+        benchmark(args.bench)
+        return 0
+    store = ProjectionStore(args.store)
+    if not store.exists():
+        print(f"[!] No projection store in {store.dir} - run empire.py first")
+        return 1
+    count = 0
+    for row in store.iter_rows(provider=args.provider, month_from=args.month_from, month_to=args.month_to):
+        print(f"{row['Provider']:<8} Mo{row['Month']:<3} {row['Payment_Date']}  "
+              f"EMI Rs {row['EMI_Amount']:>12,}  Balance Rs {row['Balance_Remaining']:>12,}")
+        count += 1
+    print(f"[OK] {count} rows from {store.dir} ({store.meta['format']})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Constant-memory projection output
+Schedules are generated row by row and appended straight to an openpyxl write-only
+workbook (rows go to a temp file as they are written), so the workbook never holds the
+portfolio in memory. Sheets past Excel's row limit continue on "<title> (2)", "(3)", ...
+The same rows stream as JSON for the API (iter_projection_json), through the schedule cache.
+
+Benchmark: py projection_writer.py --bench 5000   (loans -> 60-month rows, peak memory)
+"""
+import sys
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+from itertools import islice
+
+try:
+    from openpyxl import Workbook
+    HAS_OPENPYXL = True
+except ImportError:
+    HAS_OPENPYXL = False
+
+from core.schedule_cache import flat_schedule_key, pack_schedule, unpack_schedule
+
+PROJECTION_COLUMNS = ["Month", "Payment_Date", "Provider", "EMI_Amount", "Balance_Remaining"]
+# Row keys of the API's JSON projections
+API_COLUMNS = ["Loan_ID"] + PROJECTION_COLUMNS
+PROJECTION_MONTHS = 60
+# Excel's per-sheet row limit (header included)
+MAX_SHEET_ROWS = 1048576
+MAX_TITLE = 31
+# Loans per schedule-cache round trip when streaming rows
+CACHE_BATCH = 2000
+# Rows per encoded piece of a streamed JSON response
+JSON_BATCH_ROWS = 5000
+
+
+def flat_schedule(outstanding, emi, months=PROJECTION_MONTHS):
+    """(EMI paid, balance left) per month until the loan is paid off or months run out."""
+    emi_amounts, balances = [], []
+    balance = outstanding
+    while balance > 0 and len(emi_amounts) < months:
+        emi_amt = min(emi, balance)
+        emi_amounts.append(emi_amt)
+        balances.append(max(0, balance - emi_amt))
+        balance -= emi_amt
+    return emi_amounts, balances
+
+
+def cached_schedules(loans, months=PROJECTION_MONTHS, cache=None):
+    """
+    flat_schedule() of each loan. With a ScheduleCache: one lookup for the batch, only the
+    loans not seen before (same outstanding / EMI / horizon) are computed, stored in one write.
+    """
+    if cache is None:
+        return [flat_schedule(l["outstanding"], l["emi"], months) for l in loans]
+    keys = [flat_schedule_key(l, months) for l in loans]
+    found = cache.get_many(keys)
+    computed = {}
+    for loan, key in zip(loans, keys):
+        if key not in found and key not in computed:
+            computed[key] = pack_schedule(*flat_schedule(loan["outstanding"], loan["emi"], months))
+    cache.put_many(computed)
+    found.update(computed)
+    schedules = []
+    for loan, key in zip(loans, keys):
+        emi_amounts, balances = unpack_schedule(found[key])
+        if isinstance(loan["outstanding"], int) and isinstance(loan["emi"], int):
+            emi_amounts, balances = [int(v) for v in emi_amounts], [int(v) for v in balances]
+        schedules.append((emi_amounts, balances))
+    return schedules
+
+
+def _schedule_rows(loan, emi_amounts, balances):
+    date = datetime.strptime(loan["start_date"], "%Y-%m-%d")
+    for month, (emi_amt, balance) in enumerate(zip(emi_amounts, balances), 1):
+        yield {
+            "Month": month,
+            "Payment_Date": date.strftime("%Y-%m-%d"),
+            "Provider": loan["provider"],
+            "EMI_Amount": emi_amt,
+            "Balance_Remaining": balance
+        }
+        date += timedelta(days=30)
+
+
+def iter_loan_schedule(loan, months=PROJECTION_MONTHS, cache=None):
+    """Month rows (dicts with PROJECTION_COLUMNS) until the loan is paid off or months run out."""
+    (emi_amounts, balances), = cached_schedules([loan], months, cache)
+    yield from _schedule_rows(loan, emi_amounts, balances)
+
+
+def iter_projection_rows(loans, months=PROJECTION_MONTHS, cache=None):
+    """Schedules of all loans, one after another, generated lazily (cache lookups per batch)."""
+    loans = iter(loans)
+    while True:
+        batch = list(islice(loans, CACHE_BATCH))
+        if not batch:
+            return
+        for loan, (emi_amounts, balances) in zip(batch, cached_schedules(batch, months, cache)):
+            yield from _schedule_rows(loan, emi_amounts, balances)
+
+
+def iter_rows_json(head, rows):
+    """{**head, "rows": [...], "row_count": n} as str chunks, encoded JSON_BATCH_ROWS rows at a time."""
+    yield json.dumps(head)[:-1] + (', ' if head else '') + '"rows": ['
+    rows = iter(rows)
+    count = 0
+    for batch in iter(lambda: list(islice(rows, JSON_BATCH_ROWS)), []):
+        yield (", " if count else "") + json.dumps(batch)[1:-1]
+        count += len(batch)
+    yield f'], "row_count": {count}}}'
+
+
+def iter_projection_json(loans, months=PROJECTION_MONTHS, month_from=1, month_to=None, cache=None):
+    """
+    API payload as str chunks: {"months", "from", "to", "loan_count", "rows": [...], "row_count"}.
+    Loans are API/DB records (id, provider, outstanding, emi, start_date - today if missing);
+    rows are API_COLUMNS, months month_from..month_to, streamed (iter_rows_json) instead
+    of being built whole.
+    """
+    loans = list(loans)
+    month_to = min(month_to or months, months)
+    head = {"months": months, "from": month_from, "to": month_to, "loan_count": len(loans)}
+    return iter_rows_json(head, _iter_api_rows(loans, months, month_from, month_to, cache))
+
+
+def _iter_api_rows(loans, months, month_from, month_to, cache):
+    today = datetime.now().strftime("%Y-%m-%d")
+    for start in range(0, len(loans), CACHE_BATCH):
+        records = loans[start:start + CACHE_BATCH]
+        batch = [{"provider": l.get("provider"), "outstanding": l.get("outstanding") or 0,
+                  "emi": l.get("emi") or 0, "start_date": l.get("start_date") or today} for l in records]
+        for record, loan, (emi_amounts, balances) in zip(records, batch, cached_schedules(batch, months, cache)):
+            for row in islice(_schedule_rows(loan, emi_amounts, balances), month_from - 1, month_to):
+                yield {"Loan_ID": record.get("id"), **row}
+
+
+class ProjectionWorkbook:
+    """
+    Write-only .xlsx: add_sheet() then append() rows; close() saves.
+    Use as a context manager - the file is only saved if the block finishes cleanly.
+    """
+
+    def __init__(self, path):
+        if not HAS_OPENPYXL:
+            raise ImportError("openpyxl is required for .xlsx output")
+        self.path = path
+        self.wb = Workbook(write_only=True)
+        self.sheet = None
+        self.rows = 0  # data rows written, all sheets
+        self._title = None
+        self._columns = []
+        self._part = 1
+        self._sheet_rows = 0
+
+    def add_sheet(self, title, columns):
+        """Start a new sheet with a header row; later append() calls go to it."""
+        self._title = str(title)[:MAX_TITLE]
+        self._columns = list(columns)
+        self._part = 1
+        self._open_sheet(self._title)
+
+    def _open_sheet(self, title):
+        self.sheet = self.wb.create_sheet(title=title)
+        self.sheet.append(self._columns)
+        self._sheet_rows = 1
+
+    def append(self, row):
+        """Append one row (dict keyed by column, or a sequence in column order)."""
+        if self._sheet_rows >= MAX_SHEET_ROWS:
+            self._part += 1
+            suffix = f" ({self._part})"
+            self._open_sheet(self._title[:MAX_TITLE - len(suffix)] + suffix)
+        if isinstance(row, dict):
+            row = [row.get(c) for c in self._columns]
+        self.sheet.append(row)
+        self._sheet_rows += 1
+        self.rows += 1
+
+    def write_rows(self, title, columns, rows):
+        """add_sheet + append every row; returns rows written to this sheet."""
+        before = self.rows
+        self.add_sheet(title, columns)
+        for row in rows:
+            self.append(row)
+        return self.rows - before
+
+    def close(self):
+        self.wb.save(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        return False
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB (None where the resource module is missing)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1048576 if sys.platform == "darwin" else 1024)
+
+
+def benchmark(n_loans=5000):
+    """Write n_loans 60-month schedules to a temp workbook; report rows/sec and peak memory."""
+    import os
+    import tempfile
+    loans = [{"provider": ("L&T", "HDFC", "Tata", "Bajaj")[i % 4], "outstanding": 10000000,
+              "emi": 80000 + i % 7 * 1000, "start_date": "2024-04-03"} for i in range(n_loans)]
+    path = os.path.join(tempfile.mkdtemp(), "bench_projections.xlsx")
+    start = time.perf_counter()
+    with ProjectionWorkbook(path) as wb:
+        wb.write_rows("Projections", PROJECTION_COLUMNS, iter_projection_rows(loans))
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_mb()
+    print(f"Projection writer: {wb.rows:,} rows in {elapsed:.1f}s ({wb.rows / elapsed:,.0f} rows/sec), "
+          f"{os.path.getsize(path) / 1048576:.1f} MB file"
+          + (f", peak RSS {peak:.0f} MB" if peak else ""))
+    os.remove(path)
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming .xlsx projection writer")
+    parser.add_argument("--bench", type=int, nargs="?", const=5000, metavar="LOANS",
+                        help="Benchmark with synthetic loans (default 5000 -> 300k rows)")
+    args = parser.parse_args()
+    if not HAS_OPENPYXL:
+        print("[!] openpyxl not installed")
+        return 1
+    if not args.bench:
+        parser.print_help()
+        return 1
+    benchmark(args.bench)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
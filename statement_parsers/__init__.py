@@ -0,0 +1,109 @@
+"""
+Lender statement parser registry
+Lender detection runs on precompiled fingerprints over the first page only; the lender's
+parser module (and its pattern bank) is imported the first time that lender is seen.
+
+    from statement_parsers import parse_document
+    loan = parse_document("statement.pdf")            # detect lender, parse, cache by SHA256
+    loan = parse_document("stmt.pdf", lender="bajaj")  # skip detection
+"""
+import importlib
+import itertools
+import re
+from pathlib import Path
+
+from core.text_cache import PdfTextCache, scan_fields, sha256_file
+from .docx_stream import iter_blocks
+
+# name -> (module, provider code used in masters.json, first-page fingerprint)
+LENDERS = {
+    "bajaj": ("statement_parsers.bajaj", "Bajaj",
+              re.compile(r"Bajaj\s*Fin|Flexi\s+Reloc|\b\d{3}(?:DFR|LAP)\d{6,}", re.IGNORECASE)),
+    "lt": ("statement_parsers.lt", "L&T",
+           re.compile(r"L\s*&\s*T\b|\bLTFS\b|Larsen|\bBL\d{10,}", re.IGNORECASE)),
+    "hdfc": ("statement_parsers.hdfc", "HDFC",
+             re.compile(r"\bHDFC\b", re.IGNORECASE)),
+    "tata": ("statement_parsers.tata", "Tata",
+             re.compile(r"Tata\s*Capital|\bTCFSL\b", re.IGNORECASE)),
+}
+
+DOCUMENT_TYPES = (".pdf", ".docx")
+
+_loaded = {}
+
+def get_parser(lender):
+    """Parser module for lender, imported on first use."""
+    if lender not in _loaded:
+        _loaded[lender] = importlib.import_module(LENDERS[lender][0])
+    return _loaded[lender]
+
+def detect_lender(text):
+    """Lender whose fingerprint appears earliest in text (letterhead wins over mentions), or None."""
+    best, best_pos = None, None
+    for name, (_, _, fingerprint) in LENDERS.items():
+        match = fingerprint.search(text or "")
+        if match and (best_pos is None or match.start() < best_pos):
+            best, best_pos = name, match.start()
+    return best
+
+def provider_code(provider):
+    """'Bajaj Finance' / 'L&T Financial Services' -> 'Bajaj' / 'L&T'; unknown names unchanged."""
+    lender = detect_lender(provider)
+    return LENDERS[lender][1] if lender else provider
+
+def parse_document(path, lender=None, cache=None, sha256=None):
+    """
+    Parse a lender statement (.pdf or .docx) into a LOAN_TEMPLATE dict, or None.
+    Required fields the statement lacks are listed under "missing_fields".
+    Results are cached by SHA256 + lender + parser VERSION, so the same file parses instantly the second time.
+    """
+    path = Path(path)
+    ext = path.suffix.lower()
+    if ext not in DOCUMENT_TYPES:
+        return None
+    cache = cache or PdfTextCache()
+    sha256 = sha256 or sha256_file(path)
+
+    # DOCX streams from the zip in paragraph blocks; the first block is kept for the field scan
+    blocks = iter_blocks(path) if ext == ".docx" else None
+    first_block = None
+    if lender is None:
+        if blocks is None:
+            pages = cache.iter_pages(path, sha256)
+            first_page = next(pages, (0, ""))[1]
+            pages.close()
+        else:
+            first_block = next(blocks, None)
+            first_page = first_block[1] if first_block else ""
+        lender = detect_lender(first_page) or detect_lender(path.name)
+        if lender is None:
+            if blocks is not None:
+                blocks.close()
+            return None
+
+    parser = get_parser(lender)
+    scan_pages = getattr(parser, "SCAN_PAGES", 0)
+    cached = cache.get_parse(sha256, lender, parser.VERSION)
+    if cached:
+        if blocks is not None:
+            blocks.close()
+        print(f"  [OK] Cached parse: {path.name} ({lender}, same SHA256, pdfplumber skipped)")
+        return dict(cached, document_path=str(path))
+
+    if blocks is None:
+        fields = cache.find_fields(path, parser.PATTERNS, parser.REQUIRED, sha256=sha256, min_pages=scan_pages)
+    else:
+        stream = itertools.chain([first_block], blocks) if first_block is not None else blocks
+        try:
+            fields = scan_fields(stream, parser.PATTERNS, parser.REQUIRED, scan_pages)
+        finally:
+            blocks.close()  # stops iterparse once the fields are found
+    loan = parser.parse(fields)
+    if loan:
+        loan["document_path"] = str(path)
+        # Required fields the statement did not show: left at the template default, never guessed
+        loan["missing_fields"] = [name for name in parser.REQUIRED if name not in fields]
+        if loan["missing_fields"]:
+            print(f"  [WARN] {path.name}: not found in statement: {', '.join(loan['missing_fields'])}")
+        cache.put_parse(sha256, lender, parser.VERSION, loan)
+    return loan
@@ -0,0 +1,72 @@
+"""
+Shared pieces for lender statement parsers: loan template, amount/date helpers and
+the labelled-field patterns most lenders' statements share.
+"""
+import re
+from datetime import datetime
+
+# ===== LOAN TEMPLATE =====
+LOAN_TEMPLATE = {
+    "id": "", "provider": "", "product": "", "account_number": "", "linked_account": "",
+    "borrower_name": "", "outstanding_principal": 0, "interest_rate": 0.0, "rate_type": "",
+    "tenure_total_months": 0, "tenure_remaining_months": 0, "emi_amount": 0,
+    "emi_start_date": "", "emis_paid": 0, "disbursal_date": "", "processing_fee": 0,
+    "foreclosure_fee_percent": 0.0, "late_payment_penalties": 0, "principal_paid_to_date": 0,
+    "interest_paid_to_date": 0, "next_emi_date": "", "verification_status": "pending",
+    "verified_at": "", "document_path": "", "notes": "", "loan_type": "standard"  # standard/flexi
+}
+
+# "Rs. 25,74,000.00" / "INR 2574000" / "₹ 25,74,000" -> group 1 is the number
+AMOUNT = r"(?:Rs\.?|INR|₹)?\s*([\d,]+(?:\.\d+)?)"
+DATE = r"(\d{2}[/-]\d{2}[/-]\d{4})"
+
+def to_amount(value):
+    """'25,74,000.00' -> 2574000"""
+    return int(float(value.replace(',', '')))
+
+def dmy_to_iso(value):
+    """'05/03/2018' or '05-03-2018' -> '2018-03-05'"""
+    d, m, y = re.split(r"[/-]", value)
+    return f"{y}-{m}-{d}"
+
+def months_until(value):
+    """Months from today to a dd/mm/yyyy date (0 if past)."""
+    d, m, y = re.split(r"[/-]", value)
+    return max(0, (datetime(int(y), int(m), int(d)) - datetime.now()).days // 30)
+
+def new_loan(**fields):
+    loan = LOAN_TEMPLATE.copy()
+    loan.update(fields)
+    return loan
+
+def labelled_patterns(account, **extra):
+    """Compiled pattern bank: common 'Label : value' fields plus lender-specific ones."""
+    sources = {
+        "account_number": account,
+        "borrower_name": r"(?:Borrower|Customer|Applicant)(?:'s)?\s+Name\s*:?\s*([A-Z][A-Za-z .]+?)\s*(?:\n|$)",
+        "outstanding": r"(?:Principal\s+Outstanding|Outstanding\s+Principal|POS)\s*:?\s*" + AMOUNT,
+        "emi": r"EMI(?:\s+Amount)?\s*:?\s*" + AMOUNT,
+        "roi": r"(?:Rate\s+of\s+Interest|ROI)\s*(?:\(%\))?\s*:?\s*([\d.]+)\s*%?",
+        "tenure": r"Tenure(?:\s*\(months\))?\s*:?\s*(\d+)",
+    }
+    sources.update(extra)
+    return {name: re.compile(src, re.IGNORECASE) for name, src in sources.items()}
+
+def standard_loan(fields, provider, product=""):
+    """LOAN_TEMPLATE dict from a labelled_patterns match; None if nothing identifying matched."""
+    if "account_number" not in fields and "outstanding" not in fields:
+        return None
+    loan = new_loan(provider=provider, product=product)
+    if "account_number" in fields:
+        loan["account_number"] = fields["account_number"].group(1).strip()
+    if "borrower_name" in fields:
+        loan["borrower_name"] = fields["borrower_name"].group(1).strip().title()
+    if "outstanding" in fields:
+        loan["outstanding_principal"] = to_amount(fields["outstanding"].group(1))
+    if "emi" in fields:
+        loan["emi_amount"] = to_amount(fields["emi"].group(1))
+    if "roi" in fields:
+        loan["interest_rate"] = float(fields["roi"].group(1))
+    if "tenure" in fields:
+        loan["tenure_total_months"] = int(fields["tenure"].group(1))
+    return loan
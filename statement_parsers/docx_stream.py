@@ -0,0 +1,64 @@
+"""
+Streaming DOCX text: word/document.xml is read straight out of the zip with iterparse,
+paragraph by paragraph, so a parser can stop as soon as it has its fields.
+No python-docx needed; memory stays flat however long the document is.
+"""
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+# Paragraphs per yielded block (the DOCX equivalent of a PDF page for scan_fields)
+BLOCK_PARAGRAPHS = 40
+
+def iter_paragraphs(path):
+    """Yield paragraph text in document order; a table row comes out as one line (cells space-joined)."""
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as xml:
+        parts = []
+        row = None
+        for event, elem in iterparse(xml, events=("start", "end")):
+            tag = elem.tag
+            if event == "start":
+                if tag == W + "tr":
+                    row = []
+                continue
+            if tag == W + "t":
+                parts.append(elem.text or "")
+            elif tag == W + "tab":
+                parts.append("\t")
+            elif tag in (W + "br", W + "cr"):
+                parts.append("\n")
+            elif tag == W + "p":
+                text = "".join(parts)
+                parts = []
+                if row is not None:
+                    row.append(text)
+                else:
+                    yield text
+                elem.clear()
+            elif tag == W + "tr":
+                yield " ".join(row)
+                row = None
+                elem.clear()
+            elif tag == W + "body":
+                elem.clear()
+
+def iter_blocks(path, block_paragraphs=BLOCK_PARAGRAPHS):
+    """Yield (index, text) blocks of paragraphs - same shape as PdfTextCache.iter_pages."""
+    block = []
+    index = 0
+    paragraphs = iter_paragraphs(path)
+    try:
+        for text in paragraphs:
+            block.append(text)
+            if len(block) >= block_paragraphs:
+                yield index, "\n".join(block)
+                index += 1
+                block = []
+        if block:
+            yield index, "\n".join(block)
+    finally:
+        paragraphs.close()  # early exit: close the zip now, not at garbage collection
+
+def docx_text(path):
+    """Whole-document text (paragraphs and table rows, newline-joined)."""
+    return "\n".join(iter_paragraphs(path))
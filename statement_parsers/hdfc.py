@@ -0,0 +1,17 @@
+"""
+HDFC Bank loan statements and sanction letters (PDF or DOCX)
+"""
+from .base import labelled_patterns, standard_loan
+
+# Bump when parse() or PATTERNS change: cached parses from older versions are ignored
+VERSION = 2
+PROVIDER = "HDFC Bank"
+PRODUCT = "Personal Loan"
+PATTERNS = labelled_patterns(
+    account=r"Loan\s+(?:Account|A/c)\s*(?:No\.?|Number)\s*:?\s*(\d{6,})",
+)
+REQUIRED = ("account_number", "outstanding", "emi")
+
+def parse(fields):
+    """LOAN_TEMPLATE dict from matched HDFC fields."""
+    return standard_loan(fields, provider=PROVIDER, product=PRODUCT)
@@ -0,0 +1,21 @@
+"""
+L&T Finance statements and foreclosure letters (BL-series business loans)
+"""
+from .base import AMOUNT, labelled_patterns, standard_loan
+
+# Bump when parse() or PATTERNS change: cached parses from older versions are ignored
+VERSION = 2
+PROVIDER = "L&T Finance"
+PRODUCT = "Business Loan"
+PATTERNS = labelled_patterns(
+    account=r"\b(BL\d{10,})\b",
+    foreclosure_amount=r"(?:Foreclosure|Pre-?closure)\s+Amount(?:\s+Payable)?\s*:?\s*" + AMOUNT,
+)
+REQUIRED = ("account_number", "outstanding", "emi")
+
+def parse(fields):
+    """LOAN_TEMPLATE dict from matched L&T fields."""
+    loan = standard_loan(fields, provider=PROVIDER, product=PRODUCT)
+    if loan and "foreclosure_amount" in fields:
+        loan["notes"] = f"Foreclosure amount per statement: Rs {fields['foreclosure_amount'].group(1)}"
+    return loan
@@ -0,0 +1,16 @@
+"""
+Tata Capital loan statements
+"""
+from .base import labelled_patterns, standard_loan
+
+# Bump when parse() or PATTERNS change: cached parses from older versions are ignored
+VERSION = 2
+PROVIDER = "Tata Capital"
+PATTERNS = labelled_patterns(
+    account=r"(?:Loan\s+Account|Agreement)\s*(?:No\.?|Number)\s*:?\s*([A-Z0-9]{6,})",
+)
+REQUIRED = ("account_number", "outstanding", "emi")
+
+def parse(fields):
+    """LOAN_TEMPLATE dict from matched Tata Capital fields."""
+    return standard_loan(fields, provider=PROVIDER, product="Personal Loan")
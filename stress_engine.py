@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo cash-flow stress test for the portfolio
+Each path simulates every running loan month by month with missed EMIs (interest keeps
+accruing, plus penal interest on the arrears and a bounce charge) and rate shocks on
+floating-rate loans. Reports percentile paths of the total balance and arrears.
+
+Paths run in fixed batches, each with its own stream spawned from one SeedSequence, and
+batches are spread over a process pool: a given --seed gives the same numbers for any
+number of workers.
+
+Usage:     py stress_engine.py --paths 20000 --seed 42 --miss 0.05 --shock 0.15
+Benchmark: py stress_engine.py --bench 200   (200 loans x 20000 paths, 1 vs N workers)
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from core.orchestrator import with_loan_details
+from portfolio_view import LAKH, is_closed, is_floating, outstanding_of, rate_of
+
+HORIZON_MONTHS = 60
+PATHS_PER_BATCH = 1000
+PERCENTILES = (5, 25, 50, 75, 95)
+# Assumed when a loan record has no interest_rate (% p.a.), as in prepayment_sim
+DEFAULT_RATE = 12.0
+DEFAULTS = {
+    "miss_prob": 0.03,        # chance an EMI is missed in a given month
+    "penal_rate": 24.0,       # % p.a. penal interest on arrears
+    "bounce_charge": 590.0,   # Rs per missed EMI
+    "cure_prob": 0.5,         # chance arrears are cleared in a month (on top of the EMI)
+    "shock_prob": 0.10,       # chance per month of a repo-linked rate move (floating loans)
+    "shock_bps": 50.0,        # size of one move, basis points (up or down)
+}
+
+_LOANS = None  # worker-side loan arrays (set once per process)
+
+
+def portfolio_arrays(loans, default_rate=DEFAULT_RATE, floating_providers=()):
+    """
+    Running loans as arrays: balance, emi, annual rate %, floating flag, and which rates
+    were defaulted. floating_providers marks those providers' loans floating (--floating).
+    """
+    running = [l for l in loans if not is_closed(l)]
+    rates = [rate_of(l) for l in running]
+    floating_providers = {p.upper() for p in floating_providers}
+    return {
+        "balance": np.array([outstanding_of(l) for l in running], dtype=np.float64),
+        "emi": np.array([l.get('emi_amount', l.get('emi', 0)) or 0 for l in running], dtype=np.float64),
+        "rate": np.array([default_rate if r is None else r for r in rates], dtype=np.float64),
+        "floating": np.array([is_floating(l) or str(l.get('provider', '')).upper() in floating_providers
+                              for l in running], dtype=bool),
+        "rate_defaulted": np.array([r is None for r in rates], dtype=bool),
+    }
+
+
+def _init_worker(arrays):
+    """Ship the loan arrays to each worker once instead of with every batch."""
+    global _LOANS
+    _LOANS = arrays
+
+
+def simulate_batch(seed, n_paths, params, months=HORIZON_MONTHS, arrays=None):
+    """
+    One batch of paths from its own seed. Returns (balance, arrears) totals over loans,
+    each shaped (n_paths, months + 1).
+    """
+    a = arrays if arrays is not None else _LOANS
+    rng = np.random.default_rng(seed)
+    L = len(a["balance"])
+    bal = np.tile(a["balance"], (n_paths, 1))
+    arrears = np.zeros((n_paths, L))
+    rate = np.tile(a["rate"], (n_paths, 1))
+    floating = a["floating"][None, :]
+    emi = a["emi"][None, :]
+    penal = params["penal_rate"] / 1200
+    balances = np.zeros((n_paths, months + 1))
+    overdue = np.zeros((n_paths, months + 1))
+    balances[:, 0] = bal.sum(axis=1)
+
+    for month in range(1, months + 1):
+        # Rate moves hit every floating loan on the path at once (policy-rate driven)
+        move = rng.random(n_paths) < params["shock_prob"]
+        step = np.where(rng.random(n_paths) < 0.5, -1.0, 1.0) * params["shock_bps"] / 100
+        rate = np.where(floating & move[:, None], np.maximum(0.0, rate + step[:, None]), rate)
+
+        active = bal > 0.5
+        interest = bal * rate / 1200 + arrears * penal
+        missed = active & (rng.random((n_paths, L)) < params["miss_prob"])
+        due = np.where(active, np.minimum(emi, bal + interest), 0.0)
+        paid = np.where(missed, 0.0, due)
+        arrears = arrears + np.where(missed, due + params["bounce_charge"], 0.0)
+        # Borrower catches up on arrears some months
+        cured = ~missed & (arrears > 0) & (rng.random((n_paths, L)) < params["cure_prob"])
+        catch_up = np.where(cured, arrears, 0.0)
+        arrears -= catch_up
+        bal = np.maximum(0.0, bal + interest - paid - catch_up + np.where(missed, params["bounce_charge"], 0.0))
+        arrears = np.minimum(arrears, bal)
+
+        balances[:, month] = bal.sum(axis=1)
+        overdue[:, month] = arrears.sum(axis=1)
+    return balances, overdue
+
+
+def _run_batch(seed, n_paths, params, months):
+    return simulate_batch(seed, n_paths, params, months)
+
+
+def run_stress(arrays, n_paths=10000, seed=42, workers=None, months=HORIZON_MONTHS, params=None):
+    """
+    All paths, in PATHS_PER_BATCH batches seeded from SeedSequence(seed).spawn(). Results are
+    stacked in batch order, so they do not depend on the number of workers.
+    """
+    params = dict(DEFAULTS, **(params or {}))
+    sizes = [min(PATHS_PER_BATCH, n_paths - i) for i in range(0, n_paths, PATHS_PER_BATCH)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = workers or min(len(sizes), os.cpu_count() or 1)
+    if workers <= 1 or len(sizes) <= 1:
+        results = [simulate_batch(s, n, params, months, arrays) for s, n in zip(seeds, sizes)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(arrays,)) as pool:
+            results = list(pool.map(_run_batch, seeds, sizes, [params] * len(sizes), [months] * len(sizes)))
+    balances = np.concatenate([r[0] for r in results])
+    overdue = np.concatenate([r[1] for r in results])
+    return {
+        "paths": n_paths,
+        "seed": seed,
+        "params": params,
+        "months": months,
+        "balance_pct": {p: np.percentile(balances, p, axis=0) for p in PERCENTILES},
+        "arrears_pct": {p: np.percentile(overdue, p, axis=0) for p in PERCENTILES},
+        "debt_free_prob": float((balances[:, -1] <= 0.5).mean()),
+    }
+
+
+def baseline_path(arrays, months=HORIZON_MONTHS):
+    """Total balance with every EMI paid on time and no rate moves (for comparison)."""
+    params = dict(DEFAULTS, miss_prob=0.0, shock_prob=0.0, cure_prob=0.0)
+    return simulate_batch(0, 1, params, months, arrays)[0][0]
+
+
+def print_report(result, base):
+    print(f"{result['paths']:,} paths, seed {result['seed']}: miss {result['params']['miss_prob']:.0%}/month, "
+          f"rate moves {result['params']['shock_prob']:.0%}/month of {result['params']['shock_bps']:.0f} bps")
+    head = " ".join(f"{'P' + str(p):>8}" for p in PERCENTILES)
+    print(f"{'Month':>5} {'On-time':>9} {head}   (total balance, Rs L)")
+    for m in range(0, result["months"] + 1, 6):
+        cells = " ".join(f"{result['balance_pct'][p][m] / LAKH:>8.2f}" for p in PERCENTILES)
+        print(f"{m:>5} {base[m] / LAKH:>9.2f} {cells}")
+    worst = result["arrears_pct"][95]
+    print(f"Arrears P95 peak: Rs {worst.max() / LAKH:.2f}L (month {int(worst.argmax())})")
+    print(f"Debt-free by month {result['months']}: {result['debt_free_prob']:.1%} of paths")
+
+
+def benchmark(n_loans=200, n_paths=20000):
+    """Same seed at 1 worker and N workers: timing, and a check the results match."""
+    rng = np.random.default_rng(7)
+    balance = rng.integers(100000, 5000000, n_loans).astype(np.float64)
+    arrays = {"balance": balance, "emi": np.floor(balance / rng.integers(24, 120, n_loans)),
+              "rate": rng.uniform(9, 24, n_loans), "floating": rng.random(n_loans) < 0.5}
+    timings = {}
+    results = {}
+    for workers in (1, max(2, os.cpu_count() or 1)):
+        start = time.perf_counter()
+        results[workers] = run_stress(arrays, n_paths, seed=1, workers=workers)
+        timings[workers] = time.perf_counter() - start
+    same = all(np.array_equal(results[1]["balance_pct"][p], r["balance_pct"][p])
+               for r in results.values() for p in PERCENTILES)
+    for workers, elapsed in timings.items():
+        print(f"Stress engine: {n_loans:,} loans x {n_paths:,} paths x {HORIZON_MONTHS} months, "
+              f"{workers} worker(s): {elapsed:.2f}s")
+    print(f"  identical results across worker counts: {same}")
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Monte Carlo stress test: missed EMIs, penal interest, rate shocks")
+    parser.add_argument("--paths", type=int, default=10000, help="Simulated paths")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed (same seed -> same result)")
+    parser.add_argument("--workers", type=int, help="Processes (default: one per core)")
+    parser.add_argument("--months", type=int, default=HORIZON_MONTHS, help="Horizon in months")
+    parser.add_argument("--miss", type=float, default=DEFAULTS["miss_prob"], help="Monthly missed-EMI probability")
+    parser.add_argument("--shock", type=float, default=DEFAULTS["shock_prob"], help="Monthly rate-move probability")
+    parser.add_argument("--shock-bps", type=float, default=DEFAULTS["shock_bps"], help="Rate move size (bps)")
+    parser.add_argument("--penal-rate", type=float, default=DEFAULTS["penal_rate"], help="Penal interest %% p.a.")
+    parser.add_argument("--floating", help="Providers with floating rates, e.g. HDFC,L&T (adds to rate_type)")
+    parser.add_argument("--default-rate", type=float, default=DEFAULT_RATE,
+                        help="Interest %% p.a. for loans without interest_rate")
+    parser.add_argument("--masters", default="masters.json", help="Portfolio file")
+    parser.add_argument("--bench", type=int, nargs="?", const=200, metavar="LOANS",
+                        help="Benchmark with synthetic loans (default 200)")
+    args = parser.parse_args()
+    if args.bench:
+        benchmark(args.bench)
+        return 0
+    with open(args.masters, "r", encoding="utf-8") as f:
+        loans = json.load(f).get("loans", [])
+    # masters.json has no rates: take interest_rate / rate_type from loans/<folder>/loan.json
+    loans = with_loan_details(loans, Path(args.masters).resolve().parent / "loans")
+    floating = [p.strip() for p in args.floating.split(",")] if args.floating else ()
+    arrays = portfolio_arrays(loans, args.default_rate, floating)
+    if not len(arrays["balance"]):
+        print("[!] No running loans")
+        return 1
+    defaulted = int(arrays["rate_defaulted"].sum())
+    if defaulted:
+        print(f"[WARN] {defaulted} of {len(arrays['rate'])} loans have no interest_rate "
+              f"(masters.json or loans/<folder>/loan.json): simulated at {args.default_rate}%")
+    if not arrays["floating"].any() and args.shock > 0:
+        print("[WARN] No floating-rate loans (rate_type in loan.json, or --floating HDFC,L&T): "
+              "rate shocks change nothing")
+    params = {"miss_prob": args.miss, "shock_prob": args.shock, "shock_bps": args.shock_bps,
+              "penal_rate": args.penal_rate}
+    result = run_stress(arrays, args.paths, args.seed, args.workers, args.months, params)
+    print_report(result, baseline_path(arrays, args.months))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Virtual-scroll loan table for large portfolios (verifier.html, dashboard.html)
+Rows go to a compact JSON sidecar (<page>.data.js); the page renders only the
+visible rows, with paging and column sorting. Print still renders every row, and
+per-loan sections summarised on screen are filled in from the sidecar before printing.
+"""
+import json
+from pathlib import Path
+
+# Portfolios above this size switch to the virtual table in 'auto' mode
+VIRTUAL_THRESHOLD = 500
+RENDER_MODES = ("auto", "inline", "virtual")
+
+
+def use_virtual(n_loans, mode="auto"):
+    """True if the page should use the virtual table for n_loans rows."""
+    if mode not in RENDER_MODES:
+        raise ValueError(f"render mode must be one of {RENDER_MODES}, got {mode!r}")
+    if mode == "auto":
+        return n_loans > VIRTUAL_THRESHOLD
+    return mode == "virtual"
+
+
+def render_mode_from_argv(argv):
+    """--virtual / --inline on the command line, else 'auto'."""
+    if "--virtual" in argv:
+        return "virtual"
+    if "--inline" in argv:
+        return "inline"
+    return "auto"
+
+
+def write_sidecar(path, name, columns, rows, extra_tables=None):
+    """
+    Write rows as a compact column/row JSON sidecar.
+    Wrapped in a script assignment so <script src> works from file:// (fetch() does not).
+    extra_tables: {name: (columns, rows)} stored in the same file (e.g. print-only sections).
+    """
+    tables = {name: (columns, rows)}
+    tables.update(extra_tables or {})
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("window.LOAN_SIDECAR=window.LOAN_SIDECAR||{};")
+        for table, (table_columns, table_rows) in tables.items():
+            payload = json.dumps({"columns": list(table_columns), "rows": table_rows},
+                                 ensure_ascii=False, separators=(",", ":"))
+            f.write(f"window.LOAN_SIDECAR[{json.dumps(table)}]=")
+            f.write(payload)
+            f.write(";\n")
+    return Path(path).name
+
+
+def grid_block(name, sidecar_file, columns_js, extra_js="", options_js="{}"):
+    """
+    HTML for a virtual table bound to sidecar `name`; columns_js is a JS array of column specs.
+    options_js: VirtualTable options, e.g. {printBody: '<tbody id>'} to print rows into a static table.
+    """
+    return f"""
+            <div id="vt-{name}" class="vt"></div>
+            <script src="{sidecar_file}"></script>
+            <script>
+{VIRTUAL_TABLE_JS}
+                var {name}Grid = new VirtualTable(document.getElementById('vt-{name}'), window.LOAN_SIDECAR['{name}'], {columns_js}, {options_js});
+{extra_js}
+            </script>
+"""
+
+
+VIRTUAL_TABLE_CSS = """
+        .vt-toolbar { display: flex; gap: 10px; align-items: center; justify-content: flex-end; padding: 8px 0; font-size: 13px; color: #555; }
+        .vt-toolbar button { padding: 4px 10px; border: 1px solid #ccc; background: #fff; border-radius: 4px; cursor: pointer; }
+        .vt-toolbar button:disabled { opacity: 0.4; cursor: default; }
+        .vt table { width: 100%; table-layout: fixed; border-collapse: collapse; }
+        .vt-head th { cursor: pointer; user-select: none; }
+        .vt-head th.vt-sorted-asc::after { content: " ▲"; }
+        .vt-head th.vt-sorted-desc::after { content: " ▼"; }
+        .vt-viewport { position: relative; height: 600px; overflow-y: auto; }
+        .vt-body { position: absolute; top: 0; left: 0; }
+        .vt-body td { white-space: nowrap; overflow: hidden; text-overflow: ellipsis; }
+        .vt-print, .vt-print-only { display: none; }
+        @media print {
+            .vt-toolbar, .vt-head, .vt-viewport, .vt-screen-only { display: none !important; }
+            .vt-print { display: table; }
+            .vt-print-only { display: block; }
+        }
+"""
+
+VIRTUAL_TABLE_JS = """
+                if (typeof VirtualTable === 'undefined') {
+                    var escapeHtml = function(v) {
+                        return String(v == null ? '' : v).replace(/&/g, '&amp;').replace(/</g, '&lt;').replace(/>/g, '&gt;').replace(/"/g, '&quot;');
+                    };
+                    var VirtualTable = function(el, data, columns, opts) {
+                        opts = opts || {};
+                        this.el = el;
+                        this.rows = data.rows;
+                        this.keys = {};
+                        for (var k = 0; k < data.columns.length; k++) this.keys[data.columns[k]] = k;
+                        this.columns = columns;
+                        this.rowHeight = opts.rowHeight || 40;
+                        this.pageSize = opts.pageSize || 1000;
+                        this.printBody = opts.printBody || null;  // id of a static <tbody> to print into
+                        this.overscan = 10;
+                        this.page = 0;
+                        this.sortCol = -1;
+                        this.sortDir = 1;
+                        this.order = [];
+                        for (var i = 0; i < this.rows.length; i++) this.order.push(i);
+                        this.build();
+                        this.render();
+                    };
+                    VirtualTable.prototype.value = function(col, r) {
+                        return this.rows[r][this.keys[this.columns[col].key]];
+                    };
+                    VirtualTable.prototype.cell = function(col, r) {
+                        var c = this.columns[col], v = this.value(col, r);
+                        return c.render ? c.render(v, this.rows[r], r, this.keys) : escapeHtml(v);
+                    };
+                    VirtualTable.prototype.rowHtml = function(r) {
+                        var out = '<tr style="height:' + this.rowHeight + 'px">';
+                        for (var c = 0; c < this.columns.length; c++) out += '<td>' + this.cell(c, r) + '</td>';
+                        return out + '</tr>';
+                    };
+                    VirtualTable.prototype.build = function() {
+                        var self = this, head = '<thead><tr>';
+                        for (var c = 0; c < this.columns.length; c++) head += '<th data-col="' + c + '">' + escapeHtml(this.columns[c].label) + '</th>';
+                        head += '</tr></thead>';
+                        this.el.innerHTML =
+                            '<div class="vt-toolbar"><button class="vt-prev">&laquo; Prev</button><span class="vt-status"></span><button class="vt-next">Next &raquo;</button></div>' +
+                            '<table class="vt-head">' + head + '</table>' +
+                            '<div class="vt-viewport"><div class="vt-spacer"></div><table class="vt-body"><tbody></tbody></table></div>' +
+                            (this.printBody ? '' : '<table class="vt-print">' + head + '<tbody></tbody></table>');
+                        this.viewport = this.el.querySelector('.vt-viewport');
+                        this.spacer = this.el.querySelector('.vt-spacer');
+                        this.body = this.el.querySelector('.vt-body');
+                        this.status = this.el.querySelector('.vt-status');
+                        this.prevBtn = this.el.querySelector('.vt-prev');
+                        this.nextBtn = this.el.querySelector('.vt-next');
+                        this.viewport.addEventListener('scroll', function() { self.render(); });
+                        this.prevBtn.addEventListener('click', function() { self.goto(self.page - 1); });
+                        this.nextBtn.addEventListener('click', function() { self.goto(self.page + 1); });
+                        var ths = this.el.querySelectorAll('.vt-head th');
+                        for (var t = 0; t < ths.length; t++) {
+                            ths[t].addEventListener('click', function() { self.sort(parseInt(this.getAttribute('data-col'), 10)); });
+                        }
+                        // Print renders every row (in the current sort order), not just the visible window
+                        VirtualTable.onPrint(function() { self.fillPrint(); }, function() { self.clearPrint(); });
+                    };
+                    VirtualTable.prototype.pageCount = function() {
+                        return Math.max(1, Math.ceil(this.order.length / this.pageSize));
+                    };
+                    VirtualTable.prototype.goto = function(page) {
+                        this.page = Math.min(Math.max(0, page), this.pageCount() - 1);
+                        this.viewport.scrollTop = 0;
+                        this.render();
+                    };
+                    VirtualTable.prototype.sort = function(col) {
+                        var self = this;
+                        this.sortDir = (this.sortCol === col) ? -this.sortDir : 1;
+                        this.sortCol = col;
+                        this.order.sort(function(a, b) {
+                            var x = self.value(col, a), y = self.value(col, b);
+                            if (typeof x === 'string' || typeof y === 'string') { x = String(x).toLowerCase(); y = String(y).toLowerCase(); }
+                            return (x < y ? -1 : x > y ? 1 : a - b) * self.sortDir;
+                        });
+                        var ths = this.el.querySelectorAll('.vt-head th');
+                        for (var t = 0; t < ths.length; t++) ths[t].className = '';
+                        ths[col].className = this.sortDir > 0 ? 'vt-sorted-asc' : 'vt-sorted-desc';
+                        this.goto(0);
+                    };
+                    VirtualTable.prototype.render = function() {
+                        var base = this.page * this.pageSize;
+                        var count = Math.min(this.pageSize, this.order.length - base);
+                        this.spacer.style.height = (count * this.rowHeight) + 'px';
+                        var first = Math.max(0, Math.floor(this.viewport.scrollTop / this.rowHeight) - this.overscan);
+                        var visible = Math.ceil(this.viewport.clientHeight / this.rowHeight) + 2 * this.overscan;
+                        var last = Math.min(count, first + visible);
+                        var html = '';
+                        for (var i = first; i < last; i++) html += this.rowHtml(this.order[base + i]);
+                        this.body.style.top = (first * this.rowHeight) + 'px';
+                        this.body.tBodies[0].innerHTML = html;
+                        this.status.textContent = 'Page ' + (this.page + 1) + ' / ' + this.pageCount() + ' (' + this.order.length + ' loans)';
+                        this.prevBtn.disabled = this.page === 0;
+                        this.nextBtn.disabled = this.page >= this.pageCount() - 1;
+                    };
+                    VirtualTable.prototype.printTarget = function() {
+                        return this.printBody ? document.getElementById(this.printBody) : this.el.querySelector('.vt-print').tBodies[0];
+                    };
+                    VirtualTable.prototype.fillPrint = function() {
+                        var parts = [];
+                        for (var i = 0; i < this.order.length; i++) parts.push(this.rowHtml(this.order[i]));
+                        this.printTarget().innerHTML = parts.join('');
+                    };
+                    VirtualTable.prototype.clearPrint = function() {
+                        this.printTarget().innerHTML = '';
+                    };
+                    // fill() before printing (Ctrl+P or window.print()), clear() after
+                    VirtualTable.onPrint = function(fill, clear) {
+                        window.addEventListener('beforeprint', fill);
+                        window.addEventListener('afterprint', clear);
+                        if (window.matchMedia) {
+                            var mq = window.matchMedia('print');
+                            var onChange = function(e) { if (e.matches) fill(); else clear(); };
+                            if (mq.addEventListener) mq.addEventListener('change', onChange); else if (mq.addListener) mq.addListener(onChange);
+                        }
+                    };
+                    VirtualTable.records = function(data) {
+                        return data.rows.map(function(row) {
+                            var o = {};
+                            for (var k = 0; k < data.columns.length; k++) o[data.columns[k]] = row[k];
+                            return o;
+                        });
+                    };
+                }
+"""